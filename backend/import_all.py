@@ -1,15 +1,20 @@
 """Batch import all legacy CSV data from data/ directory."""
 
 import asyncio
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Add the backend directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from logger.config import DATA_DIR
-from logger.database import init_db, async_session
-from logger.services.import_service import preview_import, confirm_import
+from logger.database import init_db, async_session, bulk_load_pragmas
+from logger.services.family_service import load_match_rules
+from logger.services.import_service import (
+    parse_import_files, stage_preview, bulk_confirm_import,
+)
 
 
 # Ordered from oldest to newest
@@ -30,6 +35,61 @@ SESSION_PAIRS = [
 ]
 
 
+# How many CSV pairs to read off disk concurrently.
+READ_BATCH_SIZE = 4
+
+
+async def _read_optional(path: Path) -> bytes | None:
+    try:
+        return await asyncio.to_thread(path.read_bytes)
+    except FileNotFoundError:
+        return None
+
+
+async def _preview_all(queue: asyncio.Queue, pool: ProcessPoolExecutor) -> None:
+    """Read and parse each CSV pair, handing previews to the confirm loop.
+
+    Files are read in batches on worker threads and parsed in parallel in
+    worker processes (CSV parsing is CPU-bound). Each batch's previews are
+    queued in order so parsing the next batch overlaps the inserts of the
+    previous one. A None sentinel marks the end.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        # Match rules only change via the API, so one snapshot covers the run.
+        async with async_session() as db:
+            rules = await load_match_rules(db)
+
+        for i in range(0, len(SESSION_PAIRS), READ_BATCH_SIZE):
+            batch = SESSION_PAIRS[i:i + READ_BATCH_SIZE]
+            contents = await asyncio.gather(*[
+                _read_optional(DATA_DIR / name) for pair in batch for name in pair
+            ])
+            staged = await asyncio.gather(*[
+                loop.run_in_executor(
+                    pool, parse_import_files,
+                    contents[2 * j], study_file, rules, contents[2 * j + 1],
+                )
+                for j, (study_file, _) in enumerate(batch)
+                if contents[2 * j] is not None
+            ], return_exceptions=True)
+            staged_iter = iter(staged)
+
+            for j, (study_file, text_file) in enumerate(batch):
+                if contents[2 * j] is None:
+                    await queue.put((study_file, None, None))
+                    continue
+                result = next(staged_iter)
+                if isinstance(result, Exception):
+                    await queue.put((study_file, None, result))
+                    continue
+                has_text = contents[2 * j + 1] is not None
+                preview = stage_preview(result, study_file, text_file if has_text else None)
+                await queue.put((study_file, preview, None))
+    finally:
+        await queue.put(None)
+
+
 async def main():
     await init_db()
 
@@ -38,46 +98,48 @@ async def main():
     total_observations = 0
     total_text = 0
 
-    for study_file, text_file in SESSION_PAIRS:
-        study_path = DATA_DIR / study_file
-        text_path = DATA_DIR / text_file
-
-        if not study_path.exists():
-            print(f"  SKIP: {study_file} not found")
-            continue
-
-        study_content = study_path.read_bytes()
-        text_content = text_path.read_bytes() if text_path.exists() else None
-
-        print(f"Importing {study_file}...", end=" ")
-
-        try:
-            preview = await preview_import(
-                study_content=study_content,
-                study_filename=study_file,
-                text_content=text_content,
-                text_filename=text_file if text_content else None,
-            )
-
-            if preview["warnings"]:
-                print(f"  Warnings: {preview['warnings']}")
-
-            async with async_session() as db:
-                result = await confirm_import(preview["preview_id"], db)
-
-            total_sessions += 1
-            total_records += result["daily_records_created"]
-            total_observations += result["observations_created"]
-            total_text += result["text_entries_created"]
-
-            print(
-                f"OK - {result['categories_created']} cats, "
-                f"{result['daily_records_created']} days, "
-                f"{result['observations_created']} obs, "
-                f"{result['text_entries_created']} text"
-            )
-        except Exception as e:
-            print(f"ERROR: {e}")
+    # Relax fsync/journaling for the whole batch; defaults come back after.
+    async with bulk_load_pragmas():
+        # Confirms write to the same DB so they stay sequential, but the
+        # producer keeps parsing ahead of them.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=READ_BATCH_SIZE)
+        with ProcessPoolExecutor(max_workers=min(READ_BATCH_SIZE, os.cpu_count() or 1)) as pool:
+            producer = asyncio.create_task(_preview_all(queue, pool))
+
+            while (item := await queue.get()) is not None:
+                study_file, preview, error = item
+
+                if preview is None and error is None:
+                    print(f"  SKIP: {study_file} not found")
+                    continue
+
+                print(f"Importing {study_file}...", end=" ")
+
+                try:
+                    if error is not None:
+                        raise error
+
+                    if preview["warnings"]:
+                        print(f"  Warnings: {preview['warnings']}")
+
+                    # One BEGIN…COMMIT per file, executemany per table (no ORM flushes)
+                    result = await bulk_confirm_import(preview["preview_id"])
+
+                    total_sessions += 1
+                    total_records += result["daily_records_created"]
+                    total_observations += result["observations_created"]
+                    total_text += result["text_entries_created"]
+
+                    print(
+                        f"OK - {result['categories_created']} cats, "
+                        f"{result['daily_records_created']} days, "
+                        f"{result['observations_created']} obs, "
+                        f"{result['text_entries_created']} text"
+                    )
+                except Exception as e:
+                    print(f"ERROR: {e}")
+
+            await producer
 
     print(f"\n{'='*60}")
     print(f"Total sessions imported: {total_sessions}")
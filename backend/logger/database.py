@@ -1,16 +1,90 @@
 import shutil
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy import text as sa_text
 
 from logger.config import DATABASE_URL, DB_PATH
 from logger.models import Base
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Larger compiled-statement cache than the default 500: the app has a lot of
+# distinct ORM/Core statements and recompiling one costs far more than a hit.
+# With WAL on (see CONNECT_PRAGMAS) readers don't block each other or the
+# writer, so a wider queue pool lets the dashboard's parallel analytics calls
+# each get their own connection instead of queueing behind 5. Shared-cache
+# mode is deliberately not used: it serializes connections on table locks
+# and is incompatible with WAL's concurrency. Some endpoints fan out onto
+# sibling sessions while still holding the request's connection, so a
+# checkout that can't be served fails after pool_timeout rather than hanging.
+# No pre-ping/recycle: these are local file handles, not server connections
+# that can go stale. sqlite3 keeps prepared statements per connection keyed on
+# the SQL text; its default of 128 is well below the number of distinct
+# statements the app issues, so hot ones were being evicted and re-prepared.
+# Both that statement cache and SQLite's page cache (CONNECT_PRAGMAS) live per
+# connection, so checkouts are LIFO: the most recently used, warmest
+# connection is reused, and the rest only come into play under bursts.
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    query_cache_size=1200,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=8,
+    max_overflow=16,
+    pool_timeout=30,
+    pool_use_lifo=True,
+    connect_args={"cached_statements": 512},
+)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Per-connection PRAGMAs. WAL lets readers proceed while a writer commits and
+# synchronous=NORMAL only fsyncs at checkpoints (still crash-safe under WAL).
+CONNECT_PRAGMAS: dict[str, str | int] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -262144,      # KiB → up to 256 MB page cache
+    "mmap_size": 268435456,     # 256 MB
+}
+
+# Offline bulk imports (import_all.py) trade durability for speed: a crash
+# mid-import just means re-running the script against a fresh DB.
+BULK_LOAD_PRAGMAS: dict[str, str | int] = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+}
+
+_active_pragmas: dict[str, str | int] = dict(CONNECT_PRAGMAS)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _apply_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in _active_pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+@asynccontextmanager
+async def bulk_load_pragmas() -> AsyncIterator[None]:
+    """Run the enclosed block with BULK_LOAD_PRAGMAS, restoring defaults after.
+
+    PRAGMAs are per-connection, so the pool is disposed on entry and exit to
+    make every connection checked out inside (and after) the block pick up
+    the right settings.
+    """
+    await engine.dispose()
+    _active_pragmas.update(BULK_LOAD_PRAGMAS)
+    try:
+        yield
+    finally:
+        _active_pragmas.clear()
+        _active_pragmas.update(CONNECT_PRAGMAS)
+        await engine.dispose()
+
 
 SQLITE_MAGIC = b"SQLite format 3\x00"
 
@@ -34,6 +108,93 @@ JOIN categories c ON o.category_id = c.id
 LEFT JOIN category_families cf ON c.family_id = cf.id
 """
 
+# v_family_totals used to aggregate observations on every read. The rollup now
+# lives in mv_family_totals, kept current by the triggers below; the view just
+# decorates it with family/session labels so callers are unchanged.
+MV_FAMILY_TOTALS = """
+CREATE TABLE IF NOT EXISTS mv_family_totals (
+    family_id INTEGER NOT NULL,
+    session_id INTEGER NOT NULL,
+    total_minutes INTEGER NOT NULL,
+    active_days INTEGER NOT NULL,
+    PRIMARY KEY (family_id, session_id)
+) WITHOUT ROWID
+"""
+
+# Aggregate for whichever (family, session) pairs match {where}. Shared by the
+# full rebuild on startup and the per-pair refresh in each trigger.
+_MV_FAMILY_TOTALS_SELECT = """
+SELECT c.family_id, c.session_id, SUM(o.minutes), COUNT(DISTINCT dr.date)
+FROM categories c
+JOIN observations o ON o.category_id = c.id
+JOIN daily_records dr ON o.daily_record_id = dr.id
+WHERE c.family_id IS NOT NULL {where}
+GROUP BY c.family_id, c.session_id
+"""
+
+
+def _mv_refresh(pair: str) -> str:
+    """Trigger body that recomputes the mv_family_totals row(s) for `pair`.
+
+    `pair` is a subquery yielding (family_id, session_id). active_days is a
+    COUNT(DISTINCT date), which can't be maintained by adding deltas, so the
+    affected pair is re-aggregated instead — an indexed scan of one family's
+    observations within one session.
+    """
+    where = f"AND (c.family_id, c.session_id) IN ({pair})"
+    return (
+        f"DELETE FROM mv_family_totals WHERE (family_id, session_id) IN ({pair});\n"
+        f"INSERT INTO mv_family_totals (family_id, session_id, total_minutes, active_days)\n"
+        f"{_MV_FAMILY_TOTALS_SELECT.format(where=where)};"
+    )
+
+
+def _obs_pair(ref: str) -> str:
+    return f"SELECT family_id, session_id FROM categories WHERE id = {ref}.category_id"
+
+
+def _cat_pair(ref: str) -> str:
+    return f"SELECT {ref}.family_id, {ref}.session_id"
+
+
+MV_FAMILY_TOTALS_TRIGGERS = {
+    "trg_mv_ft_obs_insert": f"""
+CREATE TRIGGER trg_mv_ft_obs_insert AFTER INSERT ON observations BEGIN
+{_mv_refresh(_obs_pair("NEW"))}
+END
+""",
+    "trg_mv_ft_obs_delete": f"""
+CREATE TRIGGER trg_mv_ft_obs_delete AFTER DELETE ON observations BEGIN
+{_mv_refresh(_obs_pair("OLD"))}
+END
+""",
+    "trg_mv_ft_obs_update": f"""
+CREATE TRIGGER trg_mv_ft_obs_update
+AFTER UPDATE OF minutes, category_id, daily_record_id ON observations BEGIN
+{_mv_refresh(_obs_pair("OLD") + " UNION " + _obs_pair("NEW"))}
+END
+""",
+    # Re-linking a category to another family (or deleting it) moves its
+    # minutes between pairs without touching observations.
+    "trg_mv_ft_cat_update": f"""
+CREATE TRIGGER trg_mv_ft_cat_update AFTER UPDATE OF family_id, session_id ON categories BEGIN
+{_mv_refresh(_cat_pair("OLD") + " UNION " + _cat_pair("NEW"))}
+END
+""",
+    "trg_mv_ft_cat_delete": f"""
+CREATE TRIGGER trg_mv_ft_cat_delete AFTER DELETE ON categories BEGIN
+{_mv_refresh(_cat_pair("OLD"))}
+END
+""",
+    # Only active_days depends on the date.
+    "trg_mv_ft_daily_update": f"""
+CREATE TRIGGER trg_mv_ft_daily_update AFTER UPDATE OF date ON daily_records BEGIN
+{_mv_refresh("SELECT DISTINCT c.family_id, c.session_id FROM observations o "
+             "JOIN categories c ON o.category_id = c.id WHERE o.daily_record_id = NEW.id")}
+END
+""",
+}
+
 V_FAMILY_TOTALS = """
 CREATE VIEW v_family_totals AS
 SELECT
@@ -45,16 +206,124 @@ SELECT
     s.label AS session_label,
     s.year,
     s.season,
-    SUM(o.minutes) AS total_minutes,
-    COUNT(DISTINCT dr.date) AS active_days
-FROM category_families cf
-JOIN categories c ON c.family_id = cf.id
-JOIN observations o ON o.category_id = c.id
-JOIN daily_records dr ON o.daily_record_id = dr.id
-JOIN sessions s ON c.session_id = s.id
-GROUP BY cf.id, s.id
+    mv.total_minutes,
+    mv.active_days
+FROM mv_family_totals mv
+JOIN category_families cf ON mv.family_id = cf.id
+JOIN sessions s ON mv.session_id = s.id
 """
 
+# categories.total_minutes and category_families.{total_minutes,category_count}
+# are kept current by delta triggers: observation writes adjust their
+# category, and any change to a category's total or family is mirrored onto
+# the old/new family. A category moving families carries its total with it.
+DENORM_TOTALS_TRIGGERS = {
+    "trg_cat_total_obs_insert": """
+CREATE TRIGGER trg_cat_total_obs_insert AFTER INSERT ON observations BEGIN
+    UPDATE categories SET total_minutes = total_minutes + NEW.minutes WHERE id = NEW.category_id;
+END
+""",
+    "trg_cat_total_obs_delete": """
+CREATE TRIGGER trg_cat_total_obs_delete AFTER DELETE ON observations BEGIN
+    UPDATE categories SET total_minutes = total_minutes - OLD.minutes WHERE id = OLD.category_id;
+END
+""",
+    "trg_cat_total_obs_update": """
+CREATE TRIGGER trg_cat_total_obs_update AFTER UPDATE OF minutes, category_id ON observations BEGIN
+    UPDATE categories SET total_minutes = total_minutes - OLD.minutes WHERE id = OLD.category_id;
+    UPDATE categories SET total_minutes = total_minutes + NEW.minutes WHERE id = NEW.category_id;
+END
+""",
+    "trg_sess_total_day_insert": """
+CREATE TRIGGER trg_sess_total_day_insert AFTER INSERT ON daily_records BEGIN
+    UPDATE sessions
+    SET total_minutes = total_minutes + NEW.total_minutes, days_logged = days_logged + 1
+    WHERE id = NEW.session_id;
+END
+""",
+    "trg_sess_total_day_delete": """
+CREATE TRIGGER trg_sess_total_day_delete AFTER DELETE ON daily_records BEGIN
+    UPDATE sessions
+    SET total_minutes = total_minutes - OLD.total_minutes, days_logged = days_logged - 1
+    WHERE id = OLD.session_id;
+END
+""",
+    "trg_sess_total_day_update": """
+CREATE TRIGGER trg_sess_total_day_update AFTER UPDATE OF total_minutes, session_id ON daily_records BEGIN
+    UPDATE sessions
+    SET total_minutes = total_minutes - OLD.total_minutes, days_logged = days_logged - 1
+    WHERE id = OLD.session_id;
+    UPDATE sessions
+    SET total_minutes = total_minutes + NEW.total_minutes, days_logged = days_logged + 1
+    WHERE id = NEW.session_id;
+END
+""",
+    "trg_fam_total_cat_insert": """
+CREATE TRIGGER trg_fam_total_cat_insert AFTER INSERT ON categories BEGIN
+    UPDATE category_families
+    SET total_minutes = total_minutes + NEW.total_minutes, category_count = category_count + 1
+    WHERE id = NEW.family_id;
+END
+""",
+    "trg_fam_total_cat_delete": """
+CREATE TRIGGER trg_fam_total_cat_delete AFTER DELETE ON categories BEGIN
+    UPDATE category_families
+    SET total_minutes = total_minutes - OLD.total_minutes, category_count = category_count - 1
+    WHERE id = OLD.family_id;
+END
+""",
+    "trg_fam_total_cat_update": """
+CREATE TRIGGER trg_fam_total_cat_update AFTER UPDATE OF total_minutes, family_id ON categories BEGIN
+    UPDATE category_families
+    SET total_minutes = total_minutes - OLD.total_minutes, category_count = category_count - 1
+    WHERE id = OLD.family_id;
+    UPDATE category_families
+    SET total_minutes = total_minutes + NEW.total_minutes, category_count = category_count + 1
+    WHERE id = NEW.family_id;
+END
+""",
+}
+
+
+async def _create_denormalized_totals(conn) -> None:
+    """(Re)create the rollup triggers and backfill the columns from scratch."""
+    for name, ddl in DENORM_TOTALS_TRIGGERS.items():
+        await conn.execute(sa_text(f"DROP TRIGGER IF EXISTS {name}"))
+        await conn.exec_driver_sql(ddl)
+    await conn.execute(sa_text(
+        "UPDATE categories SET total_minutes = "
+        "(SELECT COALESCE(SUM(minutes), 0) FROM observations WHERE category_id = categories.id)"
+    ))
+    await conn.execute(sa_text(
+        "UPDATE category_families SET "
+        "total_minutes = (SELECT COALESCE(SUM(total_minutes), 0) FROM categories "
+        "WHERE family_id = category_families.id), "
+        "category_count = (SELECT COUNT(*) FROM categories WHERE family_id = category_families.id)"
+    ))
+    await conn.execute(sa_text(
+        "UPDATE sessions SET "
+        "total_minutes = (SELECT COALESCE(SUM(total_minutes), 0) FROM daily_records "
+        "WHERE session_id = sessions.id), "
+        "days_logged = (SELECT COUNT(*) FROM daily_records WHERE session_id = sessions.id)"
+    ))
+
+
+async def _create_family_totals(conn) -> None:
+    """(Re)create mv_family_totals, its triggers, and rebuild it from scratch.
+
+    The full rebuild on every boot is one aggregate pass and also picks up
+    any drift from a DB that was swapped in via replace_db_file.
+    """
+    await conn.execute(sa_text(MV_FAMILY_TOTALS))
+    for name, ddl in MV_FAMILY_TOTALS_TRIGGERS.items():
+        await conn.execute(sa_text(f"DROP TRIGGER IF EXISTS {name}"))
+        await conn.exec_driver_sql(ddl)
+    await conn.execute(sa_text("DELETE FROM mv_family_totals"))
+    await conn.execute(sa_text(
+        "INSERT INTO mv_family_totals (family_id, session_id, total_minutes, active_days)"
+        + _MV_FAMILY_TOTALS_SELECT.format(where="")
+    ))
+
 
 async def _migrate_schema(conn) -> None:
     """Idempotent ALTERs for columns SQLAlchemy create_all can't add to existing tables.
@@ -74,17 +343,42 @@ async def _migrate_schema(conn) -> None:
     await add_col_if_missing("timer_entries", "plan_item_id", "plan_item_id INTEGER REFERENCES plan_items(id) ON DELETE SET NULL")
     await add_col_if_missing("manual_entries", "plan_item_id", "plan_item_id INTEGER REFERENCES plan_items(id) ON DELETE SET NULL")
     await add_col_if_missing("plan_items", "importance", "importance TEXT")
+    await add_col_if_missing("categories", "total_minutes", "total_minutes INTEGER NOT NULL DEFAULT 0")
+    await add_col_if_missing("category_families", "total_minutes", "total_minutes INTEGER NOT NULL DEFAULT 0")
+    await add_col_if_missing("category_families", "category_count", "category_count INTEGER NOT NULL DEFAULT 0")
+    await add_col_if_missing("ai_descriptions", "content_hash", "content_hash TEXT")
+    await add_col_if_missing("sessions", "total_minutes", "total_minutes INTEGER NOT NULL DEFAULT 0")
+    await add_col_if_missing("sessions", "days_logged", "days_logged INTEGER NOT NULL DEFAULT 0")
+
+    # create_all only emits indexes alongside a new table, so indexes added to
+    # an existing table's __table_args__ are created here.
+    await conn.execute(sa_text("DROP INDEX IF EXISTS idx_observations_category"))
+    await conn.execute(sa_text("DROP INDEX IF EXISTS idx_daily_records_session"))
+    await conn.run_sync(
+        lambda sync_conn: [
+            index.create(sync_conn, checkfirst=True)
+            for table in Base.metadata.sorted_tables
+            for index in table.indexes
+        ]
+    )
 
 
 async def init_db() -> None:
     async with engine.begin() as conn:
+        # pysqlite only opens implicit transactions for DML, so DDL would
+        # otherwise autocommit statement by statement.
+        await conn.exec_driver_sql("BEGIN")
         await conn.run_sync(Base.metadata.create_all)
         await _migrate_schema(conn)
         # Recreate views to pick up schema changes
         await conn.execute(sa_text("DROP VIEW IF EXISTS v_daily_totals"))
         await conn.execute(sa_text(V_DAILY_TOTALS))
+        await _create_family_totals(conn)
+        await _create_denormalized_totals(conn)
         await conn.execute(sa_text("DROP VIEW IF EXISTS v_family_totals"))
         await conn.execute(sa_text(V_FAMILY_TOTALS))
+        # Refresh planner statistics so the covering indexes get picked.
+        await conn.execute(sa_text("ANALYZE"))
 
     # Seed groups, then default families + match rules (all idempotent).
     # The second seed pass is intentional: migrate_family_types_to_groups can
@@ -92,11 +386,23 @@ async def init_db() -> None:
     # their match rules. Re-running the seed afterwards re-creates any rules
     # that the new seed config points at the salk family (or any other surviving
     # family) so detection works on the same boot, not the next one.
-    from logger.services.family_service import seed_default_families_and_rules, link_orphans_to_seed_families
+    from logger.services.family_service import (
+        seed_default_families_and_rules, link_orphans_to_seed_families, invalidate_family_cache,
+    )
     from logger.services.group_service import seed_default_groups, migrate_family_types_to_groups
     from logger.services.timer_service import realign_timer_dates_to_user_tz
     from logger.models import Setting
     from sqlalchemy import select
+    from logger.services import analytics_service, totals_cache
+    from logger.services.session_service import invalidate_active_session
+    from logger.services.api_key_service import invalidate_api_key
+    from logger.services.lookup_cache import invalidate_lookup_cache
+    invalidate_family_cache()
+    analytics_service.invalidate_cache()
+    totals_cache.invalidate_cache()
+    invalidate_lookup_cache()
+    invalidate_active_session()
+    invalidate_api_key()
     async with async_session() as session:
         await seed_default_groups(session)
         await seed_default_families_and_rules(session)
@@ -146,6 +452,12 @@ async def replace_db_file(new_bytes: bytes) -> dict:
     finally:
         await probe_engine.dispose()
 
+    # Dispose the engine pool first: closing the last connection checkpoints
+    # the WAL into the main file, so the backup below is complete. Any new
+    # connection after the swap re-opens the new file. Existing in-flight
+    # connections (none expected for a single user) will fail.
+    await engine.dispose()
+
     # Single rolling backup at logger.db.bak — we don't keep history, just the
     # most recent pre-replace snapshot as a safety net. Older timestamped backups
     # (from a prior implementation) are intentionally not cleaned up here; if you
@@ -155,10 +467,6 @@ async def replace_db_file(new_bytes: bytes) -> dict:
         backup_path = DB_PATH.with_suffix(DB_PATH.suffix + ".bak")
         shutil.copy2(DB_PATH, backup_path)
 
-    # Dispose the engine pool so any new connection re-opens the new file.
-    # Existing in-flight connections (none expected for a single user) will fail.
-    await engine.dispose()
-
     # Swap. shutil.move handles the rename across same-filesystem cases.
     shutil.move(str(pending), str(DB_PATH))
 
@@ -174,7 +482,10 @@ async def replace_db_file(new_bytes: bytes) -> dict:
 
 
 async def export_db_bytes() -> bytes:
-    """Read the current DB file off disk. Done synchronously inside a thread-safe
-    read — SQLite's WAL mode (if enabled) handles concurrent readers, and we're
-    not under write contention in a single-user app."""
+    """Read the current DB file off disk. Committed pages may still live in the
+    -wal file, so checkpoint them into the main file first — SQLite's WAL mode
+    handles concurrent readers, and we're not under write contention in a
+    single-user app."""
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
     return DB_PATH.read_bytes()
@@ -11,6 +11,8 @@ from starlette.responses import FileResponse
 
 from logger.config import CORS_ORIGINS, IS_PACKAGED
 from logger.database import init_db
+from logger.services.github_service import close_http_client
+from logger.utils.json_response import FastJSONResponse
 from logger.routers import sessions, categories, import_csv, settings, timers, manual_entries, daily, groups, analytics, chat, projects, family_rules, breaks, planner
 
 
@@ -18,9 +20,12 @@ from logger.routers import sessions, categories, import_csv, settings, timers, m
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     await init_db()
     yield
+    await close_http_client()
 
 
-app = FastAPI(title="Logger", version="0.1.0", lifespan=lifespan)
+app = FastAPI(
+    title="Logger", version="0.1.0", lifespan=lifespan, default_response_class=FastJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -4,6 +4,10 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import DeclarativeBase, relationship
 
+# UTC ISO-8601 with milliseconds, e.g. 2025-01-05T18:30:00.123Z — parses
+# unambiguously in JS/Python, unlike datetime('now')'s zone-less "YYYY-MM-DD HH:MM:SS".
+NOW_ISO = text("(strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))")
+
 
 class Base(DeclarativeBase):
     pass
@@ -20,9 +24,17 @@ class Session(Base):
     end_date = Column(Text)
     is_active = Column(Boolean, default=False)
     source_file = Column(Text)
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    # SUM(daily_records.total_minutes) / COUNT(daily_records), maintained by
+    # triggers (see database.py)
+    total_minutes = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    days_logged = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
-    __table_args__ = (UniqueConstraint("year", "season"),)
+    __table_args__ = (
+        UniqueConstraint("year", "season"),
+        # At most one row matches; nearly every request looks it up.
+        Index("idx_sessions_active", "is_active", sqlite_where=text("is_active = 1")),
+    )
 
     categories = relationship("Category", back_populates="session", cascade="all, delete-orphan")
     daily_records = relationship("DailyRecord", back_populates="session", cascade="all, delete-orphan")
@@ -39,7 +51,10 @@ class CategoryFamily(Base):
     color = Column(Text)
     family_type = Column(Text, default="other")  # legacy — superseded by group_id; kept for compat
     group_id = Column(Integer, ForeignKey("category_groups.id", ondelete="SET NULL"))
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    # Denormalized rollups, maintained by triggers (see database.py)
+    total_minutes = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    category_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     categories = relationship("Category", back_populates="family")
     match_rules = relationship("FamilyMatchRule", back_populates="family", cascade="all, delete-orphan")
@@ -54,7 +69,7 @@ class FamilyMatchRule(Base):
     match_type = Column(Text, nullable=False)  # "exact" | "prefix"
     pattern = Column(Text, nullable=False)     # lowercased
     position = Column(Integer, default=0)
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         UniqueConstraint("match_type", "pattern"),
@@ -74,7 +89,9 @@ class Category(Base):
     display_name = Column(Text)
     family_id = Column(Integer, ForeignKey("category_families.id", ondelete="SET NULL"))
     position = Column(Integer, default=0)
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    # SUM(observations.minutes), maintained by triggers (see database.py)
+    total_minutes = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         UniqueConstraint("session_id", "name"),
@@ -96,12 +113,14 @@ class DailyRecord(Base):
     day_of_week = Column(Text)
     week_number = Column(Integer)
     total_minutes = Column(Integer, nullable=False, default=0)
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         UniqueConstraint("session_id", "date"),
         Index("idx_daily_records_date", "date"),
-        Index("idx_daily_records_session", "session_id"),
+        # Covering: per-session SUM(total_minutes)/COUNT (the sessions rollup
+        # backfill, analytics) reads only the index.
+        Index("idx_daily_records_session_min", "session_id", "total_minutes"),
     )
 
     session = relationship("Session", back_populates="daily_records")
@@ -116,12 +135,15 @@ class Observation(Base):
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
     minutes = Column(Integer, nullable=False, default=0)
     source = Column(Text, default="import")
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         UniqueConstraint("daily_record_id", "category_id"),
-        Index("idx_observations_category", "category_id"),
+        # Covering indexes: per-category SUM(minutes) and the v_daily_totals
+        # join can be answered from the index without touching the table.
+        Index("idx_observations_category_min", "category_id", "minutes"),
         Index("idx_observations_daily", "daily_record_id"),
+        Index("idx_observations_daily_cover", "daily_record_id", "category_id", "minutes", "source"),
     )
 
     daily_record = relationship("DailyRecord", back_populates="observations")
@@ -137,7 +159,7 @@ class TextEntry(Base):
     location = Column(Text)
     notes = Column(Text)
     study_materials = Column(Text)
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         Index("idx_text_entries_date", "date"),
@@ -167,16 +189,23 @@ class TimerEntry(Base):
     # planned"). NULL for ordinary timers. SET NULL on plan deletion — the
     # logged time is real and stays, it just loses its plan attribution.
     plan_item_id = Column(Integer, ForeignKey("plan_items.id", ondelete="SET NULL"))
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
-    updated_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
+    updated_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         Index("idx_timer_active", "is_active", sqlite_where=text("is_active = 1")),
         Index("idx_timer_date", "date"),
+        # Daily view: completed timers for (active session, date).
+        Index("idx_timer_session_date", "session_id", "date", "is_active"),
         Index("idx_timer_category", "category_id"),
         Index("idx_timer_plan_item", "plan_item_id"),
     )
 
+    # lazy="raise": load these explicitly (selectinload / refresh) so a
+    # per-row lazy load can't sneak into a list endpoint.
+    category = relationship("Category", lazy="raise")
+    plan_item = relationship("PlanItem", lazy="raise")
+
 
 class ManualEntry(Base):
     __tablename__ = "manual_entries"
@@ -195,14 +224,18 @@ class ManualEntry(Base):
     # Set when this entry was logged to close out a Planner item. NULL for
     # ordinary manual entries. SET NULL on plan deletion.
     plan_item_id = Column(Integer, ForeignKey("plan_items.id", ondelete="SET NULL"))
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         Index("idx_manual_date", "date"),
+        Index("idx_manual_session_date", "session_id", "date"),
         Index("idx_manual_category", "category_id"),
         Index("idx_manual_plan_item", "plan_item_id"),
     )
 
+    category = relationship("Category", lazy="raise")
+    plan_item = relationship("PlanItem", lazy="raise")
+
 
 class PlanItem(Base):
     """A planner itinerary item — a task scheduled for one or more future (or
@@ -226,8 +259,8 @@ class PlanItem(Base):
     end_time = Column(Text)
     status = Column(Text, nullable=False, default="planned")  # "planned" | "done"
     importance = Column(Text)  # "low" | "medium" | "high" | NULL (unset)
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
-    updated_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
+    updated_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         Index("idx_plan_items_range", "start_date", "end_date"),
@@ -249,7 +282,7 @@ class BreakDay(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     date = Column(Text, nullable=False, unique=True)  # YYYY-MM-DD
     label = Column(Text)                               # e.g. "Vacation", "Sick", "Rest"
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         Index("idx_break_days_date", "date"),
@@ -264,7 +297,8 @@ class AIDescription(Base):
     session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False)
     description = Column(Text, nullable=False)
     model_used = Column(Text)
-    generated_at = Column(Text, server_default=text("(datetime('now'))"))
+    content_hash = Column(Text)
+    generated_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (UniqueConstraint("family_id", "session_id"),)
 
@@ -276,7 +310,7 @@ class ChatMessage(Base):
     role = Column(Text, nullable=False)
     content = Column(Text, nullable=False)
     metadata_ = Column("metadata", Text)
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
 
 class CategoryGroup(Base):
@@ -296,7 +330,7 @@ class CategoryGroup(Base):
     position = Column(Integer, default=0)
     is_system = Column(Boolean, default=False)                  # seeded vs user-added
     is_auto = Column(Boolean, default=False)                    # legacy column, retained for SQLite compat
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     families = relationship("CategoryFamily", back_populates="group")
 
@@ -306,7 +340,7 @@ class Setting(Base):
 
     key = Column(Text, primary_key=True)
     value = Column(Text, nullable=False)
-    updated_at = Column(Text, server_default=text("(datetime('now'))"))
+    updated_at = Column(Text, server_default=NOW_ISO)
 
 
 class GitHubRepoCache(Base):
@@ -322,7 +356,7 @@ class GitHubRepoCache(Base):
     language = Column(Text)
     stars = Column(Integer, default=0)
     html_url = Column(Text)
-    fetched_at = Column(Text, server_default=text("(datetime('now'))"))
+    fetched_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (UniqueConstraint("username", "repo_full_name"),)
 
@@ -333,7 +367,7 @@ class GitHubRepoLink(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     family_id = Column(Integer, ForeignKey("category_families.id", ondelete="CASCADE"), nullable=False)
     repo_full_name = Column(Text, nullable=False)
-    created_at = Column(Text, server_default=text("(datetime('now'))"))
+    created_at = Column(Text, server_default=NOW_ISO)
 
     __table_args__ = (
         UniqueConstraint("family_id", "repo_full_name"),
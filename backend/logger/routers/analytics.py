@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, Query
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from logger.database import get_db
 from logger.schemas import (
+    AnalyticsFilters,
     AnalyticsOverviewResponse,
     DailySeriesPoint,
     CategoryBreakdownItem,
@@ -20,66 +24,74 @@ def _parse_filters(
     to_date: str | None = Query(None),
     week_number: int | None = Query(None),
 ) -> dict:
-    filters: dict = {}
-    if session_ids:
-        filters["session_ids"] = [int(s) for s in session_ids.split(",")]
-    if from_date:
-        filters["from_date"] = from_date
-    if to_date:
-        filters["to_date"] = to_date
-    if week_number is not None:
-        filters["week_number"] = week_number
-    return filters
+    """Shared query-param dependency for the filtered analytics endpoints."""
+    try:
+        filters = AnalyticsFilters(
+            session_ids=session_ids,
+            from_date=from_date or None,
+            to_date=to_date or None,
+            week_number=week_number,
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    return filters.model_dump(exclude_none=True)
+
+
+_OVERVIEW = TypeAdapter(AnalyticsOverviewResponse)
+_DAILY = TypeAdapter(list[DailySeriesPoint])
+_CATEGORIES = TypeAdapter(list[CategoryBreakdownItem])
+_HEATMAP = TypeAdapter(list[HeatmapPoint])
+_SESSIONS = TypeAdapter(list[SessionComparisonItem])
+
+
+async def _cached_json(cache, key, adapter: TypeAdapter, compute) -> Response:
+    """Serve `compute()` as JSON, reusing the serialized bytes while cached."""
+    body = cache.get(key)
+    if body is None:
+        body = adapter.dump_json(adapter.validate_python(await compute()))
+        cache.set(key, body)
+    return Response(content=body, media_type="application/json")
+
+
+def _filters_key(endpoint: str, filters: dict) -> tuple:
+    return (endpoint, json.dumps(filters, sort_keys=True))
 
 
 @router.get("/overview", response_model=AnalyticsOverviewResponse)
-async def overview(
-    session_ids: str | None = Query(None),
-    from_date: str | None = Query(None),
-    to_date: str | None = Query(None),
-    week_number: int | None = Query(None),
-    db: AsyncSession = Depends(get_db),
-):
-    filters = _parse_filters(session_ids, from_date, to_date, week_number)
-    return await analytics_service.get_overview(db, filters)
+async def overview(filters: dict = Depends(_parse_filters), db: AsyncSession = Depends(get_db)):
+    return await _cached_json(
+        analytics_service.response_cache, _filters_key("overview", filters),
+        _OVERVIEW, lambda: analytics_service.get_overview(db, filters),
+    )
 
 
 @router.get("/daily", response_model=list[DailySeriesPoint])
-async def daily(
-    session_ids: str | None = Query(None),
-    from_date: str | None = Query(None),
-    to_date: str | None = Query(None),
-    week_number: int | None = Query(None),
-    db: AsyncSession = Depends(get_db),
-):
-    filters = _parse_filters(session_ids, from_date, to_date, week_number)
-    return await analytics_service.get_daily_series(db, filters)
+async def daily(filters: dict = Depends(_parse_filters), db: AsyncSession = Depends(get_db)):
+    return await _cached_json(
+        analytics_service.response_cache, _filters_key("daily", filters),
+        _DAILY, lambda: analytics_service.get_daily_series(db, filters),
+    )
 
 
 @router.get("/categories", response_model=list[CategoryBreakdownItem])
-async def categories(
-    session_ids: str | None = Query(None),
-    from_date: str | None = Query(None),
-    to_date: str | None = Query(None),
-    week_number: int | None = Query(None),
-    db: AsyncSession = Depends(get_db),
-):
-    filters = _parse_filters(session_ids, from_date, to_date, week_number)
-    return await analytics_service.get_category_breakdown(db, filters)
+async def categories(filters: dict = Depends(_parse_filters), db: AsyncSession = Depends(get_db)):
+    return await _cached_json(
+        analytics_service.response_cache, _filters_key("categories", filters),
+        _CATEGORIES, lambda: analytics_service.get_category_breakdown(db, filters),
+    )
 
 
 @router.get("/heatmap", response_model=list[HeatmapPoint])
-async def heatmap(
-    session_ids: str | None = Query(None),
-    from_date: str | None = Query(None),
-    to_date: str | None = Query(None),
-    week_number: int | None = Query(None),
-    db: AsyncSession = Depends(get_db),
-):
-    filters = _parse_filters(session_ids, from_date, to_date, week_number)
-    return await analytics_service.get_heatmap(db, filters)
+async def heatmap(filters: dict = Depends(_parse_filters), db: AsyncSession = Depends(get_db)):
+    return await _cached_json(
+        analytics_service.response_cache, _filters_key("heatmap", filters),
+        _HEATMAP, lambda: analytics_service.get_heatmap(db, filters),
+    )
 
 
 @router.get("/sessions", response_model=list[SessionComparisonItem])
 async def session_comparison(db: AsyncSession = Depends(get_db)):
-    return await analytics_service.get_session_comparison(db)
+    return await _cached_json(
+        analytics_service.session_comparison_cache, "sessions",
+        _SESSIONS, lambda: analytics_service.get_session_comparison(db),
+    )
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func
+from sqlalchemy import func, lambda_stmt, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from logger.database import get_db
@@ -9,86 +11,74 @@ from logger.schemas import (
     FamilyCreate, FamilyResponse, FamilyUpdate,
 )
 from logger.services.family_service import (
-    detect_family, load_match_rules, get_or_create_family_by_name, get_family_by_id,
+    detect_family, load_match_rules, get_or_create_family_by_name,
 )
 
 
-async def _family_response(fam: CategoryFamily, db: AsyncSession) -> FamilyResponse:
-    cat_count = (await db.execute(
-        select(func.count(Category.id)).where(Category.family_id == fam.id)
-    )).scalar() or 0
-    total = (await db.execute(
-        select(func.coalesce(func.sum(Observation.minutes), 0))
-        .join(Category, Observation.category_id == Category.id)
-        .where(Category.family_id == fam.id)
-    )).scalar() or 0
-
-    group_name = None
-    group_display = None
-    if fam.group_id:
-        g = await db.get(CategoryGroup, fam.group_id)
-        if g:
-            group_name = g.name
-            group_display = g.display_name
-
-    return FamilyResponse(
-        id=fam.id,
-        name=fam.name,
-        display_name=fam.display_name,
-        description=fam.description,
-        color=fam.color,
-        group_id=fam.group_id,
-        group_name=group_name,
-        group_display_name=group_display,
-        family_type=fam.family_type,
-        category_count=cat_count,
-        total_minutes=total,
+# Flat family rows (plus group labels) shaped like FamilyResponse. Built once;
+# per-request filters are added through lambda_stmt so SQLAlchemy reuses the
+# compiled SQL and only swaps the bound values.
+_FAMILY_SELECT = (
+    select(
+        CategoryFamily.id,
+        CategoryFamily.name,
+        CategoryFamily.display_name,
+        CategoryFamily.description,
+        CategoryFamily.color,
+        CategoryFamily.group_id,
+        CategoryGroup.name.label("group_name"),
+        CategoryGroup.display_name.label("group_display_name"),
+        CategoryFamily.family_type,
+        CategoryFamily.category_count,
+        CategoryFamily.total_minutes,
     )
+    .outerjoin(CategoryGroup, CategoryFamily.group_id == CategoryGroup.id)
+)
+
+
+async def _family_response(family_id: int, db: AsyncSession) -> FamilyResponse:
+    stmt = lambda_stmt(lambda: _FAMILY_SELECT)
+    stmt += lambda s: s.where(CategoryFamily.id == family_id)
+    row = (await db.execute(stmt)).one()
+    return FamilyResponse.model_construct(**row._mapping)
 
 router = APIRouter(tags=["categories"])
 
 
-async def _build_cat_response(cat: Category, db: AsyncSession) -> CategoryResponse:
-    """Build a CategoryResponse with family info and total minutes."""
-    total = await db.execute(
-        select(func.coalesce(func.sum(Observation.minutes), 0))
-        .where(Observation.category_id == cat.id)
-    )
-    total_min = total.scalar()
-
-    family_name = None
-    family_display_name = None
-    family_type = None
-    if cat.family_id:
-        fam = await db.get(CategoryFamily, cat.family_id)
-        if fam:
-            family_name = fam.name
-            family_display_name = fam.display_name
-            family_type = fam.family_type
-
-    return CategoryResponse(
-        id=cat.id,
-        session_id=cat.session_id,
-        name=cat.name,
-        display_name=cat.display_name,
-        family_id=cat.family_id,
-        family_name=family_name,
-        family_display_name=family_display_name,
-        family_type=family_type,
-        position=cat.position,
-        total_minutes=total_min,
+# Flat category rows (plus family labels) shaped like CategoryResponse.
+# Projecting columns skips ORM instance/identity-map overhead, and the rows
+# come straight from the DB so model_construct can skip re-validation.
+_CATEGORY_SELECT = (
+    select(
+        Category.id,
+        Category.session_id,
+        Category.name,
+        Category.display_name,
+        Category.family_id,
+        CategoryFamily.name.label("family_name"),
+        CategoryFamily.display_name.label("family_display_name"),
+        CategoryFamily.family_type,
+        Category.position,
+        Category.total_minutes,
     )
+    .outerjoin(CategoryFamily, Category.family_id == CategoryFamily.id)
+)
+
+
+async def _build_cat_response(category_id: int, db: AsyncSession) -> CategoryResponse:
+    """Build a CategoryResponse with family info and total minutes."""
+    stmt = lambda_stmt(lambda: _CATEGORY_SELECT)
+    stmt += lambda s: s.where(Category.id == category_id)
+    row = (await db.execute(stmt)).one()
+    return CategoryResponse.model_construct(**row._mapping)
 
 
 @router.get("/sessions/{session_id}/categories", response_model=list[CategoryResponse])
 async def list_categories(session_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Category)
-        .where(Category.session_id == session_id)
-        .order_by(Category.position)
-    )
-    categories = result.scalars().all()
-    return [await _build_cat_response(cat, db) for cat in categories]
+    stmt = lambda_stmt(lambda: _CATEGORY_SELECT)
+    stmt += lambda s: s.where(Category.session_id == session_id).order_by(Category.position)
+    result = await db.execute(stmt)
+    return [CategoryResponse.model_construct(**row._mapping) for row in result.all()]
 
 
 @router.post("/sessions/{session_id}/categories", response_model=CategoryResponse)
@@ -100,77 +90,75 @@ async def add_category(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Check uniqueness
-    existing = await db.execute(
-        select(Category).where(
-            Category.session_id == session_id,
-            Category.name == data.name,
-        )
-    )
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=409, detail=f"Category '{data.name}' already exists in this session")
-
+    # Detect once: the result drives both the family link (when none was
+    # given) and the default display name.
     rules = await load_match_rules(db)
-    family_id = None
-    family_name = None
+    detected_id = detect_family(data.name, rules)
     if data.family:
-        family = await get_or_create_family_by_name(data.family, db)
-        family_id = family.id
-        family_name = family.name
+        family_id = (await get_or_create_family_by_name(data.family, db)).id
     else:
-        detected_id = detect_family(data.name, rules)
-        if detected_id is not None:
-            family = await get_family_by_id(detected_id, db)
-            family_id = detected_id
-            family_name = family.name if family else None
+        family_id = detected_id
 
     display = data.display_name
     if not display:
-        detected_id = detect_family(data.name, rules)
         if detected_id is not None:
             display = rules.family_display.get(detected_id) or data.name
         else:
             display = data.name
 
-    # Get max position
-    max_pos = await db.execute(
-        select(func.coalesce(func.max(Category.position), -1))
+    # Uniqueness and the next position are resolved inside the INSERT itself:
+    # ON CONFLICT DO NOTHING returns no row for a duplicate name.
+    next_position = (
+        select(func.coalesce(func.max(Category.position), -1) + 1)
         .where(Category.session_id == session_id)
+        .scalar_subquery()
     )
-    position = max_pos.scalar() + 1
-
-    cat = Category(
-        session_id=session_id,
-        name=data.name,
-        display_name=display,
-        family_id=family_id,
-        position=position,
+    category_id = await db.scalar(
+        sqlite_insert(Category)
+        .values(
+            session_id=session_id,
+            name=data.name,
+            display_name=display,
+            family_id=family_id,
+            position=next_position,
+        )
+        .on_conflict_do_nothing(index_elements=["session_id", "name"])
+        .returning(Category.id)
     )
-    db.add(cat)
+    if category_id is None:
+        # Also undoes a family created above for this request.
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Category '{data.name}' already exists in this session")
     await db.commit()
-    await db.refresh(cat)
-    return await _build_cat_response(cat, db)
+    return await _build_cat_response(category_id, db)
 
 
 @router.put("/categories/{category_id}", response_model=CategoryResponse)
 async def update_category(
     category_id: int, data: CategoryUpdate, db: AsyncSession = Depends(get_db)
 ):
-    cat = await db.get(Category, category_id)
-    if not cat:
-        raise HTTPException(status_code=404, detail="Category not found")
-
+    values: dict = {}
     if data.name is not None:
-        cat.name = data.name
+        values["name"] = data.name
     if data.display_name is not None:
-        cat.display_name = data.display_name
+        values["display_name"] = data.display_name
     if data.family_id is not None:
         # 0 means "remove family"
-        cat.family_id = data.family_id if data.family_id != 0 else None
+        values["family_id"] = data.family_id if data.family_id != 0 else None
+
+    # UPDATE ... RETURNING doubles as the existence check; the response is
+    # re-read by id below, so the ORM instance never needs loading/refreshing.
+    if values:
+        found = await db.scalar(
+            update(Category).where(Category.id == category_id).values(**values).returning(Category.id)
+        ) is not None
+    else:
+        found = await db.get(Category, category_id) is not None
+    if not found:
+        raise HTTPException(status_code=404, detail="Category not found")
 
     await db.commit()
-    await db.refresh(cat)
-    return await _build_cat_response(cat, db)
+    return await _build_cat_response(category_id, db)
 
 
 @router.delete("/categories/{category_id}")
@@ -179,11 +167,11 @@ async def delete_category(category_id: int, db: AsyncSession = Depends(get_db)):
     if not cat:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    # Check for observations
-    obs_count = await db.execute(
-        select(func.count(Observation.id)).where(Observation.category_id == category_id)
-    )
-    if obs_count.scalar() > 0:
+    # Check for observations (stops at the first match)
+    has_obs = await db.execute(lambda_stmt(
+        lambda: select(Observation.id).where(Observation.category_id == category_id).limit(1)
+    ))
+    if has_obs.first() is not None:
         raise HTTPException(
             status_code=409,
             detail="Cannot delete category with existing observations",
@@ -199,9 +187,8 @@ async def delete_category(category_id: int, db: AsyncSession = Depends(get_db)):
 
 @router.get("/families", response_model=list[FamilyResponse])
 async def list_families(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(CategoryFamily).order_by(CategoryFamily.name))
-    families = result.scalars().all()
-    return [await _family_response(fam, db) for fam in families]
+    result = await db.execute(lambda_stmt(lambda: _FAMILY_SELECT.order_by(CategoryFamily.name)))
+    return [FamilyResponse.model_construct(**row._mapping) for row in result.all()]
 
 
 @router.get("/families/{family_id}", response_model=FamilyResponse)
@@ -209,64 +196,67 @@ async def get_family(family_id: int, db: AsyncSession = Depends(get_db)):
     fam = await db.get(CategoryFamily, family_id)
     if not fam:
         raise HTTPException(status_code=404, detail="Family not found")
-    return await _family_response(fam, db)
+    return await _family_response(fam.id, db)
 
 
 @router.post("/families", response_model=FamilyResponse)
 async def create_family(data: FamilyCreate, db: AsyncSession = Depends(get_db)):
-    existing = await db.execute(
-        select(CategoryFamily).where(CategoryFamily.name == data.name)
+    family_id = await db.scalar(
+        sqlite_insert(CategoryFamily)
+        .values(
+            name=data.name,
+            display_name=data.display_name or data.name.title(),
+            description=data.description,
+            color=data.color,
+            group_id=data.group_id,
+            family_type=data.family_type,
+        )
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(CategoryFamily.id)
     )
-    if existing.scalar_one_or_none():
+    if family_id is None:
         raise HTTPException(status_code=409, detail=f"Family '{data.name}' already exists")
-
-    fam = CategoryFamily(
-        name=data.name,
-        display_name=data.display_name or data.name.title(),
-        description=data.description,
-        color=data.color,
-        group_id=data.group_id,
-        family_type=data.family_type,
-    )
-    db.add(fam)
     await db.commit()
-    await db.refresh(fam)
-    return await _family_response(fam, db)
+    return await _family_response(family_id, db)
 
 
 @router.put("/families/{family_id}", response_model=FamilyResponse)
 async def update_family(
     family_id: int, data: FamilyUpdate, db: AsyncSession = Depends(get_db)
 ):
-    fam = await db.get(CategoryFamily, family_id)
-    if not fam:
-        raise HTTPException(status_code=404, detail="Family not found")
-
+    values: dict = {}
     if data.name is not None:
-        # Check uniqueness
-        existing = await db.execute(
-            select(CategoryFamily).where(
-                CategoryFamily.name == data.name,
-                CategoryFamily.id != family_id,
-            )
-        )
-        if existing.scalar_one_or_none():
-            raise HTTPException(status_code=409, detail=f"Family name '{data.name}' already exists")
-        fam.name = data.name
+        values["name"] = data.name
     if data.display_name is not None:
-        fam.display_name = data.display_name
+        values["display_name"] = data.display_name
     if data.color is not None:
-        fam.color = data.color
+        values["color"] = data.color
     if data.description is not None:
-        fam.description = data.description
+        values["description"] = data.description
     if data.group_id is not None:
-        fam.group_id = data.group_id if data.group_id != 0 else None  # 0 means detach
+        values["group_id"] = data.group_id if data.group_id != 0 else None  # 0 means detach
     if data.family_type is not None:
-        fam.family_type = data.family_type
+        values["family_type"] = data.family_type
+
+    if values:
+        try:
+            found = await db.scalar(
+                update(CategoryFamily)
+                .where(CategoryFamily.id == family_id)
+                .values(**values)
+                .returning(CategoryFamily.id)
+            ) is not None
+        except IntegrityError:
+            # UNIQUE(name) — another family already has it
+            await db.rollback()
+            raise HTTPException(status_code=409, detail=f"Family name '{data.name}' already exists")
+    else:
+        found = await db.get(CategoryFamily, family_id) is not None
+    if not found:
+        raise HTTPException(status_code=404, detail="Family not found")
 
     await db.commit()
-    await db.refresh(fam)
-    return await _family_response(fam, db)
+    return await _family_response(family_id, db)
 
 
 @router.delete("/families/{family_id}")
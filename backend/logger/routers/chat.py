@@ -6,9 +6,10 @@ import json
 import uuid
 from collections.abc import AsyncGenerator
 
+import anthropic
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
 from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from logger.database import get_db, async_session
@@ -18,19 +19,26 @@ from logger.schemas import (
     ChatApproveRequest, ChatMessageResponse, ChatStatusResponse,
     ApiKeySaveRequest,
 )
-from logger.services.api_key_service import save_api_key, get_api_key, has_api_key
+from logger.services.api_key_service import (
+    SETTINGS_KEY as API_KEY_SETTING,
+    save_api_key, get_api_key, has_api_key, get_client, clear_clients,
+)
 from logger.services.chat_tools_service import TOOLS, execute_tool
+from logger.utils.sse import event_stream, sse_event
+from logger.utils.ttl_cache import TTLCache, clear_on_orm_writes
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
-# Ephemeral in-memory pending approvals
-_pending_approvals: dict[str, dict] = {}
+# Ephemeral in-memory pending approvals. Abandoned ones (never approved or
+# rejected) expire after 15 minutes instead of accumulating.
+_pending_approvals = TTLCache(ttl=15 * 60, maxsize=64)
 
 AVAILABLE_MODELS = [
     {"id": "claude-sonnet-5", "name": "Claude Sonnet 5"},
     {"id": "claude-haiku-4-5-20251001", "name": "Claude Haiku 4.5"},
     {"id": "claude-opus-4-8", "name": "Claude Opus 4.8"},
 ]
+AVAILABLE_MODEL_IDS = frozenset(m["id"] for m in AVAILABLE_MODELS)
 
 DEFAULT_MODEL = "claude-sonnet-5"
 
@@ -71,18 +79,32 @@ Be concise but thorough. Highlight interesting patterns if they're real.
 MAX_TOOL_ITERATIONS = 8
 
 
+# Read on every status/approve call, written only by set_model. Any ORM write
+# to settings clears it; the short TTL covers a DB file swapped underneath.
+_selected_model_cache = TTLCache(ttl=5, maxsize=1)
+clear_on_orm_writes(_selected_model_cache.clear, Setting)
+
+
 async def _get_selected_model(db: AsyncSession) -> str:
-    result = await db.execute(select(Setting).where(Setting.key == "chat_model"))
-    setting = result.scalar_one_or_none()
-    return setting.value if setting else DEFAULT_MODEL
+    model = _selected_model_cache.get("model")
+    if model is None:
+        result = await db.execute(select(Setting.value).where(Setting.key == "chat_model"))
+        model = result.scalar_one_or_none() or DEFAULT_MODEL
+        _selected_model_cache.set("model", model)
+    return model
 
 
 @router.get("/status", response_model=ChatStatusResponse)
 async def chat_status(db: AsyncSession = Depends(get_db)):
-    has_key = await has_api_key(db)
-    model = await _get_selected_model(db)
+    # Both settings in one round trip; also refreshes the cached model.
+    result = await db.execute(
+        select(Setting.key, Setting.value).where(Setting.key.in_((API_KEY_SETTING, "chat_model")))
+    )
+    values = dict(result.all())
+    model = values.get("chat_model") or DEFAULT_MODEL
+    _selected_model_cache.set("model", model)
     return ChatStatusResponse(
-        has_api_key=has_key,
+        has_api_key=API_KEY_SETTING in values,
         selected_model=model,
         available_models=AVAILABLE_MODELS,
     )
@@ -90,16 +112,15 @@ async def chat_status(db: AsyncSession = Depends(get_db)):
 
 @router.get("/history", response_model=list[ChatMessageResponse])
 async def chat_history(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(ChatMessage).order_by(ChatMessage.id.desc()).limit(50)
+    # Latest 50, returned oldest-first: the reversal happens in SQL.
+    latest = (
+        select(ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.created_at)
+        .order_by(ChatMessage.id.desc())
+        .limit(50)
+        .subquery()
     )
-    messages = list(reversed(result.scalars().all()))
-    return [
-        ChatMessageResponse(
-            id=m.id, role=m.role, content=m.content, created_at=m.created_at
-        )
-        for m in messages
-    ]
+    result = await db.execute(select(latest).order_by(latest.c.id))
+    return [ChatMessageResponse.model_construct(**row._mapping) for row in result.all()]
 
 
 @router.post("/query", response_model=ChatApprovalResponse)
@@ -118,7 +139,7 @@ async def chat_query(req: ChatQueryRequest, db: AsyncSession = Depends(get_db)):
     db.add(user_msg)
     await db.commit()
 
-    _pending_approvals[approval_id] = {"user_message": req.message}
+    _pending_approvals.set(approval_id, {"user_message": req.message})
 
     # The "preview" tells the user what Claude can do here.
     preview = (
@@ -142,10 +163,6 @@ async def chat_query(req: ChatQueryRequest, db: AsyncSession = Depends(get_db)):
     )
 
 
-def _sse(payload: dict) -> str:
-    return f"data: {json.dumps(payload)}\n\n"
-
-
 def _summarize_tool_result(name: str, result: dict) -> str:
     """One-line summary shown in the chat UI as Claude's progress."""
     if "error" in result:
@@ -183,8 +200,11 @@ async def chat_approve(req: ChatApproveRequest):
       tool_result {name, summary}          — Tool returned (just a short summary,
                                               not the full payload, to keep
                                               the SSE channel small)
-      token       {content}                — Final response text (one big chunk
-                                              in this version; can be split later)
+      token       {content}                — Final response text, sent as one
+                                              frame: each turn uses
+                                              messages.create, so there are no
+                                              per-token frames. Streamed text
+                                              goes through sse.coalesce_text.
       done        {message_id}             — Conversation turn complete
       error       {content}                — Aborted
     """
@@ -194,18 +214,17 @@ async def chat_approve(req: ChatApproveRequest):
 
     user_message = pending["user_message"]
 
-    async def generate() -> AsyncGenerator[str, None]:
+    async def generate() -> AsyncGenerator[bytes, None]:
         async with async_session() as db:
             api_key = await get_api_key(db)
             if not api_key:
-                yield _sse({"type": "error", "content": "API key not configured"})
+                yield sse_event({"type": "error", "content": "API key not configured"})
                 return
 
             model = await _get_selected_model(db)
 
             try:
-                import anthropic
-                client = anthropic.AsyncAnthropic(api_key=api_key)
+                client = get_client(api_key)
 
                 # Conversation history accumulates as we loop.
                 messages: list[dict] = [{"role": "user", "content": user_message}]
@@ -231,10 +250,10 @@ async def chat_approve(req: ChatApproveRequest):
                                 continue
                             tool_name = block.name
                             tool_input = block.input or {}
-                            yield _sse({"type": "tool_call", "name": tool_name, "input": tool_input})
+                            yield sse_event({"type": "tool_call", "name": tool_name, "input": tool_input})
 
                             result = await execute_tool(tool_name, tool_input, db)
-                            yield _sse({
+                            yield sse_event({
                                 "type": "tool_result",
                                 "name": tool_name,
                                 "summary": _summarize_tool_result(tool_name, result),
@@ -256,21 +275,21 @@ async def chat_approve(req: ChatApproveRequest):
                     break
                 else:
                     # Hit iteration cap
-                    yield _sse({
+                    yield sse_event({
                         "type": "error",
                         "content": f"Stopped after {MAX_TOOL_ITERATIONS} tool calls without a final answer.",
                     })
                     return
 
                 if not final_text:
-                    yield _sse({
+                    yield sse_event({
                         "type": "error",
                         "content": "Claude returned no text response.",
                     })
                     return
 
-                # Stream the final text (single chunk for V1; can be split later).
-                yield _sse({"type": "token", "content": final_text})
+                # The whole final text goes out as a single token frame.
+                yield sse_event({"type": "token", "content": final_text})
 
                 assistant_msg = ChatMessage(
                     role="assistant",
@@ -279,16 +298,16 @@ async def chat_approve(req: ChatApproveRequest):
                 )
                 db.add(assistant_msg)
                 await db.commit()
-                yield _sse({"type": "done", "message_id": assistant_msg.id})
+                yield sse_event({"type": "done", "message_id": assistant_msg.id})
 
             except anthropic.AuthenticationError:
-                yield _sse({"type": "error", "content": "Invalid API key. Check Settings."})
+                yield sse_event({"type": "error", "content": "Invalid API key. Check Settings."})
             except anthropic.RateLimitError:
-                yield _sse({"type": "error", "content": "Rate limited. Wait a moment and try again."})
+                yield sse_event({"type": "error", "content": "Rate limited. Wait a moment and try again."})
             except Exception as e:  # noqa: BLE001
-                yield _sse({"type": "error", "content": f"{type(e).__name__}: {e}"})
+                yield sse_event({"type": "error", "content": f"{type(e).__name__}: {e}"})
 
-    return StreamingResponse(generate(), media_type="text/event-stream")
+    return event_stream(generate())
 
 
 @router.post("/reject")
@@ -304,7 +323,10 @@ async def chat_reject(req: ChatApproveRequest, db: AsyncSession = Depends(get_db
 
 @router.delete("/history")
 async def clear_history(db: AsyncSession = Depends(get_db)):
-    await db.execute(delete(ChatMessage))
+    # An unconditional DELETE on a trigger-free table hits SQLite's truncate
+    # optimization (pages are dropped, not walked row by row). Nothing here
+    # holds ChatMessage instances, so skip syncing the identity map.
+    await db.execute(delete(ChatMessage).execution_options(synchronize_session=False))
     await db.commit()
     return {"status": "cleared"}
 
@@ -319,28 +341,22 @@ async def save_key(req: ApiKeySaveRequest, db: AsyncSession = Depends(get_db)):
 
 @router.delete("/api-key")
 async def delete_key(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Setting).where(Setting.key == "anthropic_api_key")
-    )
-    setting = result.scalar_one_or_none()
-    if setting:
-        await db.delete(setting)
-        await db.commit()
+    await db.execute(delete(Setting).where(Setting.key == API_KEY_SETTING))
+    await db.commit()
+    clear_clients()
     return {"status": "deleted"}
 
 
 @router.put("/model")
 async def set_model(data: dict, db: AsyncSession = Depends(get_db)):
     model_id = data.get("model_id", "")
-    valid_ids = {m["id"] for m in AVAILABLE_MODELS}
-    if model_id not in valid_ids:
+    if model_id not in AVAILABLE_MODEL_IDS:
         raise HTTPException(status_code=400, detail="Invalid model ID")
 
-    result = await db.execute(select(Setting).where(Setting.key == "chat_model"))
-    setting = result.scalar_one_or_none()
-    if setting:
-        setting.value = model_id
-    else:
-        db.add(Setting(key="chat_model", value=model_id))
+    await db.execute(
+        sqlite_insert(Setting)
+        .values(key="chat_model", value=model_id)
+        .on_conflict_do_update(index_elements=["key"], set_={"value": model_id})
+    )
     await db.commit()
     return {"status": "updated", "model_id": model_id}
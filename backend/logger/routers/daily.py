@@ -1,197 +1,202 @@
+import asyncio
 from datetime import date as date_type, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func
+from sqlalchemy import select, func, text as sa_text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from logger.database import get_db
+from logger.database import async_session, get_db
 from logger.models import (
-    Session, DailyRecord, Observation, TimerEntry, ManualEntry, Category,
+    DailyRecord, Observation, TimerEntry, ManualEntry, Category,
     BreakDay,
 )
 from logger.schemas import (
     DailyActivityResponse, TimerEntryResponse, ManualEntryResponse,
     ObservationResponse, StreakResponse,
 )
+from logger.services.session_service import get_active_session_id
 
 router = APIRouter(prefix="/daily", tags=["daily"])
 
 
 @router.get("/{date}", response_model=DailyActivityResponse)
 async def get_daily_activity(date: str, db: AsyncSession = Depends(get_db)):
-    session = await _get_active_session(db)
-    if not session:
+    session_id = await get_active_session_id(db)
+    if session_id is None:
         raise HTTPException(status_code=400, detail="No active session")
 
-    # Daily record + observations
-    dr_result = await db.execute(
-        select(DailyRecord).where(
-            DailyRecord.session_id == session.id,
-            DailyRecord.date == date,
-        )
+    # The four lookups are independent, so run them concurrently. An
+    # AsyncSession can't be shared between tasks; each loader opens its own.
+    (total_minutes, observations), timer_entries, manual_entries, break_day = await asyncio.gather(
+        _load_daily_record_and_obs(session_id, date),
+        _load_timer_entries(session_id, date),
+        _load_manual_entries(session_id, date),
+        _load_break_day(date),
+    )
+
+    return DailyActivityResponse(
+        date=date,
+        total_minutes=total_minutes,
+        timer_entries=timer_entries,
+        manual_entries=manual_entries,
+        observations=observations,
+        is_break=break_day is not None,
+        break_label=break_day.label if break_day else None,
     )
-    daily_record = dr_result.scalar_one_or_none()
 
-    observations = []
-    total_minutes = 0
-    if daily_record:
-        total_minutes = daily_record.total_minutes
+
+async def _load_daily_record_and_obs(
+    session_id: int, date: str,
+) -> tuple[int, list[ObservationResponse]]:
+    async with async_session() as db:
+        dr_result = await db.execute(
+            select(DailyRecord).where(
+                DailyRecord.session_id == session_id,
+                DailyRecord.date == date,
+            )
+        )
+        daily_record = dr_result.scalar_one_or_none()
+        if not daily_record:
+            return 0, []
+
         # Only include observations whose source is 'import' — timer/manual
         # observations are already represented by their underlying entry rows
         # (the T and M rows in TodayLog), so including them all would render
         # the same minutes twice.
         obs_result = await db.execute(
-            select(Observation).where(
+            select(Observation, Category.display_name, Category.name)
+            .outerjoin(Category, Category.id == Observation.category_id)
+            .where(
                 Observation.daily_record_id == daily_record.id,
                 Observation.source == "import",
             )
         )
-        for obs in obs_result.scalars().all():
-            cat = await db.get(Category, obs.category_id)
-            observations.append(ObservationResponse(
+        observations = [
+            ObservationResponse(
                 id=obs.id,
                 category_id=obs.category_id,
-                category_name=cat.display_name or cat.name if cat else None,
+                category_name=cat_display or cat_name,
                 minutes=obs.minutes,
                 source=obs.source,
-            ))
-
-    # Completed timer entries for this date
-    timer_result = await db.execute(
-        select(TimerEntry).where(
-            TimerEntry.session_id == session.id,
-            TimerEntry.date == date,
-            TimerEntry.is_active == False,
-        ).order_by(TimerEntry.end_time.desc())
-    )
-    timer_entries = []
-    for t in timer_result.scalars().all():
-        cat = await db.get(Category, t.category_id)
-        timer_entries.append(TimerEntryResponse(
-            id=t.id,
-            session_id=t.session_id,
-            category_id=t.category_id,
-            category_name=cat.display_name or cat.name if cat else None,
-            date=t.date,
-            start_time=t.start_time,
-            end_time=t.end_time,
-            pause_start=t.pause_start,
-            total_paused_seconds=t.total_paused_seconds or 0,
-            duration_minutes=t.duration_minutes,
-            is_active=t.is_active,
-            is_paused=t.is_paused,
-            description=t.description,
-            location=t.location,
-        ))
-
-    # Manual entries for this date
-    manual_result = await db.execute(
-        select(ManualEntry).where(
-            ManualEntry.session_id == session.id,
-            ManualEntry.date == date,
-        ).order_by(ManualEntry.created_at.desc())
-    )
-    manual_entries = []
-    for m in manual_result.scalars().all():
-        cat = await db.get(Category, m.category_id)
-        manual_entries.append(ManualEntryResponse(
-            id=m.id,
-            session_id=m.session_id,
-            category_id=m.category_id,
-            category_name=cat.display_name or cat.name if cat else None,
-            date=m.date,
-            duration_minutes=m.duration_minutes,
-            description=m.description,
-            location=m.location,
-            start_time=m.start_time,
-            created_at=m.created_at,
-        ))
-
-    # Break marker (global, not session-scoped).
-    break_result = await db.execute(
-        select(BreakDay).where(BreakDay.date == date)
-    )
-    break_day = break_result.scalar_one_or_none()
-
-    return DailyActivityResponse(
-        date=date,
-        total_minutes=total_minutes,
-        timer_entries=timer_entries,
-        manual_entries=manual_entries,
-        observations=observations,
-        is_break=break_day is not None,
-        break_label=break_day.label if break_day else None,
+            )
+            for obs, cat_display, cat_name in obs_result.all()
+        ]
+        return daily_record.total_minutes, observations
+
+
+async def _load_timer_entries(session_id: int, date: str) -> list[TimerEntryResponse]:
+    """Completed timer entries for this date."""
+    async with async_session() as db:
+        timer_result = await db.execute(
+            select(TimerEntry, Category.display_name, Category.name)
+            .outerjoin(Category, Category.id == TimerEntry.category_id)
+            .where(
+                TimerEntry.session_id == session_id,
+                TimerEntry.date == date,
+                TimerEntry.is_active == False,
+            ).order_by(TimerEntry.end_time.desc())
+        )
+        return [
+            TimerEntryResponse(
+                id=t.id,
+                session_id=t.session_id,
+                category_id=t.category_id,
+                category_name=cat_display or cat_name,
+                date=t.date,
+                start_time=t.start_time,
+                end_time=t.end_time,
+                pause_start=t.pause_start,
+                total_paused_seconds=t.total_paused_seconds or 0,
+                duration_minutes=t.duration_minutes,
+                is_active=t.is_active,
+                is_paused=t.is_paused,
+                description=t.description,
+                location=t.location,
+            )
+            for t, cat_display, cat_name in timer_result.all()
+        ]
+
+
+async def _load_manual_entries(session_id: int, date: str) -> list[ManualEntryResponse]:
+    """Manual entries for this date."""
+    async with async_session() as db:
+        manual_result = await db.execute(
+            select(ManualEntry, Category.display_name, Category.name)
+            .outerjoin(Category, Category.id == ManualEntry.category_id)
+            .where(
+                ManualEntry.session_id == session_id,
+                ManualEntry.date == date,
+            ).order_by(ManualEntry.created_at.desc())
+        )
+        return [
+            ManualEntryResponse(
+                id=m.id,
+                session_id=m.session_id,
+                category_id=m.category_id,
+                category_name=cat_display or cat_name,
+                date=m.date,
+                duration_minutes=m.duration_minutes,
+                description=m.description,
+                location=m.location,
+                start_time=m.start_time,
+                created_at=m.created_at,
+            )
+            for m, cat_display, cat_name in manual_result.all()
+        ]
+
+
+async def _load_break_day(date: str) -> BreakDay | None:
+    """Break marker (global, not session-scoped)."""
+    async with async_session() as db:
+        result = await db.execute(select(BreakDay).where(BreakDay.date == date))
+        return result.scalar_one_or_none()
+
+
+# Streaks via gaps-and-islands. Work days of the session plus (global) break
+# days form the calendar; consecutive dates share the same
+# julianday - row_number, so each island is one unbroken run. Break days
+# bridge a run without counting toward it. `current` counts the work days up
+# to the anchor within the anchor's island; the anchor is today, or yesterday
+# when today is neither worked nor a break (today may not be logged yet).
+_STREAK_SQL = sa_text("""
+WITH days AS (
+    SELECT date, MAX(worked) AS worked FROM (
+        SELECT date, 1 AS worked FROM daily_records
+        WHERE session_id = :session_id AND total_minutes > 0
+        UNION ALL
+        SELECT date, 0 FROM break_days
     )
+    GROUP BY date
+),
+islands AS (
+    SELECT date, worked,
+           CAST(julianday(date) AS INTEGER) - ROW_NUMBER() OVER (ORDER BY date) AS grp
+    FROM days
+),
+anchor AS (
+    SELECT COALESCE((SELECT date FROM days WHERE date = :today), :yesterday) AS date
+)
+SELECT
+    (SELECT COALESCE(SUM(i.worked), 0)
+       FROM anchor
+       JOIN islands a ON a.date = anchor.date
+       JOIN islands i ON i.grp = a.grp AND i.date <= a.date),
+    (SELECT COALESCE(MAX(n), 0)
+       FROM (SELECT SUM(worked) AS n FROM islands GROUP BY grp))
+""")
 
 
 @router.get("/streak/current", response_model=StreakResponse)
 async def get_streak(db: AsyncSession = Depends(get_db)):
-    session = await _get_active_session(db)
-    if not session:
+    session_id = await get_active_session_id(db)
+    if session_id is None:
         return StreakResponse(current=0, longest=0)
 
-    # Get all dates with logged time, ordered
-    result = await db.execute(
-        select(DailyRecord.date)
-        .where(
-            DailyRecord.session_id == session.id,
-            DailyRecord.total_minutes > 0,
-        )
-        .order_by(DailyRecord.date.desc())
-    )
-    worked = {date_type.fromisoformat(row[0]) for row in result.all()}
-
-    # Break days bridge the streak: they neither count toward it nor break it.
-    # A run of work days separated only by breaks stays a single streak.
-    break_result = await db.execute(select(BreakDay.date))
-    breaks = {date_type.fromisoformat(row[0]) for row in break_result.all()}
-
-    if not worked:
-        return StreakResponse(current=0, longest=0)
-
-    one_day = timedelta(days=1)
-
-    def walk_back(start: date_type) -> int:
-        """Walk backwards counting work days, stepping over break days, until a
-        day that is neither worked nor a break (a real gap) is hit."""
-        count = 0
-        d = start
-        while True:
-            if d in worked:
-                count += 1
-                d -= one_day
-            elif d in breaks:
-                d -= one_day  # bridge — no increment
-            else:
-                break
-        return count
-
     today = date_type.today()
-    current = walk_back(today)
-    # Grace: today may not be logged yet. If today is a real gap, count the
-    # streak ending yesterday instead (matches prior behavior, break-aware).
-    if current == 0 and today not in worked and today not in breaks:
-        current = walk_back(today - one_day)
-
-    # Longest streak across all history, bridging breaks. Walk calendar-contiguous
-    # runs over (worked ∪ breaks) and count only the work days within each run.
-    relevant = sorted(worked | breaks)
-    longest = 0
-    run_worked = 0
-    prev: date_type | None = None
-    for d in relevant:
-        if prev is not None and d - prev == one_day:
-            run_worked += 1 if d in worked else 0
-        else:
-            run_worked = 1 if d in worked else 0
-        longest = max(longest, run_worked)
-        prev = d
-
+    result = await db.execute(_STREAK_SQL, {
+        "session_id": session_id,
+        "today": today.isoformat(),
+        "yesterday": (today - timedelta(days=1)).isoformat(),
+    })
+    current, longest = result.one()
     return StreakResponse(current=current, longest=longest)
-
-
-async def _get_active_session(db: AsyncSession) -> Session | None:
-    result = await db.execute(
-        select(Session).where(Session.is_active == True)
-    )
-    return result.scalar_one_or_none()
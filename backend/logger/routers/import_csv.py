@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import ExitStack
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
@@ -6,10 +8,38 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from logger.config import DATA_DIR
 from logger.database import get_db
 from logger.schemas import ImportPreviewResponse, ImportConfirmRequest, BatchImportRequest
-from logger.services.import_service import preview_import, confirm_import
+from logger.services.family_service import LoadedRules, load_match_rules
+from logger.services.import_service import (
+    preview_import, confirm_import, parse_import_files, stage_preview,
+)
 
 router = APIRouter(prefix="/import", tags=["import"])
 
+# How many CSV pairs /batch reads and parses at once.
+BATCH_PARSE_CONCURRENCY = 4
+
+
+def _scan_pairs(data_dir: Path) -> list[tuple[Path, Path | None]] | None:
+    """Sorted (study CSV, matching text CSV or None) pairs in `data_dir`.
+
+    None when the directory doesn't exist.
+    """
+    if not data_dir.is_dir():
+        return None
+    pairs = []
+    for study_path in sorted(data_dir.glob("*_study.csv")):
+        text_path = study_path.with_name(study_path.name.replace("_study.csv", "_text.csv"))
+        pairs.append((study_path, text_path if text_path.exists() else None))
+    return pairs
+
+
+def _parse_pair(study_path: Path, text_path: Path | None, rules: LoadedRules) -> dict:
+    """Parse a study/text CSV pair straight from open files."""
+    with ExitStack() as stack:
+        study_file = stack.enter_context(study_path.open("rb"))
+        text_file = stack.enter_context(text_path.open("rb")) if text_path else None
+        return parse_import_files(study_file, study_path.name, rules, text_file)
+
 
 @router.post("/preview", response_model=ImportPreviewResponse)
 async def import_preview(
@@ -17,21 +47,15 @@ async def import_preview(
     text_csv: UploadFile | None = File(None),
     db: AsyncSession = Depends(get_db),
 ):
-    study_content = await study_csv.read()
-    text_content = None
-    text_filename = None
-
-    if text_csv:
-        text_content = await text_csv.read()
-        text_filename = text_csv.filename
-
+    # Hand the spooled upload files to the parser as-is; rows are decoded as
+    # they are read instead of copying each upload into one bytes object.
     try:
         result = await preview_import(
-            study_content=study_content,
+            study_content=study_csv.file,
             study_filename=study_csv.filename,
             db=db,
-            text_content=text_content,
-            text_filename=text_filename,
+            text_content=text_csv.file if text_csv else None,
+            text_filename=text_csv.filename if text_csv else None,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -60,38 +84,38 @@ async def import_batch(
     """Import all CSV pairs from the data directory in one call."""
     data_dir = Path(data.data_dir) if data and data.data_dir else DATA_DIR
 
-    if not data_dir.is_dir():
+    # The directory scan is blocking filesystem I/O; keep it off the loop.
+    pairs = await asyncio.to_thread(_scan_pairs, data_dir)
+    if pairs is None:
         raise HTTPException(status_code=400, detail=f"Directory not found: {data_dir}")
-
-    # Find all study CSVs and their matching text CSVs
-    study_files = sorted(data_dir.glob("*_study.csv"))
-    if not study_files:
+    if not pairs:
         raise HTTPException(status_code=400, detail="No study CSV files found")
 
-    results = []
-    errors = []
+    # Reading and parsing are independent per file, so they run concurrently
+    # (bounded, off the event loop). Confirms all write to the same SQLite
+    # file, which takes one writer at a time, so they stay sequential on this
+    # session, in file order.
+    rules = await load_match_rules(db)
+    sem = asyncio.Semaphore(BATCH_PARSE_CONCURRENCY)
+
+    async def stage(study_path: Path, text_path: Path | None) -> dict:
+        async with sem:
+            staged = await asyncio.to_thread(_parse_pair, study_path, text_path, rules)
+            return stage_preview(staged, study_path.name, text_path.name if text_path else None)
 
-    for study_path in study_files:
-        study_filename = study_path.name
-        # Find matching text CSV
-        text_filename = study_filename.replace("_study.csv", "_text.csv")
-        text_path = data_dir / text_filename
+    previews = await asyncio.gather(*(stage(*pair) for pair in pairs), return_exceptions=True)
 
-        study_content = study_path.read_bytes()
-        text_content = text_path.read_bytes() if text_path.exists() else None
+    results = []
+    errors = []
 
+    for (study_path, _), preview in zip(pairs, previews):
         try:
-            preview = await preview_import(
-                study_content=study_content,
-                study_filename=study_filename,
-                db=db,
-                text_content=text_content,
-                text_filename=text_filename if text_content else None,
-            )
+            if isinstance(preview, BaseException):
+                raise preview
             result = await confirm_import(preview["preview_id"], db)
             results.append(result)
         except ValueError as e:
-            errors.append({"file": study_filename, "error": str(e)})
+            errors.append({"file": study_path.name, "error": str(e)})
 
     return {
         "imported": len(results),
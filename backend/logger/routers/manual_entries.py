@@ -1,18 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from logger.database import get_db
-from logger.models import Session, ManualEntry, Category, PlanItem
+from logger.models import ManualEntry
 from logger.schemas import ManualEntryCreate, ManualEntryResponse, ManualEntryUpdate
 from logger.services import manual_entry_service
+from logger.services.session_service import get_active_session_id
 
 router = APIRouter(prefix="/manual-entries", tags=["manual-entries"])
 
 
-async def _entry_response(entry: ManualEntry, db: AsyncSession) -> ManualEntryResponse:
-    cat = await db.get(Category, entry.category_id)
-    plan_item = await db.get(PlanItem, entry.plan_item_id) if entry.plan_item_id else None
+def _entry_response(entry: ManualEntry) -> ManualEntryResponse:
+    """Build the response from an entry whose category/plan_item are loaded."""
+    cat = entry.category
+    plan_item = entry.plan_item
     return ManualEntryResponse(
         id=entry.id,
         session_id=entry.session_id,
@@ -29,17 +32,23 @@ async def _entry_response(entry: ManualEntry, db: AsyncSession) -> ManualEntryRe
     )
 
 
+async def _load_entry_response(entry: ManualEntry, db: AsyncSession) -> ManualEntryResponse:
+    # (Re)load the relationships — a write may have just changed category_id.
+    await db.refresh(entry, ["category", "plan_item"])
+    return _entry_response(entry)
+
+
 @router.post("", response_model=ManualEntryResponse)
 async def create_manual_entry(
     data: ManualEntryCreate, db: AsyncSession = Depends(get_db)
 ):
-    session = await _get_active_session(db)
-    if not session:
+    session_id = await get_active_session_id(db)
+    if session_id is None:
         raise HTTPException(status_code=400, detail="No active session")
 
     try:
         entry = await manual_entry_service.create_manual_entry(
-            session_id=session.id,
+            session_id=session_id,
             category_id=data.category_id,
             date=data.date,
             duration_minutes=data.duration_minutes,
@@ -50,7 +59,7 @@ async def create_manual_entry(
             db=db,
         )
         await db.commit()
-        return await _entry_response(entry, db)
+        return await _load_entry_response(entry, db)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -61,22 +70,21 @@ async def list_manual_entries(
     session_id: int | None = Query(None),
     db: AsyncSession = Depends(get_db),
 ):
-    query = select(ManualEntry)
+    query = select(ManualEntry).options(
+        selectinload(ManualEntry.category), selectinload(ManualEntry.plan_item),
+    )
 
+    if not session_id:
+        session_id = await get_active_session_id(db)
     if session_id:
         query = query.where(ManualEntry.session_id == session_id)
-    else:
-        session = await _get_active_session(db)
-        if session:
-            query = query.where(ManualEntry.session_id == session.id)
 
     if date:
         query = query.where(ManualEntry.date == date)
 
     query = query.order_by(ManualEntry.created_at.desc())
     result = await db.execute(query)
-    entries = result.scalars().all()
-    return [await _entry_response(e, db) for e in entries]
+    return [_entry_response(e) for e in result.scalars().all()]
 
 
 @router.put("/{entry_id}", response_model=ManualEntryResponse)
@@ -95,7 +103,7 @@ async def update_manual_entry(
             start_time=data.start_time,
         )
         await db.commit()
-        return await _entry_response(entry, db)
+        return await _load_entry_response(entry, db)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -108,10 +116,3 @@ async def delete_manual_entry(entry_id: int, db: AsyncSession = Depends(get_db))
         return {"detail": "Manual entry deleted"}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
-
-
-async def _get_active_session(db: AsyncSession) -> Session | None:
-    result = await db.execute(
-        select(Session).where(Session.is_active == True)
-    )
-    return result.scalar_one_or_none()
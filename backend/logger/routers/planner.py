@@ -71,8 +71,8 @@ async def get_plan_item(item_id: int, db: AsyncSession = Depends(get_db)):
     base = await _item_response(item, progress, db)
     return PlanItemDetailResponse(
         **base.model_dump(),
-        timer_entries=[await _timer_response(t, db) for t in timers],
-        manual_entries=[await _entry_response(m, db) for m in manuals],
+        timer_entries=[_timer_response(t) for t in timers],
+        manual_entries=[_entry_response(m) for m in manuals],
     )
 
 
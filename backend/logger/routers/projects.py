@@ -2,13 +2,22 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func, text
+import asyncio
+import hashlib
+import json
+import re
+from collections.abc import AsyncGenerator
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import TypeAdapter
+from sqlalchemy import Integer, bindparam, or_, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from logger.database import get_db
+from logger.database import async_session, get_db
 from logger.models import (
-    AIDescription, CategoryFamily, CategoryGroup, Category, Session, TextEntry, GitHubRepoLink,
+    AIDescription, CategoryFamily, Category, DailyRecord, Observation, Session,
+    TextEntry,
 )
 from logger.schemas import (
     ProjectSessionEntry,
@@ -31,16 +40,115 @@ from logger.schemas import (
     GroupDetailResponse,
     GroupListResponse,
 )
-from logger.services.api_key_service import get_api_key, has_api_key
-from logger.services import github_service
+from logger.services.api_key_service import get_api_key, get_client, has_api_key
+from logger.services import github_service, totals_cache
+from logger.utils.sse import coalesce_text, event_stream, sse_event
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 SEASON_ORDER = {"winter": 0, "spring": 1, "summer": 2, "fall": 3}
 
+DESCRIBE_MODEL = "claude-haiku-4-5-20251001"
 
-def _session_sort_key(row: dict) -> tuple[int, int]:
-    return (row["year"], SEASON_ORDER.get(row["season"].lower(), 4))
+# Fixed instructions go in the system prompt, marked cacheable; only the
+# per-project data travels in the user turn, so the cached prefix never varies.
+DESCRIBE_INSTRUCTIONS = (
+    "Write a 1-2 sentence summary of what this person likely worked on, "
+    "based on the project data in the user message.\n\n"
+    "Be specific and concise. Do not speculate beyond what the data shows."
+)
+
+ENRICHED_DESCRIBE_INSTRUCTIONS = (
+    "Write a 3-5 sentence narrative about ONLY the project named in the user message "
+    "during the given session. "
+    "Focus on what was done specifically for this project. "
+    "Do NOT mention other projects or unrelated activities. "
+    "Do NOT just restate hours — describe the work.\n\n"
+    "Write ONLY about that project. Be specific based on the available context "
+    "(log entries and GitHub activity, when provided). "
+    "If the log entries don't provide enough detail, write a brief factual summary of the time spent."
+)
+
+
+def _cached_system(instructions: str) -> list[dict]:
+    return [{"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}}]
+
+
+def _content_hash(instructions: str, prompt: str) -> str:
+    """Fingerprint of everything sent to the model for one description."""
+    return hashlib.sha256(f"{DESCRIBE_MODEL}\0{instructions}\0{prompt}".encode()).hexdigest()
+
+
+async def _stored_description(family_id: int, session_id: int, db: AsyncSession):
+    """The stored (description, content_hash) for the pair, or None."""
+    result = await db.execute(
+        select(AIDescription.description, AIDescription.content_hash)
+        .where(AIDescription.family_id == family_id)
+        .where(AIDescription.session_id == session_id)
+    )
+    return result.first()
+
+
+async def _save_description(
+    family_id: int,
+    session_id: int,
+    description: str,
+    content_hash: str,
+    db: AsyncSession,
+) -> None:
+    """Insert or replace the pair's description in one statement."""
+    values = {
+        "description": description,
+        "model_used": DESCRIBE_MODEL,
+        "content_hash": content_hash,
+    }
+    await db.execute(
+        sqlite_insert(AIDescription)
+        .values(family_id=family_id, session_id=session_id, **values)
+        .on_conflict_do_update(index_elements=["family_id", "session_id"], set_=values)
+    )
+    await db.commit()
+
+
+async def _cached_json(key, compute) -> Response:
+    """Serve the model built by `compute()` as JSON, reusing the bytes while cached."""
+    body = totals_cache.response_cache.get(key)
+    if body is None:
+        body = (await compute()).model_dump_json().encode()
+        totals_cache.response_cache.set(key, body)
+    return Response(content=body, media_type="application/json")
+
+
+# Chronological rank of a view row's season, so session ordering happens in
+# the ORDER BY rather than in Python sorts over the built entries.
+_SEASON_ORD = (
+    "CASE lower(v.season) "
+    + " ".join(f"WHEN '{season}' THEN {rank}" for season, rank in SEASON_ORDER.items())
+    + " ELSE 4 END"
+)
+
+
+# Resolves each v_family_totals row (aliased `v`) to its GROUP (research /
+# courses / personal / training) via the category_groups join. `family_type`
+# is the legacy column and was inconsistently set on some rows — group_id is
+# the source of truth. Families without a group have cg.name NULL.
+_FAMILY_GROUP_JOIN = (
+    "JOIN category_families cf ON cf.id = v.family_id "
+    "LEFT JOIN category_groups cg ON cg.id = cf.group_id"
+)
+
+# At most one description per (family, session) — UNIQUE on the pair.
+_AI_DESCRIPTION_JOIN = (
+    "LEFT JOIN ai_descriptions d ON d.family_id = v.family_id AND d.session_id = v.session_id"
+)
+
+
+# Shared by both describe endpoints: one statement object with typed binds, so
+# it compiles once and the same SQL string hits each connection's statement cache.
+_FAMILY_TOTALS_STMT = text(
+    "SELECT total_minutes, active_days FROM v_family_totals "
+    "WHERE family_id = :fid AND session_id = :sid"
+).bindparams(bindparam("fid", type_=Integer), bindparam("sid", type_=Integer))
 
 
 # ── Legacy endpoints (backward compat) ──────────────────
@@ -48,34 +156,22 @@ def _session_sort_key(row: dict) -> tuple[int, int]:
 @router.get("/timeline", response_model=ProjectTimelineResponse)
 async def get_timeline(db: AsyncSession = Depends(get_db)):
     """Return family timeline data from v_family_totals view."""
+    return await _cached_json("timeline", lambda: _build_timeline(db))
+
+
+async def _build_timeline(db: AsyncSession) -> ProjectTimelineResponse:
     result = await db.execute(text(
-        "SELECT family_id, family_name, display_name, color, "
-        "session_id, session_label, year, season, total_minutes, active_days "
-        "FROM v_family_totals"
+        "SELECT v.family_id, v.family_name, v.display_name, v.color, "
+        "v.session_id, v.session_label, v.year, v.season, v.total_minutes, v.active_days, "
+        "cg.name AS family_type, d.description AS ai_description "
+        f"FROM v_family_totals v {_FAMILY_GROUP_JOIN} {_AI_DESCRIPTION_JOIN} "
+        f"ORDER BY v.year, {_SEASON_ORD}, v.family_id"
     ))
-    rows = [dict(r._mapping) for r in result]
-
-    family_ids = {r["family_id"] for r in rows}
-    family_types: dict[int, str | None] = {}
-    if family_ids:
-        # Resolve each family to its GROUP (research / courses / personal / training)
-        # via the modern category_groups join. `family_type` is the legacy column
-        # and was inconsistently set on some rows — group_id is the source of truth.
-        ft_result = await db.execute(
-            select(CategoryFamily.id, CategoryGroup.name)
-            .join(CategoryGroup, CategoryFamily.group_id == CategoryGroup.id, isouter=True)
-            .where(CategoryFamily.id.in_(family_ids))
-        )
-        family_types = {r[0]: r[1] for r in ft_result}
-
-    desc_result = await db.execute(select(AIDescription))
-    descriptions: dict[tuple[int, int], str] = {
-        (d.family_id, d.session_id): d.description
-        for d in desc_result.scalars().all()
-    }
 
+    # One pass builds both the session header list and the per-family rows.
     sessions_map: dict[int, dict] = {}
-    for r in rows:
+    families_map: dict[int, dict] = {}
+    for r in result.mappings():
         sid = r["session_id"]
         if sid not in sessions_map:
             sessions_map[sid] = {
@@ -84,23 +180,19 @@ async def get_timeline(db: AsyncSession = Depends(get_db)):
                 "year": r["year"],
                 "season": r["season"],
             }
-    all_sessions = sorted(sessions_map.values(), key=_session_sort_key)
 
-    families_map: dict[int, dict] = {}
-    for r in rows:
         fid = r["family_id"]
         if fid not in families_map:
             families_map[fid] = {
                 "family_id": fid,
                 "family_name": r["family_name"],
                 "display_name": r["display_name"],
-                "family_type": family_types.get(fid),
+                "family_type": r["family_type"],
                 "color": r["color"],
                 "total_minutes": 0,
                 "sessions": [],
             }
 
-        ai_desc = descriptions.get((fid, r["session_id"]))
         families_map[fid]["sessions"].append(
             ProjectSessionEntry(
                 session_id=r["session_id"],
@@ -109,18 +201,17 @@ async def get_timeline(db: AsyncSession = Depends(get_db)):
                 season=r["season"],
                 total_minutes=r["total_minutes"],
                 active_days=r["active_days"],
-                ai_description=ai_desc,
+                ai_description=r["ai_description"],
             )
         )
         families_map[fid]["total_minutes"] += r["total_minutes"]
 
-    for f in families_map.values():
-        f["sessions"].sort(key=lambda s: (s.year, SEASON_ORDER.get(s.season.lower(), 4)))
-
-    families_list = sorted(families_map.values(), key=lambda f: f["total_minutes"], reverse=True)
+    families_list = sorted(
+        families_map.values(), key=lambda f: (-f["total_minutes"], f["family_id"])
+    )
     families = [ProjectFamilyTimeline(**f) for f in families_list]
 
-    return ProjectTimelineResponse(families=families, sessions=all_sessions)
+    return ProjectTimelineResponse(families=families, sessions=list(sessions_map.values()))
 
 
 @router.post("/describe", response_model=DescribeResponse)
@@ -147,10 +238,9 @@ async def describe_family_session(
     )
     categories = [r.display_name or r.name for r in cat_result]
 
-    totals_result = await db.execute(text(
-        "SELECT total_minutes, active_days FROM v_family_totals "
-        "WHERE family_id = :fid AND session_id = :sid"
-    ), {"fid": req.family_id, "sid": req.session_id})
+    totals_result = await db.execute(
+        _FAMILY_TOTALS_STMT, {"fid": req.family_id, "sid": req.session_id}
+    )
     totals_row = totals_result.first()
     if not totals_row:
         raise HTTPException(status_code=404, detail="No data for this family+session")
@@ -164,47 +254,38 @@ async def describe_family_session(
     family_display = family.display_name or family.name
 
     prompt = (
-        f"Write a 1-2 sentence summary of what this person likely worked on.\n\n"
         f"Project: {family_display}\n"
         f"Session: {session_label}\n"
         f"Categories: {', '.join(categories) if categories else family_display}\n"
         f"Total time: {hours}h {mins}m across {active_days} active days\n"
-        f"Date range: {session.start_date or 'unknown'} to {session.end_date or 'unknown'}\n\n"
-        f"Be specific and concise. Do not speculate beyond what the data shows."
+        f"Date range: {session.start_date or 'unknown'} to {session.end_date or 'unknown'}"
     )
 
+    # Same inputs as the stored description: reuse it instead of regenerating.
+    content_hash = _content_hash(DESCRIBE_INSTRUCTIONS, prompt)
+    stored = await _stored_description(req.family_id, req.session_id, db)
+    if stored and stored.content_hash == content_hash:
+        return DescribeResponse(
+            family_id=req.family_id,
+            session_id=req.session_id,
+            description=stored.description,
+        )
+
     api_key = await get_api_key(db)
 
     try:
-        import anthropic
-        client = anthropic.AsyncAnthropic(api_key=api_key)
+        client = get_client(api_key)
         response = await client.messages.create(
-            model="claude-haiku-4-5-20251001",
+            model=DESCRIBE_MODEL,
             max_tokens=200,
+            system=_cached_system(DESCRIBE_INSTRUCTIONS),
             messages=[{"role": "user", "content": prompt}],
         )
         description = response.content[0].text.strip()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI generation failed: {e}")
 
-    existing = await db.execute(
-        select(AIDescription)
-        .where(AIDescription.family_id == req.family_id)
-        .where(AIDescription.session_id == req.session_id)
-    )
-    ai_desc = existing.scalar_one_or_none()
-    if ai_desc:
-        ai_desc.description = description
-        ai_desc.model_used = "claude-haiku-4-5-20251001"
-    else:
-        ai_desc = AIDescription(
-            family_id=req.family_id,
-            session_id=req.session_id,
-            description=description,
-            model_used="claude-haiku-4-5-20251001",
-        )
-        db.add(ai_desc)
-    await db.commit()
+    await _save_description(req.family_id, req.session_id, description, content_hash, db)
 
     return DescribeResponse(
         family_id=req.family_id,
@@ -223,47 +304,30 @@ GROUP_LABELS = {
 
 # ── Group endpoints ──────────────────────────────────────
 
+_SESSION_ENTRIES = TypeAdapter(list[ResearchSessionEntry])
+
 @router.get("/groups", response_model=GroupListResponse)
 async def get_project_groups(db: AsyncSession = Depends(get_db)):
     """List available groups with summary stats."""
+    return await _cached_json("groups", lambda: _build_project_groups(db))
+
+
+async def _build_project_groups(db: AsyncSession) -> GroupListResponse:
     result = await db.execute(text(
-        "SELECT family_id, total_minutes, session_id FROM v_family_totals"
+        "SELECT COALESCE(cg.name, 'other') AS group_type, "
+        "SUM(v.total_minutes) AS total_minutes, COUNT(DISTINCT v.family_id) AS family_count "
+        f"FROM v_family_totals v {_FAMILY_GROUP_JOIN} "
+        "GROUP BY group_type ORDER BY total_minutes DESC"
     ))
-    rows = [dict(r._mapping) for r in result]
-
-    family_ids = {r["family_id"] for r in rows}
-    family_types: dict[int, str] = {}
-    if family_ids:
-        # See note above — use category_groups join, not the legacy family_type column.
-        ft_result = await db.execute(
-            select(CategoryFamily.id, CategoryGroup.name)
-            .join(CategoryGroup, CategoryFamily.group_id == CategoryGroup.id, isouter=True)
-            .where(CategoryFamily.id.in_(family_ids))
+    groups = [
+        GroupSummary(
+            group_type=r.group_type,
+            label=GROUP_LABELS.get(r.group_type, r.group_type.title()),
+            family_count=r.family_count,
+            total_minutes=r.total_minutes,
         )
-        family_types = {r[0]: (r[1] or "other") for r in ft_result}
-
-    # Aggregate by group type
-    group_stats: dict[str, dict] = {}
-    for r in rows:
-        gt = family_types.get(r["family_id"], "other")
-        if gt not in group_stats:
-            group_stats[gt] = {"total_minutes": 0, "family_ids": set()}
-        group_stats[gt]["total_minutes"] += r["total_minutes"]
-        group_stats[gt]["family_ids"].add(r["family_id"])
-
-    groups = sorted(
-        [
-            GroupSummary(
-                group_type=gt,
-                label=GROUP_LABELS.get(gt, gt.title()),
-                family_count=len(stats["family_ids"]),
-                total_minutes=stats["total_minutes"],
-            )
-            for gt, stats in group_stats.items()
-        ],
-        key=lambda g: g.total_minutes,
-        reverse=True,
-    )
+        for r in result
+    ]
 
     username = await github_service.get_github_username(db)
     return GroupListResponse(groups=groups, github_username=username)
@@ -275,107 +339,56 @@ async def get_group_detail(
     db: AsyncSession = Depends(get_db),
 ):
     """Return all families in a group type with full session detail."""
-    result = await db.execute(text(
-        "SELECT family_id, family_name, display_name, color, "
-        "session_id, session_label, year, season, total_minutes, active_days "
-        "FROM v_family_totals"
-    ))
-    rows = [dict(r._mapping) for r in result]
-
-    # Filter by group type
-    family_ids = {r["family_id"] for r in rows}
-    family_types: dict[int, str] = {}
-    if family_ids:
-        # See note above — use category_groups join, not the legacy family_type column.
-        ft_result = await db.execute(
-            select(CategoryFamily.id, CategoryGroup.name)
-            .join(CategoryGroup, CategoryFamily.group_id == CategoryGroup.id, isouter=True)
-            .where(CategoryFamily.id.in_(family_ids))
-        )
-        family_types = {r[0]: (r[1] or "other") for r in ft_result}
-
-    filtered_rows = [
-        r for r in rows if family_types.get(r["family_id"]) == group_type
-    ]
+    return await _cached_json(("group", group_type), lambda: _build_group_detail(group_type, db))
 
-    # AI descriptions
-    desc_result = await db.execute(select(AIDescription))
-    descriptions: dict[tuple[int, int], str] = {
-        (d.family_id, d.session_id): d.description
-        for d in desc_result.scalars().all()
-    }
-
-    # Text entry counts
-    all_session_ids = list({r["session_id"] for r in filtered_rows})
-    text_counts: dict[int, int] = {}
-    if all_session_ids:
-        tc_result = await db.execute(
-            select(TextEntry.session_id, func.count(TextEntry.id))
-            .where(TextEntry.session_id.in_(all_session_ids))
-            .group_by(TextEntry.session_id)
-        )
-        text_counts = {r[0]: r[1] for r in tc_result}
 
-    # GitHub links (multi-repo: family_id -> list of repo_full_names)
-    link_result = await db.execute(select(GitHubRepoLink))
-    all_links = link_result.scalars().all()
-    linked_families: dict[int, list[str]] = {}
-    for link in all_links:
-        linked_families.setdefault(link.family_id, []).append(link.repo_full_name)
+async def _build_group_detail(group_type: str, db: AsyncSession) -> GroupDetailResponse:
+    # One row per family with its sessions already assembled as a JSON array
+    # (the inner ORDER BY feeds json_group_array chronologically) and its
+    # linked repo names alongside, so Python only validates the shape.
+    result = await db.execute(text(
+        "SELECT f.family_id, f.family_name, f.display_name, f.color, "
+        "SUM(f.total_minutes) AS total_minutes, "
+        "json_group_array(json_object("
+        "'session_id', f.session_id, 'session_label', f.session_label, "
+        "'year', f.year, 'season', f.season, "
+        "'total_minutes', f.total_minutes, 'active_days', f.active_days, "
+        "'ai_description', f.ai_description, 'text_entries_count', f.text_entries_count"
+        ")) AS sessions, "
+        "(SELECT json_group_array(l.repo_full_name) FROM github_repo_links l "
+        "WHERE l.family_id = f.family_id) AS linked_repos "
+        "FROM ("
+        "SELECT v.family_id, v.family_name, v.display_name, v.color, "
+        "v.session_id, v.session_label, v.year, v.season, v.total_minutes, v.active_days, "
+        "d.description AS ai_description, "
+        "(SELECT COUNT(*) FROM text_entries te WHERE te.session_id = v.session_id) "
+        "AS text_entries_count "
+        f"FROM v_family_totals v {_FAMILY_GROUP_JOIN} {_AI_DESCRIPTION_JOIN} "
+        "WHERE COALESCE(cg.name, 'other') = :group_type "
+        f"ORDER BY v.family_id, v.year, {_SEASON_ORD}"
+        ") f "
+        "GROUP BY f.family_id ORDER BY total_minutes DESC, f.family_id"
+    ), {"group_type": group_type})
+    rows = result.all()
+
+    linked_families = {r.family_id: json.loads(r.linked_repos) for r in rows}
+    repo_infos = await github_service.get_cached_repo_infos(
+        (rn for names in linked_families.values() for rn in names), db,
+    )
 
     username = await github_service.get_github_username(db)
 
-    # Build families
-    families_map: dict[int, dict] = {}
-    for r in filtered_rows:
-        fid = r["family_id"]
-        if fid not in families_map:
-            families_map[fid] = {
-                "family_id": fid,
-                "family_name": r["family_name"],
-                "display_name": r["display_name"],
-                "color": r["color"],
-                "total_minutes": 0,
-                "sessions": [],
-            }
-
-        families_map[fid]["sessions"].append(
-            ResearchSessionEntry(
-                session_id=r["session_id"],
-                session_label=r["session_label"],
-                year=r["year"],
-                season=r["season"],
-                total_minutes=r["total_minutes"],
-                active_days=r["active_days"],
-                ai_description=descriptions.get((fid, r["session_id"])),
-                text_entries_count=text_counts.get(r["session_id"], 0),
-            )
-        )
-        families_map[fid]["total_minutes"] += r["total_minutes"]
-
-    # Sort sessions within each family, then resolve GitHub info
     families: list[GroupFamilyItem] = []
-    for f in sorted(families_map.values(), key=lambda x: x["total_minutes"], reverse=True):
-        f["sessions"].sort(
-            key=lambda s: (s.year, SEASON_ORDER.get(s.season.lower(), 4))
-        )
-
-        fid = f["family_id"]
-        repo_names = linked_families.get(fid, [])
-        github_repos = []
-        for rn in repo_names:
-            cached = await github_service.get_cached_repo_info(rn, db)
-            if cached:
-                github_repos.append(GitHubRepoInfo(**cached))
-
+    for r in rows:
+        repo_names = linked_families[r.family_id]
         families.append(GroupFamilyItem(
-            family_id=f["family_id"],
-            family_name=f["family_name"],
-            display_name=f["display_name"],
-            color=f["color"],
-            total_minutes=f["total_minutes"],
-            sessions=f["sessions"],
-            github_repos=github_repos,
+            family_id=r.family_id,
+            family_name=r.family_name,
+            display_name=r.display_name,
+            color=r.color,
+            total_minutes=r.total_minutes,
+            sessions=_SESSION_ENTRIES.validate_json(r.sessions),
+            github_repos=[GitHubRepoInfo(**repo_infos[rn]) for rn in repo_names if rn in repo_infos],
             linked_repo_count=len(repo_names),
         ))
 
@@ -392,66 +405,30 @@ async def get_group_detail(
 @router.get("/research", response_model=ResearchFamiliesResponse)
 async def get_research_families(db: AsyncSession = Depends(get_db)):
     """List research families only with summary info."""
+    return await _cached_json("research", lambda: _build_research_families(db))
+
+
+async def _build_research_families(db: AsyncSession) -> ResearchFamiliesResponse:
     result = await db.execute(text(
-        "SELECT family_id, family_name, display_name, color, "
-        "session_id, total_minutes "
-        "FROM v_family_totals"
+        "SELECT v.family_id, v.family_name, v.display_name, v.color, "
+        "SUM(v.total_minutes) AS total_minutes, COUNT(DISTINCT v.session_id) AS session_count, "
+        "EXISTS (SELECT 1 FROM github_repo_links l WHERE l.family_id = v.family_id) AS github_linked "
+        f"FROM v_family_totals v {_FAMILY_GROUP_JOIN} "
+        "WHERE cg.name = 'research' "
+        "GROUP BY v.family_id ORDER BY total_minutes DESC"
     ))
-    rows = [dict(r._mapping) for r in result]
-
-    # Get family types
-    family_ids = {r["family_id"] for r in rows}
-    family_types: dict[int, str | None] = {}
-    if family_ids:
-        # Resolve each family to its GROUP (research / courses / personal / training)
-        # via the modern category_groups join. `family_type` is the legacy column
-        # and was inconsistently set on some rows — group_id is the source of truth.
-        ft_result = await db.execute(
-            select(CategoryFamily.id, CategoryGroup.name)
-            .join(CategoryGroup, CategoryFamily.group_id == CategoryGroup.id, isouter=True)
-            .where(CategoryFamily.id.in_(family_ids))
+    families = [
+        ResearchFamilyListItem(
+            family_id=r.family_id,
+            family_name=r.family_name,
+            display_name=r.display_name,
+            color=r.color,
+            total_minutes=r.total_minutes,
+            session_count=r.session_count,
+            github_linked=bool(r.github_linked),
         )
-        family_types = {r[0]: r[1] for r in ft_result}
-
-    # Get linked repos
-    link_result = await db.execute(select(GitHubRepoLink))
-    linked_families = {link.family_id for link in link_result.scalars().all()}
-
-    # Build research-only families
-    families_map: dict[int, dict] = {}
-    for r in rows:
-        fid = r["family_id"]
-        if family_types.get(fid) != "research":
-            continue
-        if fid not in families_map:
-            families_map[fid] = {
-                "family_id": fid,
-                "family_name": r["family_name"],
-                "display_name": r["display_name"],
-                "color": r["color"],
-                "total_minutes": 0,
-                "session_ids": set(),
-                "github_linked": fid in linked_families,
-            }
-        families_map[fid]["total_minutes"] += r["total_minutes"]
-        families_map[fid]["session_ids"].add(r["session_id"])
-
-    families = sorted(
-        [
-            ResearchFamilyListItem(
-                family_id=f["family_id"],
-                family_name=f["family_name"],
-                display_name=f["display_name"],
-                color=f["color"],
-                total_minutes=f["total_minutes"],
-                session_count=len(f["session_ids"]),
-                github_linked=f["github_linked"],
-            )
-            for f in families_map.values()
-        ],
-        key=lambda x: x.total_minutes,
-        reverse=True,
-    )
+        for r in result
+    ]
 
     username = await github_service.get_github_username(db)
 
@@ -468,64 +445,37 @@ async def get_research_family_detail(
     if not family:
         raise HTTPException(status_code=404, detail="Family not found")
 
-    # Get session data from view
+    # Session rows with their AI description and text-entry count joined in,
+    # rather than separate description and count queries.
     result = await db.execute(text(
-        "SELECT session_id, session_label, year, season, total_minutes, active_days "
-        "FROM v_family_totals WHERE family_id = :fid"
+        "SELECT v.session_id, v.session_label, v.year, v.season, v.total_minutes, "
+        "v.active_days, d.description AS ai_description, "
+        "(SELECT COUNT(*) FROM text_entries te WHERE te.session_id = v.session_id) "
+        "AS text_entries_count "
+        f"FROM v_family_totals v {_AI_DESCRIPTION_JOIN} WHERE v.family_id = :fid "
+        f"ORDER BY v.year, {_SEASON_ORD}"
     ), {"fid": family_id})
-    rows = [dict(r._mapping) for r in result]
+    # Columns are named after ResearchSessionEntry's fields, and rows come
+    # already in chronological order.
+    sessions = [ResearchSessionEntry(**r._mapping) for r in result]
 
-    if not rows:
+    if not sessions:
         raise HTTPException(status_code=404, detail="No data for this family")
 
-    # Get AI descriptions
-    desc_result = await db.execute(
-        select(AIDescription)
-        .where(AIDescription.family_id == family_id)
-    )
-    descriptions = {
-        d.session_id: d.description for d in desc_result.scalars().all()
-    }
-
-    # Count text entries per session
-    text_counts: dict[int, int] = {}
-    session_ids = [r["session_id"] for r in rows]
-    if session_ids:
-        tc_result = await db.execute(
-            select(TextEntry.session_id, func.count(TextEntry.id))
-            .where(TextEntry.session_id.in_(session_ids))
-            .group_by(TextEntry.session_id)
-        )
-        text_counts = {r[0]: r[1] for r in tc_result}
-
-    # Build sessions list
-    sessions = sorted(
-        [
-            ResearchSessionEntry(
-                session_id=r["session_id"],
-                session_label=r["session_label"],
-                year=r["year"],
-                season=r["season"],
-                total_minutes=r["total_minutes"],
-                active_days=r["active_days"],
-                ai_description=descriptions.get(r["session_id"]),
-                text_entries_count=text_counts.get(r["session_id"], 0),
-            )
-            for r in rows
-        ],
-        key=lambda s: (s.year, SEASON_ORDER.get(s.season.lower(), 4)),
-    )
-
     total_minutes = sum(s.total_minutes for s in sessions)
 
     # GitHub info (multi-repo)
     linked_repos = await github_service.get_linked_repos(family_id, db)
+    repo_infos = await github_service.get_cached_repo_infos(linked_repos, db)
     github_repos: list[GitHubRepoInfo] = []
 
     for repo_full_name in linked_repos:
-        cached = await github_service.get_cached_repo_info(repo_full_name, db)
+        cached = repo_infos.get(repo_full_name)
         if cached:
-            if not cached.get("readme_excerpt"):
+            # Repos without a README would otherwise be re-fetched on every
+            # view; the cache row is rebuilt (details cleared) when the repo
+            # list goes stale, so this still refreshes hourly.
+            if not cached["details_fetched"]:
                 details = await github_service.fetch_repo_details(repo_full_name, db)
                 if details:
                     cached["readme_excerpt"] = details["readme_excerpt"]
@@ -553,32 +503,80 @@ async def get_research_family_detail(
     )
 
 
-@router.post("/describe/enriched", response_model=EnrichedDescribeResponse)
-async def describe_enriched(
-    req: EnrichedDescribeRequest,
-    db: AsyncSession = Depends(get_db),
-):
-    """Generate an enriched AI research narrative for a family+session pair."""
-    if not await has_api_key(db):
-        raise HTTPException(
-            status_code=400,
-            detail="API key not configured. Add one in Settings.",
+async def _get_by_id(model, pk: int):
+    async with async_session() as db:
+        return await db.get(model, pk)
+
+
+async def _load_family_totals(family_id: int, session_id: int):
+    async with async_session() as db:
+        result = await db.execute(
+            _FAMILY_TOTALS_STMT, {"fid": family_id, "sid": session_id}
         )
+        return result.first()
 
-    family = await db.get(CategoryFamily, req.family_id)
+
+async def _load_category_names(family_id: int, session_id: int) -> list[str]:
+    """Names of this family's categories in this session (used for text filtering)."""
+    async with async_session() as db:
+        result = await db.execute(
+            select(Category.name, Category.display_name)
+            .where(Category.family_id == family_id)
+            .where(Category.session_id == session_id)
+        )
+        return [r.display_name or r.name for r in result]
+
+
+async def _load_github_context(family_id: int, include_github: bool) -> tuple[str, bool]:
+    """Prompt context from the cached info of each linked repo (multi-repo)."""
+    github_context = ""
+    github_context_used = False
+    if not include_github:
+        return github_context, github_context_used
+
+    async with async_session() as db:
+        linked_repos = await github_service.get_linked_repos(family_id, db)
+        repo_infos = await github_service.get_cached_repo_infos(linked_repos, db)
+
+    for repo_full_name in linked_repos:
+        cached = repo_infos.get(repo_full_name)
+        if cached:
+            github_context_used = True
+            github_context += f"\n\nGitHub repository: {repo_full_name}"
+            if cached.get("description"):
+                github_context += f"\nRepo description: {cached['description']}"
+            if cached.get("readme_excerpt"):
+                excerpt = cached["readme_excerpt"][:600]
+                github_context += f"\nREADME excerpt:\n{excerpt}"
+            if cached.get("recent_commits"):
+                commits = cached["recent_commits"][:5]
+                commit_lines = [
+                    f"  - {c.get('sha', '')}: {c.get('message', '')}"
+                    for c in commits
+                ]
+                github_context += "\nRecent commits:\n" + "\n".join(commit_lines)
+    return github_context, github_context_used
+
+
+async def _build_enriched_prompt(
+    req: EnrichedDescribeRequest, db: AsyncSession
+) -> tuple[str, bool]:
+    """User-turn prompt for an enriched description, and whether GitHub context went into it."""
+    # Everything the prompt needs except the text entries is independent, so
+    # it loads concurrently, each lookup on its own session.
+    family, session, totals_row, category_names, (github_context, github_context_used) = (
+        await asyncio.gather(
+            _get_by_id(CategoryFamily, req.family_id),
+            _get_by_id(Session, req.session_id),
+            _load_family_totals(req.family_id, req.session_id),
+            _load_category_names(req.family_id, req.session_id),
+            _load_github_context(req.family_id, req.include_github),
+        )
+    )
     if not family:
         raise HTTPException(status_code=404, detail="Family not found")
-
-    session = await db.get(Session, req.session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-
-    # Get totals
-    totals_result = await db.execute(text(
-        "SELECT total_minutes, active_days FROM v_family_totals "
-        "WHERE family_id = :fid AND session_id = :sid"
-    ), {"fid": req.family_id, "sid": req.session_id})
-    totals_row = totals_result.first()
     if not totals_row:
         raise HTTPException(status_code=404, detail="No data for this family+session")
 
@@ -590,46 +588,55 @@ async def describe_enriched(
     session_label = session.label or f"{session.season.title()} {session.year}"
     family_display = family.display_name or family.name
 
-    # Get category names for this family in this session (used for text filtering)
-    cat_result = await db.execute(
-        select(Category.name, Category.display_name)
-        .where(Category.family_id == req.family_id)
-        .where(Category.session_id == req.session_id)
-    )
-    category_names = []
+    # Search terms for text filtering: each category name plus the family
+    # name and the longer words of its display name.
     search_terms = set()
-    for r in cat_result:
-        cat_name = r.display_name or r.name
-        category_names.append(cat_name)
-        # Build search terms: full name + key parts
+    for cat_name in category_names:
         search_terms.add(cat_name.lower())
-        # Also add family name and individual words >2 chars
         search_terms.add(family.name.lower())
         if family.display_name:
             for word in family.display_name.lower().split():
                 if len(word) > 2:
                     search_terms.add(word)
 
-    # Get dates where this family had observations (not all session dates)
-    active_dates_result = await db.execute(text(
-        "SELECT DISTINCT dr.date "
-        "FROM observations o "
-        "JOIN categories c ON o.category_id = c.id "
-        "JOIN daily_records dr ON o.daily_record_id = dr.id "
-        "WHERE c.family_id = :fid AND c.session_id = :sid"
-    ), {"fid": req.family_id, "sid": req.session_id})
-    active_dates = {r[0] for r in active_dates_result}
+    # Dates where this family had observations (not all session dates); kept
+    # as a subquery so the text entries come back in the same round trip.
+    active_dates = (
+        select(DailyRecord.date)
+        .join(Observation, Observation.daily_record_id == DailyRecord.id)
+        .join(Category, Observation.category_id == Category.id)
+        .where(Category.family_id == req.family_id)
+        .where(Category.session_id == req.session_id)
+    )
 
     # Get text entries only for active dates
     text_context = ""
-    if active_dates:
-        text_result = await db.execute(
-            select(TextEntry)
+    if search_terms:
+        text_stmt = (
+            select(TextEntry.date, TextEntry.study_materials, TextEntry.notes)
             .where(TextEntry.session_id == req.session_id)
             .where(TextEntry.date.in_(active_dates))
             .order_by(TextEntry.date)
         )
-        text_entries = text_result.scalars().all()
+        # Coarse relevance filter in SQL, so only candidate rows come back; the
+        # per-fragment pass below trims them to the matching parts. SQLite's
+        # LIKE only folds ASCII case, so it agrees with the .lower() matching
+        # below only when every (lowercased) term is ASCII; otherwise all rows
+        # for the active dates go to the Python pass.
+        if all(term.isascii() for term in search_terms):
+            text_stmt = text_stmt.where(or_(*(
+                column.contains(term, autoescape=True)
+                for term in search_terms
+                for column in (TextEntry.study_materials, TextEntry.notes)
+            )))
+        text_result = await db.execute(text_stmt)
+        text_entries = text_result.all()
+
+        # One alternation scans each string once instead of a substring check
+        # per term; longest terms first so overlapping names prefer the fuller one.
+        term_pattern = re.compile(
+            "|".join(map(re.escape, sorted(search_terms, key=len, reverse=True)))
+        )
 
         snippets = []
         for te in text_entries:
@@ -639,16 +646,13 @@ async def describe_enriched(
                 # study_materials is comma-separated like "salk lab (180m), mus 8 (60m), ..."
                 for item in te.study_materials.split(","):
                     item_stripped = item.strip()
-                    item_lower = item_stripped.lower()
-                    if any(term in item_lower for term in search_terms):
+                    if term_pattern.search(item_stripped.lower()):
                         relevant_parts.append(item_stripped)
 
             # Also check notes for relevance
             relevant_notes = ""
-            if te.notes:
-                notes_lower = te.notes.lower()
-                if any(term in notes_lower for term in search_terms):
-                    relevant_notes = te.notes
+            if te.notes and term_pattern.search(te.notes.lower()):
+                relevant_notes = te.notes
 
             if relevant_parts or relevant_notes:
                 parts = []
@@ -664,83 +668,58 @@ async def describe_enriched(
                 + "\n".join(snippets[:20])
             )
 
-    # GitHub context (multi-repo)
-    github_context = ""
-    github_context_used = False
-    if req.include_github:
-        linked_repos = await github_service.get_linked_repos(req.family_id, db)
-
-        for repo_full_name in linked_repos:
-            cached = await github_service.get_cached_repo_info(
-                repo_full_name, db
-            )
-            if cached:
-                github_context_used = True
-                github_context += f"\n\nGitHub repository: {repo_full_name}"
-                if cached.get("description"):
-                    github_context += f"\nRepo description: {cached['description']}"
-                if cached.get("readme_excerpt"):
-                    excerpt = cached["readme_excerpt"][:600]
-                    github_context += f"\nREADME excerpt:\n{excerpt}"
-                if cached.get("recent_commits"):
-                    commits = cached["recent_commits"][:5]
-                    commit_lines = [
-                        f"  - {c.get('sha', '')}: {c.get('message', '')}"
-                        for c in commits
-                    ]
-                    github_context += "\nRecent commits:\n" + "\n".join(commit_lines)
-
     categories_str = ", ".join(category_names) if category_names else family_display
 
     prompt = (
-        f"Write a 3-5 sentence narrative about ONLY the project \"{family_display}\" during this session. "
-        f"Focus on what was done specifically for this project. "
-        f"Do NOT mention other projects or unrelated activities. "
-        f"Do NOT just restate hours — describe the work.\n\n"
         f"Project: {family_display}\n"
         f"Categories logged under this project: {categories_str}\n"
         f"Session: {session_label}\n"
         f"Total time on this project: {hours}h {mins}m across {active_days} active days\n"
         f"Date range: {session.start_date or 'unknown'} to {session.end_date or 'unknown'}"
         f"{text_context}"
-        f"{github_context}\n\n"
-        f"Write ONLY about \"{family_display}\". Be specific based on the available context. "
-        f"If the log entries don't provide enough detail, write a brief factual summary of the time spent."
+        f"{github_context}"
     )
+    return prompt, github_context_used
+
+
+@router.post("/describe/enriched", response_model=EnrichedDescribeResponse)
+async def describe_enriched(
+    req: EnrichedDescribeRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Generate an enriched AI research narrative for a family+session pair."""
+    if not await has_api_key(db):
+        raise HTTPException(
+            status_code=400,
+            detail="API key not configured. Add one in Settings.",
+        )
+
+    prompt, github_context_used = await _build_enriched_prompt(req, db)
+    content_hash = _content_hash(ENRICHED_DESCRIBE_INSTRUCTIONS, prompt)
+    stored = await _stored_description(req.family_id, req.session_id, db)
+    if stored and stored.content_hash == content_hash:
+        return EnrichedDescribeResponse(
+            family_id=req.family_id,
+            session_id=req.session_id,
+            description=stored.description,
+            github_context_used=github_context_used,
+        )
 
     api_key = await get_api_key(db)
 
     try:
-        import anthropic
-        client = anthropic.AsyncAnthropic(api_key=api_key)
+        client = get_client(api_key)
         response = await client.messages.create(
-            model="claude-haiku-4-5-20251001",
+            model=DESCRIBE_MODEL,
             max_tokens=400,
+            system=_cached_system(ENRICHED_DESCRIBE_INSTRUCTIONS),
             messages=[{"role": "user", "content": prompt}],
         )
         description = response.content[0].text.strip()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI generation failed: {e}")
 
-    # Upsert AIDescription
-    existing = await db.execute(
-        select(AIDescription)
-        .where(AIDescription.family_id == req.family_id)
-        .where(AIDescription.session_id == req.session_id)
-    )
-    ai_desc = existing.scalar_one_or_none()
-    if ai_desc:
-        ai_desc.description = description
-        ai_desc.model_used = "claude-haiku-4-5-20251001"
-    else:
-        ai_desc = AIDescription(
-            family_id=req.family_id,
-            session_id=req.session_id,
-            description=description,
-            model_used="claude-haiku-4-5-20251001",
-        )
-        db.add(ai_desc)
-    await db.commit()
+    await _save_description(req.family_id, req.session_id, description, content_hash, db)
 
     return EnrichedDescribeResponse(
         family_id=req.family_id,
@@ -750,6 +729,72 @@ async def describe_enriched(
     )
 
 
+@router.post("/describe/enriched/stream")
+async def describe_enriched_stream(
+    req: EnrichedDescribeRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Streaming variant of describe_enriched (SSE).
+
+    Emits `token` events (deltas batched by coalesce_text) as the narrative is
+    generated, then one `done` event carrying the EnrichedDescribeResponse
+    fields, or an `error` event. Request
+    validation (API key, missing family/session) still fails with a plain
+    HTTP error before the stream starts.
+    """
+    if not await has_api_key(db):
+        raise HTTPException(
+            status_code=400,
+            detail="API key not configured. Add one in Settings.",
+        )
+
+    prompt, github_context_used = await _build_enriched_prompt(req, db)
+    content_hash = _content_hash(ENRICHED_DESCRIBE_INSTRUCTIONS, prompt)
+    stored = await _stored_description(req.family_id, req.session_id, db)
+    api_key = await get_api_key(db)
+
+    def done(description: str) -> bytes:
+        return sse_event({"type": "done", **EnrichedDescribeResponse(
+            family_id=req.family_id,
+            session_id=req.session_id,
+            description=description,
+            github_context_used=github_context_used,
+        ).model_dump()})
+
+    async def generate() -> AsyncGenerator[bytes, None]:
+        if stored and stored.content_hash == content_hash:
+            yield done(stored.description)
+            return
+
+        # On client disconnect the keepalive wrapper cancels this generator
+        # mid-stream: leaving the `async with` closes the Anthropic response
+        # (no further tokens are generated), and CancelledError skips both the
+        # error event and the save below.
+        try:
+            async with get_client(api_key).messages.stream(
+                model=DESCRIBE_MODEL,
+                max_tokens=400,
+                system=_cached_system(ENRICHED_DESCRIBE_INSTRUCTIONS),
+                messages=[{"role": "user", "content": prompt}],
+            ) as stream:
+                async for chunk in coalesce_text(stream.text_stream):
+                    yield sse_event({"type": "token", "content": chunk})
+                final = await stream.get_final_message()
+            description = final.content[0].text.strip()
+        except Exception as e:  # noqa: BLE001
+            yield sse_event({"type": "error", "content": f"AI generation failed: {e}"})
+            return
+
+        # The request session may already be closed once streaming starts.
+        async with async_session() as save_db:
+            await _save_description(
+                req.family_id, req.session_id, description, content_hash, save_db,
+            )
+        yield done(description)
+
+    return event_stream(generate())
+
+
 # ── GitHub endpoints ─────────────────────────────────────
 
 @router.post("/github/search", response_model=GitHubSearchResult)
@@ -1,118 +1,141 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func
+from collections.abc import AsyncGenerator
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, insert, lambda_stmt, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from logger.database import get_db
-from logger.models import Session, Category, DailyRecord, Observation, CategoryFamily
+from logger.database import async_session, get_db
+from logger.models import Session, Category
 from logger.schemas import (
     SessionCreate, SessionResponse, SessionListResponse, SessionUpdate,
     CategoryResponse,
 )
 from logger.services.family_service import (
-    detect_family, load_match_rules, get_or_create_family_by_name,
+    detect_family, load_match_rules, get_or_create_family_ids, get_family_labels,
 )
 
 router = APIRouter(tags=["sessions"])
 
 SEASON_ORDER = {"winter": 0, "spring": 1, "summer": 2, "fall": 3}
+_SEASON_ORD = case(SEASON_ORDER, value=Session.season, else_=0)
+# Loader options for every Session fetched here: only categories are read;
+# any other relationship access raises instead of emitting a lazy load.
+_WITH_CATEGORIES = (selectinload(Session.categories), raiseload("*"))
+# Built once; per-request filters are added through lambda_stmt so SQLAlchemy
+# reuses the compiled SQL and only swaps the bound values.
+_SESSION_SELECT = select(Session).options(*_WITH_CATEGORIES)
+
+
+# Response fields that are plain columns of the ORM row, copied by name.
+_SESSION_COLUMNS = tuple(SessionResponse.model_fields.keys() - {"categories"})
+_CATEGORY_COLUMNS = tuple(
+    CategoryResponse.model_fields.keys() - {"family_name", "family_display_name", "family_type"}
+)
 
 
-async def _build_session_response(session: Session, db: AsyncSession) -> SessionResponse:
-    """Build a full SessionResponse with computed fields."""
-    # Get categories with totals
+def _session_response(
+    session: Session,
+    family_labels: dict,
+) -> SessionResponse:
+    """Build a full SessionResponse from the loaded session (no DB access).
+
+    Minute totals and day counts are the trigger-maintained rollup columns;
+    every caller loads the session and its categories after its own writes,
+    so the instances are current. Everything comes straight from the DB, so
+    model_construct skips re-validating it.
+    """
     cat_responses = []
     for cat in session.categories:
-        total = await db.execute(
-            select(func.coalesce(func.sum(Observation.minutes), 0))
-            .where(Observation.category_id == cat.id)
-        )
-        total_min = total.scalar()
-
-        family_name = None
-        family_display_name = None
-        family_type = None
-        if cat.family_id:
-            fam = await db.get(CategoryFamily, cat.family_id)
-            if fam:
-                family_name = fam.name
-                family_display_name = fam.display_name
-                family_type = fam.family_type
-
-        cat_responses.append(CategoryResponse(
-            id=cat.id,
-            session_id=cat.session_id,
-            name=cat.name,
-            display_name=cat.display_name,
-            family_id=cat.family_id,
-            family_name=family_name,
-            family_display_name=family_display_name,
-            family_type=family_type,
-            position=cat.position,
-            total_minutes=total_min,
-        ))
+        fam = family_labels.get(cat.family_id) if cat.family_id else None
 
-    # Session totals
-    total_result = await db.execute(
-        select(func.coalesce(func.sum(DailyRecord.total_minutes), 0))
-        .where(DailyRecord.session_id == session.id)
-    )
-    total_minutes = total_result.scalar()
+        cat_responses.append(CategoryResponse.model_construct(
+            **{name: getattr(cat, name) for name in _CATEGORY_COLUMNS},
+            family_name=fam.name if fam else None,
+            family_display_name=fam.display_name if fam else None,
+            family_type=fam.family_type if fam else None,
+        ))
 
-    days_result = await db.execute(
-        select(func.count(DailyRecord.id))
-        .where(DailyRecord.session_id == session.id)
-    )
-    days_logged = days_result.scalar()
-
-    return SessionResponse(
-        id=session.id,
-        year=session.year,
-        season=session.season,
-        label=session.label,
-        start_date=session.start_date,
-        end_date=session.end_date,
-        is_active=session.is_active,
-        source_file=session.source_file,
-        created_at=session.created_at,
+    return SessionResponse.model_construct(
+        **{name: getattr(session, name) for name in _SESSION_COLUMNS},
         categories=cat_responses,
-        total_minutes=total_minutes,
-        days_logged=days_logged,
     )
 
 
+async def _load_session(session_id: int, db: AsyncSession) -> Session | None:
+    """The session with its categories loaded (and nothing else lazy-loadable)."""
+    stmt = lambda_stmt(lambda: _SESSION_SELECT)
+    stmt += lambda s: s.where(Session.id == session_id)
+    return await db.scalar(stmt)
+
+
+async def _build_session_response(session: Session, db: AsyncSession) -> SessionResponse:
+    """Build a full SessionResponse with computed fields."""
+    family_labels = await get_family_labels(db)
+    return _session_response(session, family_labels)
+
+
 @router.get("/sessions", response_model=SessionListResponse)
-async def list_sessions(db: AsyncSession = Depends(get_db)):
+async def list_sessions(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    # Newest first; the page's rows carry the overall count as a window
+    # aggregate, so paging costs no extra COUNT query.
     result = await db.execute(
-        select(Session).options(selectinload(Session.categories)).order_by(
-            Session.year.desc(),
-            # Sort by season order
-        )
+        _SESSION_SELECT.add_columns(func.count().over())
+        .order_by(Session.year.desc(), _SEASON_ORD.desc())
+        .limit(limit)
+        .offset(offset)
     )
-    sessions = result.scalars().all()
-    # Sort by year desc, then season desc
-    sessions = sorted(
-        sessions,
-        key=lambda s: (s.year, SEASON_ORDER.get(s.season, 0)),
-        reverse=True,
+    rows = result.all()
+    if rows:
+        total = rows[0][1]
+    else:
+        total = await db.scalar(select(func.count(Session.id))) if offset else 0
+
+    # Totals are rollup columns and family labels come from one cached map,
+    # so the query count stays constant however many sessions/categories exist.
+    family_labels = await get_family_labels(db)
+    return SessionListResponse(
+        sessions=[_session_response(s, family_labels) for s, _ in rows],
+        total=total,
     )
 
-    responses = []
-    for s in sessions:
-        resp = await _build_session_response(s, db)
-        responses.append(resp)
 
-    return SessionListResponse(sessions=responses)
+@router.get("/sessions/stream")
+async def stream_sessions():
+    """Every session as newline-delimited JSON (one SessionResponse per line),
+    newest first, for exports of the full history.
+
+    Sessions are fetched in batches of 50 and each is serialized and dropped
+    from the identity map as soon as it's sent, so memory stays flat however
+    long the history is. The generator owns its DB session because it keeps
+    running after the endpoint has returned.
+    """
+    async def generate() -> AsyncGenerator[bytes, None]:
+        async with async_session() as db:
+            family_labels = await get_family_labels(db)
+            result = await db.stream_scalars(
+                _SESSION_SELECT.order_by(Session.year.desc(), _SEASON_ORD.desc())
+                .execution_options(yield_per=50)
+            )
+            async for session in result:
+                yield _session_response(session, family_labels).model_dump_json().encode() + b"\n"
+                db.expunge(session)  # cascades to its categories
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 
 @router.get("/sessions/active", response_model=SessionResponse | None)
 async def get_active_session(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Session)
-        .options(selectinload(Session.categories))
-        .where(Session.is_active == True)
+    session = await db.scalar(
+        lambda_stmt(lambda: _SESSION_SELECT.where(Session.is_active == True).limit(1))
     )
-    session = result.scalar_one_or_none()
     if not session:
         return None
     return await _build_session_response(session, db)
@@ -120,12 +143,7 @@ async def get_active_session(db: AsyncSession = Depends(get_db)):
 
 @router.get("/sessions/{session_id}", response_model=SessionResponse)
 async def get_session(session_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Session)
-        .options(selectinload(Session.categories))
-        .where(Session.id == session_id)
-    )
-    session = result.scalar_one_or_none()
+    session = await _load_session(session_id, db)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     return await _build_session_response(session, db)
@@ -133,47 +151,46 @@ async def get_session(session_id: int, db: AsyncSession = Depends(get_db)):
 
 @router.post("/sessions", response_model=SessionResponse)
 async def create_session(data: SessionCreate, db: AsyncSession = Depends(get_db)):
-    # Check uniqueness
-    existing = await db.execute(
-        select(Session).where(Session.year == data.year, Session.season == data.season)
+    # UNIQUE(year, season) does the duplicate check inside the INSERT:
+    # ON CONFLICT DO NOTHING returns no row for an existing session. Every
+    # INSERT here RETURNs its rows as ORM instances, so the response is built
+    # without reloading the session afterwards.
+    session = await db.scalar(
+        sqlite_insert(Session)
+        .values(
+            year=data.year,
+            season=data.season,
+            label=data.label or f"{data.season.capitalize()} {data.year}",
+        )
+        .on_conflict_do_nothing(index_elements=["year", "season"])
+        .returning(Session)
     )
-    if existing.scalar_one_or_none():
+    if session is None:
         raise HTTPException(status_code=409, detail=f"Session {data.season} {data.year} already exists")
+    session_id = session.id
+    categories: list[Category] = []
 
-    session = Session(
-        year=data.year,
-        season=data.season,
-        label=data.label or f"{data.season.capitalize()} {data.year}",
-    )
-    db.add(session)
-    await db.flush()
-
-    # If continuing from another session, copy categories
+    # If continuing from another session, copy its categories with a single
+    # INSERT ... SELECT (copies nothing if that session doesn't exist)
     if data.continue_from_session_id:
-        prev = await db.execute(
-            select(Session)
-            .options(selectinload(Session.categories))
-            .where(Session.id == data.continue_from_session_id)
+        copied = (Category.name, Category.display_name, Category.family_id, Category.position)
+        result = await db.scalars(
+            insert(Category).from_select(
+                ["session_id", *(c.key for c in copied)],
+                select(literal(session_id), *copied)
+                .where(Category.session_id == data.continue_from_session_id),
+            ).returning(Category)
         )
-        prev_session = prev.scalar_one_or_none()
-        if prev_session:
-            for cat in prev_session.categories:
-                new_cat = Category(
-                    session_id=session.id,
-                    name=cat.name,
-                    display_name=cat.display_name,
-                    family_id=cat.family_id,
-                    position=cat.position,
-                )
-                db.add(new_cat)
-
-    # Add explicitly specified categories
+        categories.extend(result.all())
+
+    # Add explicitly specified categories, resolving named families up front
     rules = await load_match_rules(db) if data.categories else None
+    family_ids = await get_or_create_family_ids(
+        [c.family for c in data.categories if c.family], db
+    )
+    rows = []
     for i, cat_data in enumerate(data.categories):
-        family_id = None
-        if cat_data.family:
-            family = await get_or_create_family_by_name(cat_data.family, db)
-            family_id = family.id
+        family_id = family_ids[cat_data.family.lower()] if cat_data.family else None
 
         display = cat_data.display_name
         if not display:
@@ -183,24 +200,20 @@ async def create_session(data: SessionCreate, db: AsyncSession = Depends(get_db)
             else:
                 display = cat_data.name
 
-        cat = Category(
-            session_id=session.id,
-            name=cat_data.name,
-            display_name=display,
-            family_id=family_id,
-            position=i,
-        )
-        db.add(cat)
+        rows.append({
+            "session_id": session_id,
+            "name": cat_data.name,
+            "display_name": display,
+            "family_id": family_id,
+            "position": i,
+        })
+    if rows:
+        result = await db.scalars(insert(Category).returning(Category), rows)
+        categories.extend(result.all())
 
     await db.commit()
 
-    # Reload with categories
-    result = await db.execute(
-        select(Session)
-        .options(selectinload(Session.categories))
-        .where(Session.id == session.id)
-    )
-    session = result.scalar_one()
+    set_committed_value(session, "categories", sorted(categories, key=lambda c: c.id))
     return await _build_session_response(session, db)
 
 
@@ -208,12 +221,7 @@ async def create_session(data: SessionCreate, db: AsyncSession = Depends(get_db)
 async def update_session(
     session_id: int, data: SessionUpdate, db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(Session)
-        .options(selectinload(Session.categories))
-        .where(Session.id == session_id)
-    )
-    session = result.scalar_one_or_none()
+    session = await _load_session(session_id, db)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -225,16 +233,17 @@ async def update_session(
         session.end_date = data.end_date
     if data.is_active is not None:
         if data.is_active:
-            # Deactivate all other sessions first
+            # Deactivate all other sessions first, in one UPDATE
             await db.execute(
-                select(Session).where(Session.is_active == True)
+                update(Session)
+                .where(Session.is_active == True, Session.id != session.id)
+                .values(is_active=False)
             )
-            for s in (await db.execute(select(Session).where(Session.is_active == True))).scalars():
-                s.is_active = False
         session.is_active = data.is_active
 
+    # expire_on_commit is off and nothing here is server-generated, so the
+    # instance is already current; no refresh round-trip needed.
     await db.commit()
-    await db.refresh(session)
     return await _build_session_response(session, db)
 
 
@@ -3,12 +3,14 @@ import os
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from fastapi.responses import Response
 from sqlalchemy import select, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from logger.config import DB_PATH
 from logger.database import export_db_bytes, get_db, replace_db_file
 from logger.models import Setting, Session, Observation, TextEntry
 from logger.schemas import SettingResponse, SettingUpdate, DBInfoResponse
+from logger.services import totals_cache
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
@@ -23,17 +25,13 @@ async def list_settings(db: AsyncSession = Depends(get_db)):
 async def update_setting(
     key: str, data: SettingUpdate, db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(select(Setting).where(Setting.key == key))
-    setting = result.scalar_one_or_none()
-
-    if setting:
-        setting.value = data.value
-    else:
-        setting = Setting(key=key, value=data.value)
-        db.add(setting)
-
+    setting = await db.scalar(
+        sqlite_insert(Setting)
+        .values(key=key, value=data.value)
+        .on_conflict_do_update(index_elements=["key"], set_={"value": data.value})
+        .returning(Setting)
+    )
     await db.commit()
-    await db.refresh(setting)
     return setting
 
 
@@ -41,9 +39,17 @@ async def update_setting(
 async def db_info(db: AsyncSession = Depends(get_db)):
     db_size = os.path.getsize(DB_PATH) if DB_PATH.exists() else 0
 
-    session_count = (await db.execute(select(func.count(Session.id)))).scalar()
-    obs_count = (await db.execute(select(func.count(Observation.id)))).scalar()
-    text_count = (await db.execute(select(func.count(TextEntry.id)))).scalar()
+    counts = totals_cache.row_count_cache.get("db_info")
+    if counts is None:
+        # All three counts as scalar subqueries of one SELECT: a single round-trip.
+        result = await db.execute(select(
+            select(func.count(Session.id)).scalar_subquery(),
+            select(func.count(Observation.id)).scalar_subquery(),
+            select(func.count(TextEntry.id)).scalar_subquery(),
+        ))
+        counts = tuple(result.one())
+        totals_cache.row_count_cache.set("db_info", counts)
+    session_count, obs_count, text_count = counts
 
     return DBInfoResponse(
         db_path=str(DB_PATH),
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from functools import lru_cache
+
+from pydantic import BaseModel, field_validator
 
 
 # ── Sessions ──────────────────────────────────────────────
@@ -58,6 +60,7 @@ class SessionResponse(BaseModel):
 
 class SessionListResponse(BaseModel):
     sessions: list[SessionResponse]
+    total: int  # sessions overall, across all pages
 
 
 # ── Categories ────────────────────────────────────────────
@@ -483,6 +486,27 @@ class BatchImportRequest(BaseModel):
 
 # ── Analytics ──────────────────────────────────────────
 
+@lru_cache(maxsize=256)
+def parse_session_ids(raw: str) -> tuple[int, ...]:
+    """Parse a comma-separated session id list. Polling clients send the
+    same string over and over, so the result is memoized."""
+    return tuple(int(s) for s in raw.split(","))
+
+
+class AnalyticsFilters(BaseModel):
+    session_ids: tuple[int, ...] | None = None
+    from_date: str | None = None
+    to_date: str | None = None
+    week_number: int | None = None
+
+    @field_validator("session_ids", mode="before")
+    @classmethod
+    def _split_session_ids(cls, v):
+        if isinstance(v, str):
+            return parse_session_ids(v) if v else None
+        return v
+
+
 class AnalyticsOverviewResponse(BaseModel):
     total_minutes: int
     days_tracked: int
@@ -2,266 +2,221 @@
 
 from collections import defaultdict
 
-from sqlalchemy import select, func, text as sa_text
+from sqlalchemy import text as sa_text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from logger.models import (
     Session, DailyRecord, Observation, Category, CategoryFamily,
 )
+from logger.services.lookup_cache import get_category_labels, get_session_labels
+from logger.utils.ttl_cache import TTLCache, clear_on_orm_writes
 
+# Serialized analytics responses keyed by (endpoint, filters). Filtered views
+# expire after 30s as a backstop; the filter-less session comparison lives
+# until the next write. Any ORM write to the tables analytics reads clears
+# both (raw-SQL writers call invalidate_cache() themselves).
+response_cache = TTLCache(ttl=30, maxsize=256)
+session_comparison_cache = TTLCache(ttl=None, maxsize=1)
 
-def _apply_filters(stmt, filters: dict, *, table=DailyRecord):
-    """Apply optional session_ids / from_date / to_date / week_number filters to a query."""
-    session_ids = filters.get("session_ids")
-    from_date = filters.get("from_date")
-    to_date = filters.get("to_date")
-    week_number = filters.get("week_number")
 
-    if session_ids:
-        stmt = stmt.where(table.session_id.in_(session_ids))
-    if from_date:
-        stmt = stmt.where(table.date >= from_date)
-    if to_date:
-        stmt = stmt.where(table.date <= to_date)
-    if week_number is not None:
-        stmt = stmt.where(table.week_number == week_number)
-    return stmt
+def invalidate_cache() -> None:
+    response_cache.clear()
+    session_comparison_cache.clear()
 
 
-async def get_overview(db: AsyncSession, filters: dict) -> dict:
-    """Aggregate overview stats: total minutes, days tracked, daily average, active categories."""
-    # Total minutes and days from DailyRecord
-    stmt = select(
-        func.coalesce(func.sum(DailyRecord.total_minutes), 0).label("total_minutes"),
-        func.count(DailyRecord.id).label("days_tracked"),
-    )
-    stmt = _apply_filters(stmt, filters)
-    result = await db.execute(stmt)
-    row = result.one()
-    total_minutes = int(row.total_minutes)
-    days_tracked = int(row.days_tracked)
-    daily_average = total_minutes // days_tracked if days_tracked > 0 else 0
+clear_on_orm_writes(invalidate_cache, Session, DailyRecord, Observation, Category, CategoryFamily)
 
-    # Active categories count
-    cat_stmt = (
-        select(func.count(func.distinct(Observation.category_id)))
-        .select_from(Observation)
-        .join(DailyRecord, Observation.daily_record_id == DailyRecord.id)
-    )
-    cat_stmt = _apply_filters(cat_stmt, filters)
-    cat_result = await db.execute(cat_stmt)
-    active_categories = int(cat_result.scalar())
-
-    return {
-        "total_minutes": total_minutes,
-        "days_tracked": days_tracked,
-        "daily_average": daily_average,
-        "active_categories": active_categories,
-    }
 
+def _filter_sql(filters: dict, prefix: str = "") -> tuple[str, dict]:
+    """Render the optional session_ids / from_date / to_date / week_number
+    filters as SQL conditions (joined with AND) plus their bind params.
 
-async def get_daily_series(db: AsyncSession, filters: dict) -> list[dict]:
-    """Daily time series with per-category breakdown (top 8 + Other)."""
-    # Use the v_daily_totals view
-    where_clauses = []
+    `prefix` qualifies the columns, e.g. "dr." when daily_records is aliased.
+    """
+    clauses: list[str] = []
     params: dict = {}
     if filters.get("session_ids"):
         placeholders = ", ".join(f":sid_{i}" for i in range(len(filters["session_ids"])))
-        where_clauses.append(f"session_id IN ({placeholders})")
+        clauses.append(f"{prefix}session_id IN ({placeholders})")
         for i, sid in enumerate(filters["session_ids"]):
             params[f"sid_{i}"] = sid
     if filters.get("from_date"):
-        where_clauses.append("date >= :from_date")
+        clauses.append(f"{prefix}date >= :from_date")
         params["from_date"] = filters["from_date"]
     if filters.get("to_date"):
-        where_clauses.append("date <= :to_date")
+        clauses.append(f"{prefix}date <= :to_date")
         params["to_date"] = filters["to_date"]
     if filters.get("week_number") is not None:
-        where_clauses.append("week_number = :week_number")
+        clauses.append(f"{prefix}week_number = :week_number")
         params["week_number"] = filters["week_number"]
+    return " AND ".join(clauses) or "1", params
 
-    where = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
 
+async def get_overview(db: AsyncSession, filters: dict) -> dict:
+    """Aggregate overview stats: total minutes, days tracked, daily average, active categories."""
+    cond, params = _filter_sql(filters)
+    obs_cond, _ = _filter_sql(filters, "dr.")
     sql = sa_text(f"""
-        SELECT date, category_name, family_color, SUM(minutes) as total_mins
-        FROM v_daily_totals
-        {where}
-        GROUP BY date, category_name
-        ORDER BY date
+        SELECT
+            (SELECT COALESCE(SUM(total_minutes), 0) FROM daily_records WHERE {cond}),
+            (SELECT COUNT(*) FROM daily_records WHERE {cond}),
+            (SELECT COUNT(DISTINCT o.category_id)
+               FROM observations o
+               JOIN daily_records dr ON o.daily_record_id = dr.id
+              WHERE {obs_cond})
     """)
-    result = await db.execute(sql, params)
-    rows = result.all()
-
-    # Find top 8 categories by total minutes
-    cat_totals: dict[str, int] = defaultdict(int)
-    cat_colors: dict[str, str | None] = {}
-    for row in rows:
-        cat_totals[row.category_name] += int(row.total_mins)
-        if row.family_color:
-            cat_colors[row.category_name] = row.family_color
+    total_minutes, days_tracked, active_categories = (await db.execute(sql, params)).one()
+    total_minutes = int(total_minutes)
+    daily_average = total_minutes // days_tracked if days_tracked > 0 else 0
 
-    sorted_cats = sorted(cat_totals.items(), key=lambda x: x[1], reverse=True)
-    top_cats = {name for name, _ in sorted_cats[:8]}
+    return {
+        "total_minutes": total_minutes,
+        "days_tracked": days_tracked,
+        "daily_average": daily_average,
+        "active_categories": active_categories,
+    }
 
-    # Group by date
-    daily: dict[str, dict] = {}
-    for row in rows:
-        date = row.date
-        if date not in daily:
-            daily[date] = {"date": date, "total_minutes": 0, "categories": {}}
 
-        cat_name = row.category_name if row.category_name in top_cats else "Other"
-        mins = int(row.total_mins)
-        daily[date]["total_minutes"] += mins
+async def get_daily_series(db: AsyncSession, filters: dict) -> list[dict]:
+    """Daily time series with per-category breakdown (top 8 + Other)."""
+    cond, params = _filter_sql(filters)
+    # The top 8 categories (ties go to whichever showed up first) and the
+    # folding of everything else into "Other" both happen in SQL, so only
+    # (date, bucket) rows come back. `IS` keeps a NULL-named category matchable.
+    sql = sa_text(f"""
+        WITH filtered AS (
+            SELECT date, category_name, family_color, minutes
+            FROM v_daily_totals
+            WHERE {cond}
+        ),
+        top AS (
+            SELECT category_name, MAX(family_color) AS color, 1 AS is_top
+            FROM filtered
+            GROUP BY category_name
+            ORDER BY SUM(minutes) DESC, MIN(date), category_name
+            LIMIT 8
+        )
+        SELECT f.date,
+               CASE WHEN t.is_top THEN f.category_name ELSE 'Other' END AS bucket,
+               MAX(t.color),
+               SUM(f.minutes)
+        FROM filtered f
+        LEFT JOIN top t ON t.category_name IS f.category_name
+        GROUP BY f.date, bucket
+        ORDER BY f.date, MIN(f.category_name)
+    """)
+    rows = (await db.execute(sql, params)).all()
 
-        if cat_name not in daily[date]["categories"]:
-            color = cat_colors.get(row.category_name) if cat_name != "Other" else None
-            daily[date]["categories"][cat_name] = {"name": cat_name, "minutes": 0, "color": color}
-        daily[date]["categories"][cat_name]["minutes"] += mins
+    daily: dict[str, dict] = {}
+    for date, name, color, mins in rows:
+        day = daily.get(date)
+        if day is None:
+            day = daily[date] = {"date": date, "total_minutes": 0, "categories": []}
+        day["total_minutes"] += mins
+        day["categories"].append({"name": name, "minutes": mins, "color": color})
 
-    return [
-        {
-            "date": d["date"],
-            "total_minutes": d["total_minutes"],
-            "categories": list(d["categories"].values()),
-        }
-        for d in daily.values()
-    ]
+    return list(daily.values())
 
 
 async def get_category_breakdown(db: AsyncSession, filters: dict) -> list[dict]:
     """Category breakdown: total minutes per category per session."""
-    stmt = (
-        select(
-            Category.name,
-            Category.display_name,
-            CategoryFamily.name.label("family_name"),
-            CategoryFamily.color.label("color"),
-            func.sum(Observation.minutes).label("total_minutes"),
-            func.count(func.distinct(DailyRecord.session_id)).label("session_count"),
-            Session.label.label("session_label"),
-            Session.year.label("session_year"),
-            Session.season.label("session_season"),
-        )
-        .select_from(Observation)
-        .join(DailyRecord, Observation.daily_record_id == DailyRecord.id)
-        .join(Category, Observation.category_id == Category.id)
-        .join(Session, DailyRecord.session_id == Session.id)
-        .outerjoin(CategoryFamily, Category.family_id == CategoryFamily.id)
-    )
-    stmt = _apply_filters(stmt, filters)
-    stmt = stmt.group_by(
-        Category.name, Category.display_name,
-        CategoryFamily.name, CategoryFamily.color,
-        Session.id,
-    )
-    stmt = stmt.order_by(func.sum(Observation.minutes).desc())
-
-    result = await db.execute(stmt)
-    rows = result.all()
+    cond, params = _filter_sql(filters, "dr.")
+    # Aggregate by id only; names, family and session labels come from the
+    # in-process lookup cache rather than being joined into every call.
+    sql = sa_text(f"""
+        SELECT dr.session_id, o.category_id, SUM(o.minutes)
+        FROM observations o
+        JOIN daily_records dr ON o.daily_record_id = dr.id
+        WHERE {cond}
+        GROUP BY dr.session_id, o.category_id
+    """)
+    rows = (await db.execute(sql, params)).all()
+    cat_labels = await get_category_labels(db)
+    session_labels = await get_session_labels(db)
+
+    # Same-named categories within one session's rows still fold together.
+    totals: dict[tuple, int] = defaultdict(int)
+    for session_id, category_id, minutes in rows:
+        label = cat_labels.get(category_id)
+        if label is None or session_id not in session_labels:
+            continue
+        totals[(label, session_id)] += minutes
 
     return [
         {
-            "name": row.name,
-            "display_name": row.display_name,
-            "family_name": row.family_name,
-            "color": row.color,
-            "total_minutes": int(row.total_minutes),
-            "session_count": int(row.session_count),
-            "session_label": row.session_label or f"{row.session_season} {row.session_year}",
+            "name": label.name,
+            "display_name": label.display_name,
+            "family_name": label.family_name,
+            "color": label.color,
+            "total_minutes": total_minutes,
+            "session_count": 1,  # one row per (category, session)
+            "session_label": session_labels[session_id],
         }
-        for row in rows
+        for (label, session_id), total_minutes in sorted(
+            totals.items(), key=lambda item: (-item[1], item[0][0].name, item[0][1])
+        )
     ]
 
 
 async def get_heatmap(db: AsyncSession, filters: dict) -> list[dict]:
     """Heatmap data: date + day_of_week + total_minutes."""
-    stmt = select(DailyRecord.date, DailyRecord.total_minutes)
-    stmt = _apply_filters(stmt, filters)
-    stmt = stmt.order_by(DailyRecord.date)
-
-    result = await db.execute(stmt)
-    rows = result.all()
-
-    points = []
-    for row in rows:
-        # Parse date string to get day_of_week (0=Mon, 6=Sun)
-        # Dates are stored as YYYY-MM-DD
-        from datetime import date as dt_date
-        parts = row.date.split("-")
-        d = dt_date(int(parts[0]), int(parts[1]), int(parts[2]))
-        points.append({
-            "date": row.date,
-            "day_of_week": d.weekday(),  # 0=Mon, 6=Sun
-            "total_minutes": int(row.total_minutes),
-        })
+    cond, params = _filter_sql(filters)
+    # strftime('%w') counts from Sunday=0; shift to Python's weekday() (Mon=0).
+    sql = sa_text(f"""
+        SELECT date, (CAST(strftime('%w', date) AS INTEGER) + 6) % 7, total_minutes
+        FROM daily_records
+        WHERE {cond}
+        ORDER BY date
+    """)
+    rows = (await db.execute(sql, params)).all()
 
-    return points
+    return [
+        {"date": date, "day_of_week": day_of_week, "total_minutes": total_minutes}
+        for date, day_of_week, total_minutes in rows
+    ]
 
 
 async def get_session_comparison(db: AsyncSession) -> list[dict]:
     """Per-session stats with family-based composition."""
-    # Get sessions with aggregates
-    stmt = (
-        select(
-            Session.id,
-            Session.label,
-            Session.year,
-            Session.season,
-            func.coalesce(func.sum(DailyRecord.total_minutes), 0).label("total_minutes"),
-            func.count(DailyRecord.id).label("days_logged"),
-        )
-        .outerjoin(DailyRecord, DailyRecord.session_id == Session.id)
-        .group_by(Session.id)
-        .order_by(Session.year, Session.season)
-    )
-    result = await db.execute(stmt)
-    sessions = result.all()
-
-    # Preload all families for color/display_name lookup
-    fam_result = await db.execute(select(CategoryFamily))
-    all_families = {f.id: f for f in fam_result.scalars().all()}
+    # Session totals are the trigger-maintained rollup columns.
+    sessions = (await db.execute(sa_text("""
+        SELECT id, label, year, season, total_minutes, days_logged
+        FROM sessions
+        ORDER BY year, season
+    """))).all()
+
+    # Per-family minutes come pre-aggregated from mv_family_totals; only the
+    # family-less remainder ("Other") still needs a pass over observations.
+    # Both arrive in one round-trip, bucketed by session below.
+    groups_by_session: dict[int, list[dict]] = defaultdict(list)
+    group_rows = await db.execute(sa_text("""
+        SELECT mv.session_id, COALESCE(cf.display_name, cf.name), mv.total_minutes, cf.color
+        FROM mv_family_totals mv
+        JOIN category_families cf ON mv.family_id = cf.id
+        UNION ALL
+        SELECT dr.session_id, 'Other', SUM(o.minutes), NULL
+        FROM observations o
+        JOIN categories c ON o.category_id = c.id
+        JOIN daily_records dr ON o.daily_record_id = dr.id
+        WHERE c.family_id IS NULL
+        GROUP BY dr.session_id
+    """))
+    for session_id, name, minutes, color in group_rows:
+        groups_by_session[session_id].append({"name": name, "minutes": minutes, "color": color})
 
     out = []
-    for s in sessions:
-        # Get per-family minutes for this session
-        fam_stmt = (
-            select(
-                Category.family_id,
-                func.sum(Observation.minutes).label("minutes"),
-            )
-            .select_from(Observation)
-            .join(DailyRecord, Observation.daily_record_id == DailyRecord.id)
-            .join(Category, Observation.category_id == Category.id)
-            .where(DailyRecord.session_id == s.id)
-            .group_by(Category.family_id)
-        )
-        fam_result_rows = await db.execute(fam_stmt)
-
-        groups = []
-        for r in fam_result_rows.all():
-            mins = int(r.minutes)
-            fid = r.family_id
-            if fid is not None and fid in all_families:
-                f = all_families[fid]
-                groups.append({
-                    "name": f.display_name or f.name,
-                    "minutes": mins,
-                    "color": f.color,
-                })
-            else:
-                groups.append({"name": "Other", "minutes": mins, "color": None})
-
+    for session_id, label, year, season, total_minutes, days_logged in sessions:
+        groups = groups_by_session.get(session_id, [])
         # Sort by minutes descending
         groups.sort(key=lambda g: g["minutes"], reverse=True)
 
         out.append({
-            "session_id": s.id,
-            "label": s.label or f"{s.season} {s.year}",
-            "year": s.year,
-            "season": s.season,
-            "total_minutes": int(s.total_minutes),
-            "days_logged": int(s.days_logged),
+            "session_id": session_id,
+            "label": label or f"{season} {year}",
+            "year": year,
+            "season": season,
+            "total_minutes": total_minutes,
+            "days_logged": days_logged,
             "groups": groups,
         })
 
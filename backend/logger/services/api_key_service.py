@@ -1,25 +1,52 @@
 """Simple obfuscation (XOR + base64) for storing the API key in the settings table."""
 
 import base64
+import functools
 import hashlib
 import socket
 
+import anthropic
 from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from logger.models import Setting
+from logger.utils.ttl_cache import TTLCache, clear_on_orm_writes
 
 SETTINGS_KEY = "anthropic_api_key"
 
+# One AsyncAnthropic per key, shared across requests so its HTTP connection
+# pool (and TLS sessions) are reused. Only the current key is ever kept.
+_clients: dict[str, anthropic.AsyncAnthropic] = {}
 
+# The stored (obfuscated) value is read on every chat/describe request but only
+# written by save_api_key and the delete endpoint. Any ORM write to settings
+# clears it, and init_db clears it after a DB file swap. The deobfuscated key
+# is kept alongside it so repeat get_api_key calls skip the decode as well.
+_api_key_cache = TTLCache(ttl=None, maxsize=2)
+_NO_KEY = object()  # caches "no key stored" too
+
+
+def invalidate_api_key() -> None:
+    _api_key_cache.clear()
+
+
+clear_on_orm_writes(invalidate_api_key, Setting)
+
+
+@functools.cache
 def _derive_key() -> bytes:
-    """Derive a repeatable obfuscation key from the hostname."""
+    """Derive a repeatable obfuscation key from the hostname (computed once)."""
     hostname = socket.gethostname()
     return hashlib.sha256(hostname.encode()).digest()
 
 
 def _xor_bytes(data: bytes, key: bytes) -> bytes:
-    return bytes(b ^ key[i % len(key)] for i, b in enumerate(data))
+    # XOR against the key repeated to len(data), as one big-int operation
+    # instead of a per-byte Python loop.
+    n = len(data)
+    stream = (key * (n // len(key) + 1))[:n]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(stream, "big")).to_bytes(n, "big")
 
 
 def _obfuscate(api_key: str) -> str:
@@ -37,28 +64,55 @@ def _deobfuscate(stored: str) -> str:
 async def save_api_key(api_key: str, db: AsyncSession) -> None:
     """Obfuscate and upsert the API key into settings."""
     obfuscated = _obfuscate(api_key)
-    result = await db.execute(select(Setting).where(Setting.key == SETTINGS_KEY))
-    setting = result.scalar_one_or_none()
-    if setting:
-        setting.value = obfuscated
-    else:
-        db.add(Setting(key=SETTINGS_KEY, value=obfuscated))
+    await db.execute(
+        sqlite_insert(Setting)
+        .values(key=SETTINGS_KEY, value=obfuscated)
+        .on_conflict_do_update(index_elements=["key"], set_={"value": obfuscated})
+    )
     await db.commit()
+    clear_clients()
+
+
+async def _stored_api_key(db: AsyncSession) -> str | None:
+    cached = _api_key_cache.get("value")
+    if cached is None:
+        result = await db.execute(select(Setting.value).where(Setting.key == SETTINGS_KEY))
+        stored = result.scalar_one_or_none()
+        _api_key_cache.set("value", _NO_KEY if stored is None else stored)
+        return stored
+    return None if cached is _NO_KEY else cached
 
 
 async def get_api_key(db: AsyncSession) -> str | None:
     """Deobfuscate and return the stored API key, or None."""
-    result = await db.execute(select(Setting).where(Setting.key == SETTINGS_KEY))
-    setting = result.scalar_one_or_none()
-    if not setting:
-        return None
-    try:
-        return _deobfuscate(setting.value)
-    except Exception:
-        return None
+    cached = _api_key_cache.get("plain")
+    if cached is not None:
+        return None if cached is _NO_KEY else cached
+    stored = await _stored_api_key(db)
+    plain = None
+    if stored is not None:
+        try:
+            plain = _deobfuscate(stored)
+        except Exception:
+            pass
+    _api_key_cache.set("plain", _NO_KEY if plain is None else plain)
+    return plain
 
 
 async def has_api_key(db: AsyncSession) -> bool:
     """Check whether an API key is stored."""
-    result = await db.execute(select(Setting).where(Setting.key == SETTINGS_KEY))
-    return result.scalar_one_or_none() is not None
+    return await _stored_api_key(db) is not None
+
+
+def get_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """Return the shared client for `api_key`, creating it on first use."""
+    client = _clients.get(api_key)
+    if client is None:
+        _clients.clear()
+        client = _clients[api_key] = anthropic.AsyncAnthropic(api_key=api_key)
+    return client
+
+
+def clear_clients() -> None:
+    """Drop cached clients (call when the stored key changes or is removed)."""
+    _clients.clear()
@@ -5,6 +5,7 @@ Session info comes from the filename, not from column name suffixes.
 This module just generates stable merge keys for grouping.
 """
 
+import functools
 import re
 from dataclasses import dataclass, field
 
@@ -20,11 +21,13 @@ class MergePlan:
 _COURSE_RE = re.compile(r"^([a-zA-Z]+)\s*(\d+[a-zA-Z]?)$")
 
 
+@functools.lru_cache(maxsize=2048)
 def normalize_category(raw_name: str) -> tuple[str, str]:
     """Normalize a CSV category column name.
 
     CSV columns are already clean display names. This just creates
     a stable lowercase merge_key and preserves the display_name.
+    Memoized: the same column names recur across every imported file.
 
     Returns (merge_key, display_name).
     """
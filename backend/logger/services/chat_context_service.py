@@ -2,15 +2,24 @@
 
 from __future__ import annotations
 
+import asyncio
+
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from logger.database import async_session
 from logger.models import (
     Session, Category, CategoryFamily, DailyRecord, Observation, TextEntry,
 )
 from logger.services.chat_query_service import ParsedQuery
 
 
+async def _fetch_rows(stmt) -> list:
+    """Run `stmt` on its own session, so independent reads can overlap."""
+    async with async_session() as db:
+        return (await db.execute(stmt)).all()
+
+
 async def build_context(parsed: ParsedQuery, db: AsyncSession) -> dict:
     """
     Takes a ParsedQuery + db, returns:
@@ -103,12 +112,9 @@ async def build_context(parsed: ParsedQuery, db: AsyncSession) -> dict:
         Session.label, Session.year, Session.season,
     ).order_by(func.sum(Observation.minutes).desc())
 
-    cat_result = await db.execute(cat_stmt)
-    cat_rows = cat_result.all()
-
     # ── 3. Fetch text entries ──
     text_stmt = (
-        select(TextEntry)
+        select(TextEntry.date, TextEntry.notes, TextEntry.study_materials, TextEntry.location)
         .where(TextEntry.session_id.in_(session_ids))
         .order_by(TextEntry.date)
     )
@@ -117,9 +123,6 @@ async def build_context(parsed: ParsedQuery, db: AsyncSession) -> dict:
     if parsed.date_range[1]:
         text_stmt = text_stmt.where(TextEntry.date <= parsed.date_range[1])
 
-    text_result = await db.execute(text_stmt)
-    text_entries = text_result.scalars().all()
-
     # ── 4. Build date range info ──
     date_stmt = (
         select(
@@ -133,9 +136,12 @@ async def build_context(parsed: ParsedQuery, db: AsyncSession) -> dict:
     if parsed.date_range[1]:
         date_stmt = date_stmt.where(DailyRecord.date <= parsed.date_range[1])
 
-    date_result = await db.execute(date_stmt)
-    date_row = date_result.one()
-    actual_date_range = [date_row.min_date, date_row.max_date]
+    # The three reads only depend on session_ids, so they run concurrently,
+    # each on its own pooled connection.
+    cat_rows, text_entries, date_rows = await asyncio.gather(
+        _fetch_rows(cat_stmt), _fetch_rows(text_stmt), _fetch_rows(date_stmt),
+    )
+    actual_date_range = [date_rows[0].min_date, date_rows[0].max_date]
 
     # ── 5. Format as markdown ──
     categories_included: list[str] = []
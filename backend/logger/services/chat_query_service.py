@@ -4,11 +4,11 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass, field
+from datetime import date, timedelta
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from logger.models import CategoryFamily
+from logger.services.family_service import FamilyLabel, get_family_labels
 
 
 SEASON_MAP: dict[str, str] = {
@@ -18,6 +18,16 @@ SEASON_MAP: dict[str, str] = {
     "summer": "summer", "u": "summer",
 }
 
+# Compiled once at import rather than per parsed message. Single-letter
+# season abbreviations are too ambiguous to match in free text.
+_YEAR_RE = re.compile(r"\b(20\d{2})\b")
+_SEASON_PATTERNS: list[tuple[re.Pattern, str]] = [
+    (re.compile(rf"\b{re.escape(word)}\b"), canonical)
+    for word, canonical in SEASON_MAP.items()
+    if len(word) > 1
+]
+_LAST_N_MONTHS_RE = re.compile(r"(?:last|past)\s+(\d+)\s+months?")
+
 QUERY_TYPE_KEYWORDS: dict[str, list[str]] = {
     "comparison": ["compare", "comparison", "versus", "vs", "difference between", "differences"],
     "trend": ["trend", "over time", "progression", "growth", "change", "evolve"],
@@ -26,6 +36,28 @@ QUERY_TYPE_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+# Family-name patterns, compiled once per cached label map (i.e. rebuilt only
+# after a family write): one alternation that rules out most messages in a
+# single scan, plus a pattern per name. Names can share a prefix ("cse",
+# "cse 257"), and one alternation reports only one of them per position, so
+# the per-name patterns decide which families are actually mentioned.
+_family_patterns: tuple[dict[int, FamilyLabel], re.Pattern | None, list[tuple[str, re.Pattern]]] | None = None
+
+
+def _family_regexes(
+    labels: dict[int, FamilyLabel],
+) -> tuple[re.Pattern | None, list[tuple[str, re.Pattern]]]:
+    global _family_patterns
+    if _family_patterns is None or _family_patterns[0] is not labels:
+        names = [label.name for label in labels.values()]
+        any_name = (
+            re.compile(rf"\b(?:{'|'.join(map(re.escape, names))})\b") if names else None
+        )
+        per_name = [(name, re.compile(rf"\b{re.escape(name)}\b")) for name in names]
+        _family_patterns = (labels, any_name, per_name)
+    return _family_patterns[1], _family_patterns[2]
+
+
 @dataclass
 class SessionFilter:
     year: int | None = None
@@ -48,15 +80,12 @@ async def parse_query(query: str, db: AsyncSession) -> ParsedQuery:
     parsed = ParsedQuery(raw_query=query)
 
     # ── Extract years ──
-    years = [int(m) for m in re.findall(r"\b(20\d{2})\b", q)]
+    years = [int(m) for m in _YEAR_RE.findall(q)]
 
     # ── Extract seasons ──
     seasons: list[str] = []
-    for word, canonical in SEASON_MAP.items():
-        # Match whole words only for short abbreviations
-        if len(word) <= 1:
-            continue
-        if re.search(rf"\b{re.escape(word)}\b", q):
+    for pattern, canonical in _SEASON_PATTERNS:
+        if pattern.search(q):
             if canonical not in seasons:
                 seasons.append(canonical)
 
@@ -73,11 +102,10 @@ async def parse_query(query: str, db: AsyncSession) -> ParsedQuery:
             parsed.session_filters.append(SessionFilter(season=season))
 
     # ── Extract family keywords ──
-    result = await db.execute(select(CategoryFamily.name))
-    family_names = [row[0] for row in result.all()]
-    for fname in family_names:
-        if re.search(rf"\b{re.escape(fname)}\b", q):
-            parsed.family_keywords.append(fname)
+    labels = await get_family_labels(db)
+    any_name, per_name = _family_regexes(labels)
+    if any_name is not None and any_name.search(q):
+        parsed.family_keywords = [name for name, pattern in per_name if pattern.search(q)]
 
     # ── Determine query type ──
     for qtype, keywords in QUERY_TYPE_KEYWORDS.items():
@@ -93,22 +121,19 @@ async def parse_query(query: str, db: AsyncSession) -> ParsedQuery:
     if "all time" in q or "all-time" in q or "ever" in q:
         parsed.mentions_all_time = True
 
-    month_match = re.search(r"(?:last|past)\s+(\d+)\s+months?", q)
+    month_match = _LAST_N_MONTHS_RE.search(q)
     if month_match:
-        from datetime import date, timedelta
         n = int(month_match.group(1))
         today = date.today()
         start = today - timedelta(days=n * 30)
         parsed.date_range = (start.isoformat(), today.isoformat())
     elif "last month" in q:
-        from datetime import date, timedelta
         today = date.today()
         start = today.replace(day=1) - timedelta(days=1)
         start = start.replace(day=1)
         end = today.replace(day=1) - timedelta(days=1)
         parsed.date_range = (start.isoformat(), end.isoformat())
     elif "last week" in q:
-        from datetime import date, timedelta
         today = date.today()
         start = today - timedelta(days=7)
         parsed.date_range = (start.isoformat(), today.isoformat())
@@ -20,9 +20,11 @@ import re
 from dataclasses import dataclass, field
 
 from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from logger.models import CategoryFamily, FamilyMatchRule
+from logger.utils.ttl_cache import TTLCache, clear_on_orm_writes
 
 COURSE_PREFIX = re.compile(r"^([a-zA-Z]+)\s+\d")
 
@@ -207,6 +209,12 @@ def detect_family(category_name: str, rules: LoadedRules) -> int | None:
     if name_lower in rules.exact:
         return rules.exact[name_lower]
 
+    # Common "<dept> <num>" shape, split without touching the regex engine;
+    # anything else (tabs, repeated spaces, ...) falls through to COURSE_PREFIX.
+    head, sep, tail = name_lower.partition(" ")
+    if sep and tail[:1].isdecimal() and head.isascii() and head.isalpha():
+        return rules.prefix.get(head)
+
     m = COURSE_PREFIX.match(name_lower)
     if m:
         dept = m.group(1)
@@ -229,6 +237,45 @@ async def get_family_by_id(family_id: int, db: AsyncSession) -> CategoryFamily |
     return await db.get(CategoryFamily, family_id)
 
 
+# ── In-process label cache ────────────────────────────────────────────────
+#
+# Families are a few dozen rows that are read on every session render and
+# almost never written, so their labels are kept in memory. Every write goes
+# through the ORM, so any flush touching a CategoryFamily drops the cache.
+# init_db() also clears it (the DB file may have been swapped).
+
+@dataclass(frozen=True)
+class FamilyLabel:
+    name: str
+    display_name: str | None
+    family_type: str | None
+
+
+# Holds the whole label map under one key until a family write clears it. An
+# empty map (no families yet) is cached too, rather than re-queried each call.
+_family_label_cache = TTLCache(ttl=None, maxsize=1)
+
+
+async def get_family_labels(db: AsyncSession) -> dict[int, FamilyLabel]:
+    """family_id → FamilyLabel for every family, loaded once and reused."""
+    labels = _family_label_cache.get("labels")
+    if labels is None:
+        result = await db.execute(
+            select(CategoryFamily.id, CategoryFamily.name,
+                   CategoryFamily.display_name, CategoryFamily.family_type)
+        )
+        labels = {fid: FamilyLabel(name, display, ftype) for fid, name, display, ftype in result.all()}
+        _family_label_cache.set("labels", labels)
+    return labels
+
+
+def invalidate_family_cache() -> None:
+    _family_label_cache.clear()
+
+
+clear_on_orm_writes(invalidate_family_cache, CategoryFamily)
+
+
 async def get_or_create_family_by_name(
     name: str, db: AsyncSession, *, display_name: str | None = None, family_type: str = "other"
 ) -> CategoryFamily:
@@ -239,16 +286,43 @@ async def get_or_create_family_by_name(
     user can add rules via /api/family-rules afterwards.
     """
     result = await db.execute(
-        select(CategoryFamily).where(CategoryFamily.name == name.lower())
+        sqlite_insert(CategoryFamily)
+        .values(
+            name=name.lower(),
+            display_name=display_name or name.title(),
+            family_type=family_type,
+        )
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(CategoryFamily)
     )
     family = result.scalar_one_or_none()
     if family:
         return family
-    family = CategoryFamily(
-        name=name.lower(),
-        display_name=display_name or name.title(),
-        family_type=family_type,
+    result = await db.execute(
+        select(CategoryFamily).where(CategoryFamily.name == name.lower())
+    )
+    return result.scalar_one()
+
+
+async def get_or_create_family_ids(names: list[str], db: AsyncSession) -> dict[str, int]:
+    """Batch form of get_or_create_family_by_name: lowercased name → family id.
+
+    One executemany INSERT ... ON CONFLICT DO NOTHING for the missing
+    families (a single cached statement whatever the row count, unlike a
+    multi-row VALUES), then one SELECT for all of their ids.
+    """
+    new_rows: dict[str, dict] = {}
+    for name in names:
+        new_rows.setdefault(name.lower(), {
+            "name": name.lower(), "display_name": name.title(), "family_type": "other",
+        })
+    if not new_rows:
+        return {}
+    await db.execute(
+        sqlite_insert(CategoryFamily).on_conflict_do_nothing(index_elements=["name"]),
+        list(new_rows.values()),
+    )
+    result = await db.execute(
+        select(CategoryFamily.name, CategoryFamily.id).where(CategoryFamily.name.in_(new_rows))
     )
-    db.add(family)
-    await db.flush()
-    return family
+    return dict(result.all())
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Iterable
 from datetime import datetime, timedelta, timezone
 
 import httpx
@@ -14,6 +15,24 @@ from logger.models import GitHubRepoCache, GitHubRepoLink, Setting
 GITHUB_API = "https://api.github.com"
 CACHE_TTL = timedelta(hours=1)
 
+# One HTTP client for all GitHub calls so its keep-alive connections (and
+# TLS sessions) are reused across requests; closed on app shutdown.
+_client: httpx.AsyncClient | None = None
+
+
+def _http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 async def get_github_username(db: AsyncSession) -> str | None:
     result = await db.execute(
@@ -95,86 +114,86 @@ async def fetch_user_repos(username: str, db: AsyncSession) -> list[dict]:
     # Fetch fresh from GitHub
     all_repos: list[dict] = []
     page = 1
-    async with httpx.AsyncClient() as client:
-        while True:
-            # With token: use /user/repos for private access; without: /users/{}/repos
-            if token:
-                url = f"{GITHUB_API}/user/repos"
-                params = {
-                    "per_page": 100,
-                    "sort": "updated",
-                    "page": page,
-                    "affiliation": "owner,collaborator",
-                }
-            else:
-                url = f"{GITHUB_API}/users/{username}/repos"
-                params = {"per_page": 100, "sort": "updated", "page": page}
+    client = _http_client()
+    while True:
+        # With token: use /user/repos for private access; without: /users/{}/repos
+        if token:
+            url = f"{GITHUB_API}/user/repos"
+            params = {
+                "per_page": 100,
+                "sort": "updated",
+                "page": page,
+                "affiliation": "owner,collaborator",
+            }
+        else:
+            url = f"{GITHUB_API}/users/{username}/repos"
+            params = {"per_page": 100, "sort": "updated", "page": page}
 
+        resp = await client.get(
+            url,
+            params=params,
+            headers=_auth_headers(token),
+            timeout=15.0,
+        )
+        # If token auth fails, fall back to unauthenticated
+        if resp.status_code == 401 and token:
+            token = None
+            url = f"{GITHUB_API}/users/{username}/repos"
+            params = {"per_page": 100, "sort": "updated", "page": page}
             resp = await client.get(
                 url,
                 params=params,
-                headers=_auth_headers(token),
+                headers=_auth_headers(None),
                 timeout=15.0,
             )
-            # If token auth fails, fall back to unauthenticated
-            if resp.status_code == 401 and token:
-                token = None
-                url = f"{GITHUB_API}/users/{username}/repos"
-                params = {"per_page": 100, "sort": "updated", "page": page}
-                resp = await client.get(
-                    url,
-                    params=params,
-                    headers=_auth_headers(None),
-                    timeout=15.0,
+        if resp.status_code != 200:
+            if cached_repos:
+                return [_repo_to_dict(r) for r in cached_repos]
+            return []
+
+        batch = resp.json()
+        if not batch:
+            break
+        all_repos.extend(batch)
+        if len(batch) < 100:
+            break
+        page += 1
+        if page > 3:  # cap at 300 repos
+            break
+
+    # Supplement with repos from push events (catches org repos you contribute to)
+    if token:
+        seen_names = {r["full_name"] for r in all_repos}
+        try:
+            for pg in range(1, 4):
+                ev_resp = await client.get(
+                    f"{GITHUB_API}/users/{username}/events",
+                    params={"per_page": 100, "page": pg},
+                    headers=_auth_headers(token),
+                    timeout=10.0,
                 )
-            if resp.status_code != 200:
-                if cached_repos:
-                    return [_repo_to_dict(r) for r in cached_repos]
-                return []
-
-            batch = resp.json()
-            if not batch:
-                break
-            all_repos.extend(batch)
-            if len(batch) < 100:
-                break
-            page += 1
-            if page > 3:  # cap at 300 repos
-                break
-
-        # Supplement with repos from push events (catches org repos you contribute to)
-        if token:
-            seen_names = {r["full_name"] for r in all_repos}
-            try:
-                for pg in range(1, 4):
-                    ev_resp = await client.get(
-                        f"{GITHUB_API}/users/{username}/events",
-                        params={"per_page": 100, "page": pg},
+                if ev_resp.status_code != 200:
+                    break
+                events = ev_resp.json()
+                if not events:
+                    break
+                for ev in events:
+                    if ev.get("type") != "PushEvent":
+                        continue
+                    repo_name = ev.get("repo", {}).get("name")
+                    if not repo_name or repo_name in seen_names:
+                        continue
+                    seen_names.add(repo_name)
+                    # Fetch full repo info
+                    repo_resp = await client.get(
+                        f"{GITHUB_API}/repos/{repo_name}",
                         headers=_auth_headers(token),
                         timeout=10.0,
                     )
-                    if ev_resp.status_code != 200:
-                        break
-                    events = ev_resp.json()
-                    if not events:
-                        break
-                    for ev in events:
-                        if ev.get("type") != "PushEvent":
-                            continue
-                        repo_name = ev.get("repo", {}).get("name")
-                        if not repo_name or repo_name in seen_names:
-                            continue
-                        seen_names.add(repo_name)
-                        # Fetch full repo info
-                        repo_resp = await client.get(
-                            f"{GITHUB_API}/repos/{repo_name}",
-                            headers=_auth_headers(token),
-                            timeout=10.0,
-                        )
-                        if repo_resp.status_code == 200:
-                            all_repos.append(repo_resp.json())
-            except httpx.TimeoutException:
-                pass  # best-effort
+                    if repo_resp.status_code == 200:
+                        all_repos.append(repo_resp.json())
+        except httpx.TimeoutException:
+            pass  # best-effort
 
     # Clear old cache for this user
     await db.execute(
@@ -222,36 +241,36 @@ async def fetch_repo_details(
     readme_text = None
     commits_list: list[dict] = []
 
-    async with httpx.AsyncClient() as client:
-        # Fetch README
-        headers = _auth_headers(token)
-        headers["Accept"] = "application/vnd.github.v3.raw"
-        readme_resp = await client.get(
-            f"{GITHUB_API}/repos/{repo_full_name}/readme",
-            headers=headers,
-            timeout=10.0,
-        )
-        if readme_resp.status_code == 200:
-            readme_text = readme_resp.text[:1500]
-
-        # Fetch recent commits
-        commits_resp = await client.get(
-            f"{GITHUB_API}/repos/{repo_full_name}/commits",
-            params={"per_page": 15},
-            headers=_auth_headers(token),
-            timeout=10.0,
-        )
-        if commits_resp.status_code == 200:
-            for c in commits_resp.json():
-                commits_list.append(
-                    {
-                        "sha": c["sha"][:7],
-                        "message": (c.get("commit", {}).get("message", "") or "")[:120],
-                        "date": c.get("commit", {})
-                        .get("author", {})
-                        .get("date", ""),
-                    }
-                )
+    client = _http_client()
+    # Fetch README
+    headers = _auth_headers(token)
+    headers["Accept"] = "application/vnd.github.v3.raw"
+    readme_resp = await client.get(
+        f"{GITHUB_API}/repos/{repo_full_name}/readme",
+        headers=headers,
+        timeout=10.0,
+    )
+    if readme_resp.status_code == 200:
+        readme_text = readme_resp.text[:1500]
+
+    # Fetch recent commits
+    commits_resp = await client.get(
+        f"{GITHUB_API}/repos/{repo_full_name}/commits",
+        params={"per_page": 15},
+        headers=_auth_headers(token),
+        timeout=10.0,
+    )
+    if commits_resp.status_code == 200:
+        for c in commits_resp.json():
+            commits_list.append(
+                {
+                    "sha": c["sha"][:7],
+                    "message": (c.get("commit", {}).get("message", "") or "")[:120],
+                    "date": c.get("commit", {})
+                    .get("author", {})
+                    .get("date", ""),
+                }
+            )
 
     # Update cache entry if it exists
     result = await db.execute(
@@ -347,19 +366,7 @@ async def auto_match_repos(
     return matches
 
 
-async def get_cached_repo_info(
-    repo_full_name: str, db: AsyncSession
-) -> dict | None:
-    """Get cached info for a repo."""
-    result = await db.execute(
-        select(GitHubRepoCache).where(
-            GitHubRepoCache.repo_full_name == repo_full_name
-        )
-    )
-    repo = result.scalar_one_or_none()
-    if not repo:
-        return None
-
+def _repo_info(repo: GitHubRepoCache) -> dict:
     commits = []
     if repo.recent_commits:
         try:
@@ -376,4 +383,39 @@ async def get_cached_repo_info(
         "html_url": repo.html_url,
         "readme_excerpt": repo.readme_excerpt,
         "recent_commits": commits,
+        # fetch_repo_details always stores a commit list (possibly empty), so
+        # NULL means README/commits were never fetched for this cache row.
+        # Not part of GitHubRepoInfo; the model ignores it.
+        "details_fetched": repo.recent_commits is not None,
     }
+
+
+async def get_cached_repo_info(
+    repo_full_name: str, db: AsyncSession
+) -> dict | None:
+    """Get cached info for a repo."""
+    result = await db.execute(
+        select(GitHubRepoCache).where(
+            GitHubRepoCache.repo_full_name == repo_full_name
+        )
+    )
+    repo = result.scalar_one_or_none()
+    if not repo:
+        return None
+    return _repo_info(repo)
+
+
+async def get_cached_repo_infos(
+    repo_full_names: Iterable[str], db: AsyncSession
+) -> dict[str, dict]:
+    """Cached info for several repos in one query, keyed by full name.
+
+    Repos without a cache row are simply absent from the result.
+    """
+    names = set(repo_full_names)
+    if not names:
+        return {}
+    result = await db.execute(
+        select(GitHubRepoCache).where(GitHubRepoCache.repo_full_name.in_(names))
+    )
+    return {repo.repo_full_name: _repo_info(repo) for repo in result.scalars()}
@@ -19,7 +19,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from logger.models import (
-    CategoryGroup, Category, CategoryFamily, Observation,
+    CategoryGroup, Category, CategoryFamily,
 )
 
 
@@ -259,23 +259,20 @@ async def promote_multi_session_orphans(db: AsyncSession) -> dict:
 
 async def list_groups(db: AsyncSession) -> list[dict]:
     """Return all groups with family + minute counts."""
+    # One grouped pass over the families' trigger-maintained totals.
     result = await db.execute(
-        select(CategoryGroup).order_by(CategoryGroup.position, CategoryGroup.name)
+        select(
+            CategoryGroup,
+            func.count(CategoryFamily.id),
+            func.coalesce(func.sum(CategoryFamily.total_minutes), 0),
+        )
+        .outerjoin(CategoryFamily, CategoryFamily.group_id == CategoryGroup.id)
+        .group_by(CategoryGroup.id)
+        .order_by(CategoryGroup.position, CategoryGroup.name)
     )
-    groups = result.scalars().all()
 
     out = []
-    for g in groups:
-        fam_count_result = await db.execute(
-            select(func.count(CategoryFamily.id)).where(CategoryFamily.group_id == g.id)
-        )
-        mins_result = await db.execute(
-            select(func.coalesce(func.sum(Observation.minutes), 0))
-            .select_from(Observation)
-            .join(Category, Observation.category_id == Category.id)
-            .join(CategoryFamily, Category.family_id == CategoryFamily.id)
-            .where(CategoryFamily.group_id == g.id)
-        )
+    for g, family_count, total_minutes in result.all():
         out.append({
             "id": g.id,
             "name": g.name,
@@ -284,8 +281,8 @@ async def list_groups(db: AsyncSession) -> list[dict]:
             "color": g.color,
             "position": g.position or 0,
             "is_system": bool(g.is_system),
-            "family_count": fam_count_result.scalar() or 0,
-            "total_minutes": int(mins_result.scalar() or 0),
+            "family_count": family_count,
+            "total_minutes": total_minutes,
         })
     return out
 
@@ -301,25 +298,18 @@ async def get_group(group_id: int, db: AsyncSession) -> dict | None:
     )
     families = fam_result.scalars().all()
 
-    family_data = []
-    for fam in families:
-        mins_result = await db.execute(
-            select(func.coalesce(func.sum(Observation.minutes), 0))
-            .select_from(Observation)
-            .join(Category, Observation.category_id == Category.id)
-            .where(Category.family_id == fam.id)
-        )
-        cat_count_result = await db.execute(
-            select(func.count(Category.id)).where(Category.family_id == fam.id)
-        )
-        family_data.append({
+    # category_count / total_minutes are trigger-maintained rollups
+    family_data = [
+        {
             "id": fam.id,
             "name": fam.name,
             "display_name": fam.display_name,
             "color": fam.color,
-            "category_count": cat_count_result.scalar() or 0,
-            "total_minutes": int(mins_result.scalar() or 0),
-        })
+            "category_count": fam.category_count,
+            "total_minutes": fam.total_minutes,
+        }
+        for fam in families
+    ]
 
     return {
         "id": g.id,
@@ -407,13 +397,6 @@ async def get_bubble_data(db: AsyncSession) -> dict:
     )
     all_cats = cats_result.scalars().all()
 
-    # Minute sums per category id (one query)
-    mins_result = await db.execute(
-        select(Observation.category_id, func.sum(Observation.minutes))
-        .group_by(Observation.category_id)
-    )
-    cat_minutes: dict[int, int] = dict(mins_result.all())
-
     cats_by_family: dict[int, list[Category]] = {}
     cats_orphan: list[Category] = []
     for cat in all_cats:
@@ -430,14 +413,13 @@ async def get_bubble_data(db: AsyncSession) -> dict:
         cats = cats_by_family.get(fam.id, [])
         cat_entries = []
         for cat in cats:
-            mins = int(cat_minutes.get(cat.id, 0) or 0)
             cat_entries.append({
                 "category_id": cat.id,
                 "name": cat.display_name or cat.name,
                 "merge_key": cat.name,
                 "session_id": cat.session_id,
                 "session_label": cat.session.label if cat.session else None,
-                "total_minutes": mins,
+                "total_minutes": cat.total_minutes,
             })
         cat_entries.sort(key=lambda c: -c["total_minutes"])
         return {
@@ -470,7 +452,7 @@ async def get_bubble_data(db: AsyncSession) -> dict:
 
     orphan_entries = []
     for cat in cats_orphan:
-        mins = int(cat_minutes.get(cat.id, 0) or 0)
+        mins = int(cat.total_minutes or 0)
         if mins == 0:
             continue
         orphan_entries.append({
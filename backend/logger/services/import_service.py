@@ -1,20 +1,24 @@
+import asyncio
 import uuid
-from collections import defaultdict
-from datetime import date
+from datetime import date, datetime, timezone
 
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from logger.database import engine
 from logger.models import (
     Session, Category, DailyRecord, Observation, TextEntry, CategoryFamily,
 )
 from logger.services.family_service import (
     detect_family, load_match_rules, LoadedRules,
 )
+from logger.services import analytics_service, totals_cache
 from logger.services.category_normalization import compute_merge_plan
+from logger.services.lookup_cache import invalidate_lookup_cache
+from logger.services.session_service import invalidate_active_session
 from logger.utils.csv_utils import (
-    read_csv_safe, detect_session_from_filename, extract_category_columns,
-    make_session_label,
+    CsvSource, read_csv_safe, read_csv_table, detect_session_from_filename,
+    extract_category_columns, make_session_label,
 )
 from logger.utils.date_utils import parse_date, normalize_day
 
@@ -22,7 +26,9 @@ from logger.utils.date_utils import parse_date, normalize_day
 _preview_cache: dict[str, dict] = {}
 
 
-def _parse_study_csv(rows: list[dict[str, str]], filename: str, rules: LoadedRules) -> dict:
+def _parse_study_csv(
+    headers: list[str], rows: list[list[str]], filename: str, rules: LoadedRules,
+) -> dict:
     """Parse a study CSV into structured data for preview/import."""
     year, season = detect_session_from_filename(filename)
     warnings: list[str] = []
@@ -30,27 +36,43 @@ def _parse_study_csv(rows: list[dict[str, str]], filename: str, rules: LoadedRul
     if not rows:
         raise ValueError("Study CSV is empty")
 
-    headers = list(rows[0].keys())
     cat_columns = extract_category_columns(headers)
 
-    has_week = "week" in {h.lower() for h in headers}
-    has_day = "day" in {h.lower() for h in headers}
+    # Column positions, resolved once. Duplicate headers resolve to the last
+    # occurrence, as they did with DictReader.
+    col_index = {h: i for i, h in enumerate(headers)}
 
-    # Find the actual key names (case-sensitive as in CSV)
-    date_key = next((h for h in headers if h.lower() == "date"), None)
-    day_key = next((h for h in headers if h.lower() == "day"), None) if has_day else None
-    week_key = next((h for h in headers if h.lower() == "week"), None) if has_week else None
-    type_key = next((h for h in headers if h.lower() == "type"), None)
-    total_key = next((h for h in headers if h.lower() == "total"), None)
+    def find_col(name: str) -> int | None:
+        return next((col_index[h] for h in headers if h.lower() == name), None)
 
-    if not date_key:
+    date_idx = find_col("date")
+    day_idx = find_col("day")
+    week_idx = find_col("week")
+
+    if date_idx is None:
         raise ValueError("No 'date' column found in study CSV")
 
+    # Compute merge plan up front: group raw columns by merge_key, and sum
+    # every source column straight into its merge_key's slot per row.
+    merge_plan = compute_merge_plan(cat_columns)
+    merge_keys = list(merge_plan.keys())
+    slot_of = {key: i for i, key in enumerate(merge_keys)}
+    cat_cells = [
+        (col_index[col], slot_of[plan.merge_key])
+        for plan in merge_plan.values()
+        for col in plan.source_columns
+    ]
+    n_cols = len(headers)
+
     # Aggregate by date (handles multi-row-per-date like 2022_fall)
     daily_data: dict[str, dict] = {}
+    day_totals: dict[str, list[int]] = {}
 
     for row in rows:
-        raw_date = row.get(date_key, "").strip()
+        if len(row) < n_cols:
+            row = row + [""] * (n_cols - len(row))
+
+        raw_date = row[date_idx].strip()
         if not raw_date:
             continue
 
@@ -60,23 +82,24 @@ def _parse_study_csv(rows: list[dict[str, str]], filename: str, rules: LoadedRul
             warnings.append(f"Skipped unparseable date: {raw_date}")
             continue
 
-        day_val = normalize_day(row.get(day_key, "")) if day_key else None
+        day_val = normalize_day(row[day_idx]) if day_idx is not None else None
 
         week_val = None
-        if week_key:
-            w = row.get(week_key, "").strip()
+        if week_idx is not None:
+            w = row[week_idx].strip()
             if w and w.lower() not in ("n/a", "na", ""):
                 try:
                     week_val = int(w)
                 except ValueError:
                     pass
 
-        if iso_date not in daily_data:
+        totals = day_totals.get(iso_date)
+        if totals is None:
+            totals = day_totals[iso_date] = [0] * len(merge_keys)
             daily_data[iso_date] = {
                 "date": iso_date,
                 "day_of_week": day_val,
                 "week_number": week_val,
-                "categories": defaultdict(int),
             }
         else:
             # Multi-row: keep first non-None day/week
@@ -85,31 +108,20 @@ def _parse_study_csv(rows: list[dict[str, str]], filename: str, rules: LoadedRul
             if week_val is not None and daily_data[iso_date]["week_number"] is None:
                 daily_data[iso_date]["week_number"] = week_val
 
-        for cat_col in cat_columns:
-            val = row.get(cat_col, "").strip()
-            if val:
+        for idx, slot in cat_cells:
+            val = row[idx]
+            if val and not val.isspace():
                 try:
                     minutes = int(float(val))
-                    if minutes > 0:
-                        # Store by raw column name first; we'll merge below
-                        daily_data[iso_date]["categories"][cat_col] += minutes
-                except (ValueError, TypeError):
-                    pass
-
-    # Compute merge plan: group raw columns by merge_key
-    merge_plan = compute_merge_plan(cat_columns)
+                except ValueError:
+                    continue
+                if minutes > 0:
+                    totals[slot] += minutes
 
-    # Re-aggregate daily_data by merge_key (summing columns that share a key)
-    for date_str, day_data in daily_data.items():
-        raw_cats = day_data["categories"]
-        merged: dict[str, int] = defaultdict(int)
-        for plan in merge_plan.values():
-            total = 0
-            for src_col in plan.source_columns:
-                total += raw_cats.get(src_col, 0)
-            if total > 0:
-                merged[plan.merge_key] = total
-        day_data["categories"] = merged
+    for date_str, totals in day_totals.items():
+        daily_data[date_str]["categories"] = {
+            merge_keys[i]: t for i, t in enumerate(totals) if t > 0
+        }
 
     # Build category previews from merge plan
     cat_previews = []
@@ -202,28 +214,35 @@ def _parse_text_csv(rows: list[dict[str, str]]) -> tuple[list[dict], list[str]]:
     return entries, warnings
 
 
-async def preview_import(
-    study_content: bytes,
+def parse_import_files(
+    study_content: CsvSource,
     study_filename: str,
-    db: AsyncSession,
-    text_content: bytes | None = None,
-    text_filename: str | None = None,
+    rules: LoadedRules,
+    text_content: CsvSource | None = None,
 ) -> dict:
-    """Parse CSVs and return a preview without writing to DB.
+    """Parse a study CSV (and optional text CSV) into the staged preview payload.
 
-    DB is read-only here — we just need it to load match rules for auto-family detection.
+    Pure CPU work; with bytes inputs everything is picklable, so batch
+    imports can run it in a worker process. File objects are streamed
+    through the CSV reader instead of being read into memory first.
     """
-    rules = await load_match_rules(db)
-    study_rows = read_csv_safe(study_content)
-    parsed = _parse_study_csv(study_rows, study_filename, rules)
+    headers, study_rows = read_csv_table(study_content)
+    parsed = _parse_study_csv(headers, study_rows, study_filename, rules)
 
     text_entries: list[dict] = []
-    text_warnings: list[str] = []
-    if text_content:
+    if text_content is not None:
         text_rows = read_csv_safe(text_content)
         text_entries, text_warnings = _parse_text_csv(text_rows)
         parsed["warnings"].extend(text_warnings)
 
+    return {"parsed": parsed, "text_entries": text_entries}
+
+
+def stage_preview(staged: dict, study_filename: str, text_filename: str | None = None) -> dict:
+    """Cache a parse_import_files() result for confirm and return the preview response."""
+    parsed = staged["parsed"]
+    text_entries = staged["text_entries"]
+
     preview_id = str(uuid.uuid4())
     _preview_cache[preview_id] = {
         "parsed": parsed,
@@ -245,6 +264,42 @@ async def preview_import(
     }
 
 
+async def preview_import(
+    study_content: CsvSource,
+    study_filename: str,
+    db: AsyncSession,
+    text_content: CsvSource | None = None,
+    text_filename: str | None = None,
+) -> dict:
+    """Parse CSVs and return a preview without writing to DB.
+
+    DB is read-only here — we just need it to load match rules for auto-family detection.
+    Parsing runs on a worker thread since file inputs are read while parsing.
+    """
+    rules = await load_match_rules(db)
+    staged = await asyncio.to_thread(
+        parse_import_files, study_content, study_filename, rules, text_content,
+    )
+    return stage_preview(staged, study_filename, text_filename)
+
+
+def _utc_now_iso() -> str:
+    """Same format as the models' created_at server default (UTC, ms, 'Z')."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _session_span(parsed: dict) -> tuple[str | None, str | None, bool]:
+    """Return (start_date, end_date, is_active) for a parsed study CSV.
+
+    Auto-detect active: if the date range includes today, mark it active.
+    """
+    today = date.today().isoformat()
+    end_date = parsed["date_range"][1] if len(parsed["date_range"]) > 1 else None
+    start_date = parsed["date_range"][0] if parsed["date_range"] else None
+    is_active = bool(start_date and end_date and start_date <= today <= end_date)
+    return start_date, end_date, is_active
+
+
 async def confirm_import(preview_id: str, db: AsyncSession) -> dict:
     """Write previewed data to the database."""
     cached = _preview_cache.pop(preview_id, None)
@@ -263,11 +318,7 @@ async def confirm_import(preview_id: str, db: AsyncSession) -> dict:
     if existing.scalar_one_or_none():
         raise ValueError(f"Session {season} {year} already exists")
 
-    # Auto-detect active: if date range includes today, mark active
-    today = date.today().isoformat()
-    end_date = parsed["date_range"][1] if len(parsed["date_range"]) > 1 else None
-    start_date = parsed["date_range"][0] if parsed["date_range"] else None
-    is_active = bool(start_date and end_date and start_date <= today <= end_date)
+    start_date, end_date, is_active = _session_span(parsed)
 
     # Create session
     session = Session(
@@ -347,3 +398,125 @@ async def confirm_import(preview_id: str, db: AsyncSession) -> dict:
         "observations_created": total_observations,
         "text_entries_created": len(text_entries),
     }
+
+
+async def bulk_confirm_import(preview_id: str) -> dict:
+    """Write previewed data with one executemany per table, in one transaction.
+
+    Same result as confirm_import, but bypasses the ORM unit of work: rows go
+    straight to the aiosqlite driver connection, so a full-year CSV costs a
+    handful of round-trips instead of one flush per daily record. Used by the
+    offline import_all.py script, where nothing else is touching the DB.
+    """
+    cached = _preview_cache.pop(preview_id, None)
+    if not cached:
+        raise ValueError(f"Preview {preview_id} not found or expired")
+
+    parsed = cached["parsed"]
+    text_entries = cached["text_entries"]
+    year = parsed["year"]
+    season = parsed["season"]
+    start_date, end_date, is_active = _session_span(parsed)
+    daily_items = sorted(parsed["daily_data"].items())
+    # One timestamp for every row in this import, passed explicitly instead
+    # of having SQLite evaluate the created_at default per row.
+    now = _utc_now_iso()
+
+    async with engine.connect() as sa_conn:
+        raw = await sa_conn.get_raw_connection()
+        conn = raw.driver_connection  # aiosqlite.Connection
+        await conn.execute("BEGIN")
+        try:
+            cur = await conn.execute(
+                "SELECT 1 FROM sessions WHERE year = ? AND season = ?", (year, season)
+            )
+            if await cur.fetchone():
+                raise ValueError(f"Session {season} {year} already exists")
+
+            cur = await conn.execute(
+                "INSERT INTO sessions "
+                "(year, season, label, start_date, end_date, is_active, source_file, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (year, season, parsed["label"], start_date, end_date, is_active,
+                 cached["study_filename"], now),
+            )
+            session_id = cur.lastrowid
+
+            await conn.executemany(
+                "INSERT INTO categories (session_id, name, display_name, family_id, position, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        session_id,
+                        cat_info["name"],
+                        cat_info.get("display_name") or cat_info["name"],
+                        cat_info.get("auto_family_id"),
+                        i,
+                        now,
+                    )
+                    for i, cat_info in enumerate(parsed["categories"])
+                ],
+            )
+            cat_ids: dict[str, int] = dict(await conn.execute_fetchall(
+                "SELECT name, id FROM categories WHERE session_id = ?", (session_id,)
+            ))
+
+            await conn.executemany(
+                "INSERT INTO daily_records "
+                "(session_id, date, day_of_week, week_number, total_minutes, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        session_id,
+                        day_data["date"],
+                        day_data["day_of_week"],
+                        day_data["week_number"],
+                        sum(day_data["categories"].values()),
+                        now,
+                    )
+                    for _, day_data in daily_items
+                ],
+            )
+            dr_ids: dict[str, int] = dict(await conn.execute_fetchall(
+                "SELECT date, id FROM daily_records WHERE session_id = ?", (session_id,)
+            ))
+
+            obs_rows = [
+                (dr_ids[day_data["date"]], cat_ids[cat_name], minutes, "import", now)
+                for _, day_data in daily_items
+                for cat_name, minutes in day_data["categories"].items()
+                if minutes > 0 and cat_name in cat_ids
+            ]
+            await conn.executemany(
+                "INSERT INTO observations (daily_record_id, category_id, minutes, source, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                obs_rows,
+            )
+
+            await conn.executemany(
+                "INSERT INTO text_entries "
+                "(session_id, date, location, notes, study_materials, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (session_id, te["date"], te["location"], te["notes"], te["study_materials"], now)
+                    for te in text_entries
+                ],
+            )
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+    # Raw inserts don't go through the ORM flush hooks.
+    analytics_service.invalidate_cache()
+    totals_cache.invalidate_cache()
+    invalidate_lookup_cache()
+    invalidate_active_session()
+
+    return {
+        "session_id": session_id,
+        "session_label": parsed["label"],
+        "categories_created": len(cat_ids),
+        "daily_records_created": len(daily_items),
+        "observations_created": len(obs_rows),
+        "text_entries_created": len(text_entries),
+    }
@@ -0,0 +1,60 @@
+"""In-process category and session labels for analytics.
+
+Categories, families and sessions are a few hundred rows that change far less
+often than the observations aggregated against them, so their labels are
+loaded once and looked up in Python instead of being re-joined into every
+breakdown query. Any ORM write to those tables clears the cache; raw-SQL
+writers (the bulk import) and init_db() call invalidate_lookup_cache().
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from logger.models import Category, CategoryFamily, Session
+from logger.utils.ttl_cache import TTLCache, clear_on_orm_writes
+
+
+@dataclass(frozen=True)
+class CategoryLabel:
+    name: str
+    display_name: str | None
+    family_name: str | None
+    color: str | None
+
+
+_lookup_cache = TTLCache(ttl=None, maxsize=2)
+
+
+def invalidate_lookup_cache() -> None:
+    _lookup_cache.clear()
+
+
+clear_on_orm_writes(invalidate_lookup_cache, Category, CategoryFamily, Session)
+
+
+async def get_category_labels(db: AsyncSession) -> dict[int, CategoryLabel]:
+    """category_id → CategoryLabel (with its family's name/color), cached."""
+    labels = _lookup_cache.get("categories")
+    if labels is None:
+        result = await db.execute(
+            select(Category.id, Category.name, Category.display_name,
+                   CategoryFamily.name, CategoryFamily.color)
+            .outerjoin(CategoryFamily, Category.family_id == CategoryFamily.id)
+        )
+        labels = {cid: CategoryLabel(*rest) for cid, *rest in result.all()}
+        _lookup_cache.set("categories", labels)
+    return labels
+
+
+async def get_session_labels(db: AsyncSession) -> dict[int, str]:
+    """session_id → display label ("fall 2024" when no label is set), cached."""
+    labels = _lookup_cache.get("sessions")
+    if labels is None:
+        result = await db.execute(
+            select(Session.id, func.coalesce(Session.label, Session.season + " " + Session.year))
+        )
+        labels = dict(result.all())
+        _lookup_cache.set("sessions", labels)
+    return labels
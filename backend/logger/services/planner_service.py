@@ -8,6 +8,7 @@ docstring on PlanItem in models.py for the linking semantics.
 
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from logger.models import PlanItem, Category, TimerEntry, ManualEntry
 
@@ -190,8 +191,10 @@ async def get_item_with_links(item_id: int, db: AsyncSession) -> tuple[PlanItem,
 
     timer_result = await db.execute(
         select(TimerEntry).where(TimerEntry.plan_item_id == item_id).order_by(TimerEntry.start_time.desc())
+        .options(selectinload(TimerEntry.category), selectinload(TimerEntry.plan_item))
     )
     manual_result = await db.execute(
         select(ManualEntry).where(ManualEntry.plan_item_id == item_id).order_by(ManualEntry.created_at.desc())
+        .options(selectinload(ManualEntry.category), selectinload(ManualEntry.plan_item))
     )
     return item, progress[item_id], list(timer_result.scalars().all()), list(manual_result.scalars().all())
@@ -0,0 +1,30 @@
+"""Active-session lookup shared by the routers that scope requests to it."""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from logger.models import Session
+from logger.utils.ttl_cache import TTLCache, clear_on_orm_writes
+
+# Almost every timer/manual-entry/daily request starts by resolving the active
+# session, which only changes when a session is activated or (re)imported.
+# Only the id is cached — ORM instances must not outlive their AsyncSession.
+_active_session_cache = TTLCache(ttl=5, maxsize=1)
+_NO_ACTIVE = object()  # caches "no active session" too
+
+
+def invalidate_active_session() -> None:
+    _active_session_cache.clear()
+
+
+clear_on_orm_writes(invalidate_active_session, Session)
+
+
+async def get_active_session_id(db: AsyncSession) -> int | None:
+    """Id of the active session, or None when no session is active."""
+    cached = _active_session_cache.get("id")
+    if cached is None:
+        session_id = await db.scalar(select(Session.id).where(Session.is_active == True).limit(1))
+        _active_session_cache.set("id", _NO_ACTIVE if session_id is None else session_id)
+        return session_id
+    return None if cached is _NO_ACTIVE else cached
@@ -5,6 +5,7 @@ from zoneinfo import ZoneInfo
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from logger.models import Category, PlanItem, Setting, TimerEntry
 from logger.services.observation_service import (
@@ -266,6 +267,9 @@ async def get_active_timers(session_id: int, db: AsyncSession) -> list[TimerEntr
             TimerEntry.session_id == session_id,
             TimerEntry.is_active == True,
         ).order_by(TimerEntry.start_time.desc())
+        # Both are many-to-one: LEFT JOIN them into the same query instead of
+        # a follow-up IN query per relationship.
+        .options(joinedload(TimerEntry.category), joinedload(TimerEntry.plan_item))
     )
     return list(result.scalars().all())
 
@@ -0,0 +1,32 @@
+"""Serialized project-view responses built on v_family_totals, plus the
+table row counts shown by /settings/db-info.
+
+The timeline, group and research views only change when something they read
+is written: logged time, the category/family/group tree, AI descriptions,
+GitHub links or settings. Any ORM write to those tables clears the cache
+(raw-SQL writers call invalidate_cache() themselves); the TTL is a backstop
+for anything that slips past both.
+"""
+
+from logger.models import (
+    AIDescription, Category, CategoryFamily, CategoryGroup, DailyRecord,
+    GitHubRepoCache, GitHubRepoLink, Observation, Session, Setting, TextEntry,
+)
+from logger.utils.ttl_cache import TTLCache, clear_on_orm_writes
+
+response_cache = TTLCache(ttl=30, maxsize=64)
+# (session_count, observation_count, text_entry_count); COUNT(*) scans the
+# whole table, so it's computed at most once per write or TTL window.
+row_count_cache = TTLCache(ttl=30, maxsize=1)
+
+
+def invalidate_cache() -> None:
+    response_cache.clear()
+    row_count_cache.clear()
+
+
+clear_on_orm_writes(
+    invalidate_cache,
+    Session, DailyRecord, Observation, TextEntry, Category, CategoryFamily,
+    CategoryGroup, AIDescription, GitHubRepoLink, GitHubRepoCache, Setting,
+)
@@ -1,15 +1,46 @@
 import csv
 import io
 import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import BinaryIO, TextIO
 
 STRUCTURAL_COLUMNS = {"week", "date", "day", "type", "total"}
 
 
-def read_csv_safe(content: bytes) -> list[dict[str, str]]:
+# CSV input: raw bytes, or a binary file object (an upload's spooled temp
+# file, an open path) that is decoded as it is read rather than all at once.
+CsvSource = bytes | BinaryIO
+
+
+@contextmanager
+def _open_text(source: CsvSource) -> Iterator[TextIO]:
+    if isinstance(source, (bytes, bytearray)):
+        yield io.StringIO(source.decode("utf-8-sig"))
+        return
+    stream = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    try:
+        yield stream
+    finally:
+        stream.detach()  # leave the caller's file open
+
+
+def read_csv_safe(content: CsvSource) -> list[dict[str, str]]:
     """Read CSV content handling BOM and encoding issues."""
-    text = content.decode("utf-8-sig")
-    reader = csv.DictReader(io.StringIO(text))
-    return list(reader)
+    with _open_text(content) as text:
+        return list(csv.DictReader(text))
+
+
+def read_csv_table(content: CsvSource) -> tuple[list[str], list[list[str]]]:
+    """Read CSV content as (headers, rows-as-lists).
+
+    Cheaper than read_csv_safe for wide files: no per-row dict is built, and
+    callers can resolve column positions once up front.
+    """
+    with _open_text(content) as text:
+        reader = csv.reader(text)
+        headers = next(reader, [])
+        return headers, [row for row in reader if row]
 
 
 def detect_session_from_filename(filename: str) -> tuple[int, str]:
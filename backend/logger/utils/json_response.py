@@ -0,0 +1,15 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by pydantic_core's Rust serializer.
+
+    Same compact output as the stdlib-json default, but encoded straight to
+    UTF-8 bytes; noticeably cheaper for the nested session/analytics payloads.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
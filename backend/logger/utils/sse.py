@@ -0,0 +1,79 @@
+"""Server-sent event framing and keepalive for the streaming endpoints."""
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator, AsyncIterable
+
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+
+def sse_event(payload: dict) -> bytes:
+    # pydantic_core's serializer emits UTF-8 bytes directly, skipping the
+    # str round trip StreamingResponse would otherwise encode per frame.
+    return b"data: " + to_json(payload) + b"\n\n"
+
+
+SSE_PING_INTERVAL = 15  # seconds
+SSE_PING = b": ping\n\n"
+
+# no-cache keeps browsers/proxies from caching the stream; X-Accel-Buffering
+# stops nginx from holding frames back until its buffer fills.
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def with_keepalive(
+    events: AsyncGenerator[bytes, None], interval: float = SSE_PING_INTERVAL,
+) -> AsyncGenerator[bytes, None]:
+    """Relay `events`, emitting an SSE comment whenever `interval` seconds pass
+    without one. A single Claude turn can take longer than an idle-proxy
+    timeout; comment lines keep the connection alive and clients ignore them.
+    """
+    step: asyncio.Future | None = None
+    try:
+        while True:
+            step = asyncio.ensure_future(anext(events))
+            while True:
+                done, _ = await asyncio.wait({step}, timeout=interval)
+                if done:
+                    break
+                yield SSE_PING
+            try:
+                yield step.result()
+            except StopAsyncIteration:
+                return
+    finally:
+        # Closed mid-wait (client disconnect): `events` is still running inside
+        # the pending anext() task, so aclose() would fail and leave that task
+        # driving it. Cancel the task, which unwinds `events`, and wait it out.
+        if step is not None and not step.done():
+            step.cancel()
+            await asyncio.wait({step})
+        await events.aclose()
+
+
+async def coalesce_text(
+    deltas: AsyncIterable[str], max_items: int = 8, window: float = 0.025,
+) -> AsyncGenerator[str, None]:
+    """Join streamed text deltas into batches so each SSE frame carries up to
+    `max_items` deltas (or whatever arrived within `window` seconds) instead
+    of one token. A batch is flushed when the next delta arrives past the
+    deadline, and whatever is left is flushed when `deltas` ends.
+    """
+    buffer: list[str] = []
+    deadline = 0.0
+    async for delta in deltas:
+        if not buffer:
+            deadline = time.monotonic() + window
+        buffer.append(delta)
+        if len(buffer) >= max_items or time.monotonic() >= deadline:
+            yield "".join(buffer)
+            buffer.clear()
+    if buffer:
+        yield "".join(buffer)
+
+
+def event_stream(events: AsyncGenerator[bytes, None]) -> StreamingResponse:
+    return StreamingResponse(
+        with_keepalive(events), media_type="text/event-stream", headers=SSE_HEADERS,
+    )
@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+
+class TTLCache:
+    """Small in-process LRU cache with optional per-entry expiry.
+
+    Single-user app, single process: a plain OrderedDict is enough — no
+    locking, no background sweeping. Expired entries are dropped lazily on
+    lookup; the oldest entry is evicted once maxsize is exceeded.
+    ttl=None keeps entries until they're evicted or the cache is cleared.
+    """
+
+    def __init__(self, ttl: float | None, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        self._purge_expired()
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            return default
+        return value
+
+    def _purge_expired(self) -> None:
+        """Drop expired entries from the cold end, so values nobody asks for
+        again are still released without waiting for maxsize eviction."""
+        now = time.monotonic()
+        while self._data:
+            expires_at, _ = next(iter(self._data.values()))
+            if expires_at is None or expires_at > now:
+                break
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def clear_on_orm_writes(clear: Callable[[], None], *models: type) -> None:
+    """Call `clear` whenever the ORM inserts/updates/deletes any of `models`.
+
+    Both flushes of new/dirty/deleted instances and ORM-enabled
+    insert()/update()/delete() statements run through a session count. The
+    clear is repeated when that transaction commits or rolls back, so a value
+    cached from uncommitted state in between doesn't outlive it. Raw SQL
+    writes bypass this and must call `clear` themselves.
+    """
+    flag = f"cache_dirty:{id(clear)}"
+
+    @event.listens_for(OrmSession, "do_orm_execute")
+    def _on_dml(orm_execute_state) -> None:
+        state = orm_execute_state
+        if not (state.is_insert or state.is_update or state.is_delete):
+            return
+        mapper = state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, models):
+            state.session.info[flag] = True
+            clear()
+
+    @event.listens_for(OrmSession, "after_flush")
+    def _on_flush(session, flush_context) -> None:
+        if any(
+            isinstance(obj, models)
+            for obj in (*session.new, *session.dirty, *session.deleted)
+        ):
+            session.info[flag] = True
+            clear()
+
+    @event.listens_for(OrmSession, "after_commit")
+    @event.listens_for(OrmSession, "after_soft_rollback")
+    def _on_txn_end(session, *args) -> None:
+        if session.info.pop(flag, False):
+            clear()
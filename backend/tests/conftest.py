@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database before any logger module is imported.
+os.environ["LOGGER_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="logger-test-"), "logger.db")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    from logger.main import app
+
+    with TestClient(app) as c:
+        yield c
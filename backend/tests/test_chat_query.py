@@ -0,0 +1,16 @@
+from logger.database import async_session
+from logger.services.chat_query_service import parse_query
+
+
+def test_parse_query_keeps_family_names_sharing_a_prefix(client):
+    for name in ("cse", "cse 257", "salk"):
+        client.post("/api/families", json={"name": name})  # 409 if already seeded
+
+    async def parse(q):
+        async with async_session() as db:
+            return await parse_query(q, db)
+
+    parsed = client.portal.call(parse, "how much time on cse 257 and salk?")
+
+    assert {"cse", "cse 257", "salk"} <= set(parsed.family_keywords)
+    assert "cse 257" not in client.portal.call(parse, "how much cse this week").family_keywords
@@ -0,0 +1,22 @@
+def test_bubble_data_includes_orphan_category(client):
+    session = client.post("/api/sessions", json={"year": 2031, "season": "fall"}).json()
+    client.put(f"/api/sessions/{session['id']}", json={"is_active": True})
+    cat = client.post(
+        f"/api/sessions/{session['id']}/categories", json={"name": "Unfiled Odd Thing"},
+    ).json()
+    assert cat["family_id"] is None
+    client.post("/api/manual-entries", json={
+        "category_id": cat["id"], "date": "2031-10-01", "duration_minutes": 25,
+    })
+
+    res = client.get("/api/groups/bubble-data")
+
+    assert res.status_code == 200
+    orphans = [
+        c
+        for group in res.json()["groups"] if group["slug"] == "other"
+        for c in group["ungrouped_categories"]
+    ]
+    assert {"category_id": cat["id"], "total_minutes": 25}.items() <= next(
+        c for c in orphans if c["category_id"] == cat["id"]
+    ).items()
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from logger.utils.sse import SSE_PING, coalesce_text, with_keepalive
+
+
+@pytest.mark.asyncio
+async def test_keepalive_close_mid_wait_cancels_pending_step():
+    state = {"started": False, "finalized": False}
+
+    async def slow_events():
+        try:
+            state["started"] = True
+            await asyncio.sleep(60)
+            yield b"data: never\n\n"
+        finally:
+            state["finalized"] = True
+
+    wrapper = with_keepalive(slow_events(), interval=0.01)
+    assert await anext(wrapper) == SSE_PING
+
+    await wrapper.aclose()
+
+    assert state["started"] and state["finalized"]
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_keepalive_relays_events_and_stops():
+    async def events():
+        yield b"a"
+        await asyncio.sleep(0.03)
+        yield b"b"
+
+    chunks = [chunk async for chunk in with_keepalive(events(), interval=0.01)]
+
+    assert chunks[0] == b"a" and chunks[-1] == b"b"
+    assert set(chunks[1:-1]) == {SSE_PING}
+
+
+@pytest.mark.asyncio
+async def test_describe_stream_disconnect_closes_anthropic_stream(monkeypatch):
+    from logger.routers import projects
+    from logger.schemas import EnrichedDescribeRequest
+
+    state = {"closed": False, "saved": False}
+
+    class FakeStream:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            state["closed"] = True
+
+        @property
+        async def text_stream(self):
+            await asyncio.sleep(60)
+            yield "never"
+
+    class FakeClient:
+        class messages:
+            @staticmethod
+            def stream(**kwargs):
+                return FakeStream()
+
+    async def fake_true(db):
+        return True
+
+    async def fake_prompt(req, db):
+        return "prompt", False
+
+    async def fake_stored(family_id, session_id, db):
+        return None
+
+    async def fake_key(db):
+        return "sk-test"
+
+    async def fake_save(*args):
+        state["saved"] = True
+
+    monkeypatch.setattr(projects, "has_api_key", fake_true)
+    monkeypatch.setattr(projects, "_build_enriched_prompt", fake_prompt)
+    monkeypatch.setattr(projects, "_stored_description", fake_stored)
+    monkeypatch.setattr(projects, "get_api_key", fake_key)
+    monkeypatch.setattr(projects, "get_client", lambda api_key: FakeClient())
+    monkeypatch.setattr(projects, "_save_description", fake_save)
+    monkeypatch.setattr(projects, "event_stream", lambda events: with_keepalive(events, interval=0.01))
+
+    body = await projects.describe_enriched_stream(
+        EnrichedDescribeRequest(family_id=1, session_id=1), db=None,
+    )
+    assert await anext(body) == SSE_PING
+
+    await body.aclose()
+
+    assert state == {"closed": True, "saved": False}
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_coalesce_text_batches_deltas():
+    async def deltas(n, pause=0.0):
+        for i in range(n):
+            if pause:
+                await asyncio.sleep(pause)
+            yield str(i % 10)
+
+    burst = [batch async for batch in coalesce_text(deltas(20), max_items=8, window=60)]
+    assert burst == ["01234567", "89012345", "6789"]
+
+    slow = [batch async for batch in coalesce_text(deltas(3, pause=0.02), max_items=8, window=0.01)]
+    assert "".join(slow) == "012" and len(slow) >= 2
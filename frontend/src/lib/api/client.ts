@@ -470,7 +470,22 @@ function buildAnalyticsQs(filters?: AnalyticsFilters): string {
 
 export const api = {
 	// Sessions
-	getSessions: () => request<{ sessions: SessionResponse[] }>('/sessions'),
+	// /sessions is paginated; page through until every session is loaded so
+	// selectors never silently drop entries past the first page.
+	getSessions: async () => {
+		const limit = 200;
+		const sessions: SessionResponse[] = [];
+		let total = 0;
+		do {
+			const page = await request<{ sessions: SessionResponse[]; total: number }>(
+				`/sessions?limit=${limit}&offset=${sessions.length}`
+			);
+			total = page.total;
+			if (page.sessions.length === 0) break;
+			sessions.push(...page.sessions);
+		} while (sessions.length < total);
+		return { sessions, total };
+	},
 	getSession: (id: number) => request<SessionResponse>(`/sessions/${id}`),
 	getActiveSession: () => request<SessionResponse | null>('/sessions/active'),
 
@@ -766,6 +781,48 @@ export const api = {
 			method: 'POST',
 			body: JSON.stringify({ family_id: familyId, session_id: sessionId, include_github: includeGithub })
 		}),
+	// Streams the narrative over SSE: onToken receives each text delta as it
+	// arrives; resolves with the final (stored) description.
+	streamEnrichedDescription: async (
+		familyId: number,
+		sessionId: number,
+		onToken: (text: string) => void,
+		includeGithub: boolean = true
+	): Promise<EnrichedDescribeResponse> => {
+		const res = await fetch(`${API_BASE}/projects/describe/enriched/stream`, {
+			method: 'POST',
+			headers: { 'Content-Type': 'application/json' },
+			body: JSON.stringify({ family_id: familyId, session_id: sessionId, include_github: includeGithub })
+		});
+		if (!res.ok) {
+			const error = await res.json().catch(() => ({ detail: res.statusText }));
+			throw new Error(error.detail || `HTTP ${res.status}`);
+		}
+		const reader = res.body?.getReader();
+		if (!reader) throw new Error('No response body');
+
+		const decoder = new TextDecoder();
+		let buffer = '';
+		while (true) {
+			const { done, value } = await reader.read();
+			if (done) break;
+			buffer += decoder.decode(value, { stream: true });
+			const lines = buffer.split('\n');
+			buffer = lines.pop() || '';
+			for (const line of lines) {
+				if (!line.startsWith('data: ')) continue;
+				const event = JSON.parse(line.slice(6));
+				if (event.type === 'token') {
+					onToken(event.content);
+				} else if (event.type === 'done') {
+					return event as EnrichedDescribeResponse;
+				} else if (event.type === 'error') {
+					throw new Error(event.content);
+				}
+			}
+		}
+		throw new Error('Stream ended before the description was complete');
+	},
 	searchGithubRepos: () =>
 		request<{ repos: GitHubRepoInfo[] }>('/projects/github/search', { method: 'POST' }),
 	linkGithubRepo: (familyId: number, repoFullName: string) =>